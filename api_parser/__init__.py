@@ -9,12 +9,21 @@ See the submodules for detailed functionality.
 import argparse as ap
 import ast
 import datetime as dt
+import importlib
 import json
+import sys
 
+from api_parser._batch import create_batch_subparser
+from api_parser._daemon import create_daemon_subparser
 from api_parser._locations import create_location_subparser
+from api_parser._state import create_state_subparser
 from api_parser._traffic import create_traffic_subparser
 from api_parser._users import create_user_subparser
 
+# Help of the record file arguments
+INPUT_HELP = 'JSON array, NDJSON or CSV (with the columns of --format csv), optionally .gz or .zst compressed. ' \
+             'Records are read as the requests go out.'
+
 
 def create_parser():
     """
@@ -36,16 +45,85 @@ def create_parser():
     parser.add_argument('--pending', help="Lists pending changes.", action='store_true')
     parser.add_argument(
         '--apply_after',
-        help='Forces application of changes before logging out after several requests.',
+        help='Activates the changes after every APPLY_AFTER successful changes. Reads do not count. Activations '
+             'requested by concurrent workers at once are sent only once.',
         type=int,
         default=0
     )
+    parser.add_argument('--activate_every', type=float, default=0, metavar='SECONDS',
+                        help='Activates the changes once SECONDS have passed since the first change not activated. '
+                             'With this option or --apply_after, the last changes are activated and their activation '
+                             'awaited before logging out.')
     parser.add_argument('--conf', help='Specifies config file.', default='config/config.json')
     parser.add_argument('--creds', help='Specifies config file.', type=_json_obj_file, default=None)
     parser.add_argument('--output', '-o', help='Custom path where the output JSON will be stored.',
                         default=_output_name())
+    parser.add_argument('--format', choices=['json', 'ndjson', 'csv', 'parquet'], default='json',
+                        help='Output format. ndjson writes one entry per line as the pages arrive, with constant '
+                             'memory and partial output if the run is interrupted. csv and parquet flatten users, '
+                             'locations and VPN credentials into a fixed set of columns (see zia_client.export) and '
+                             'are written in chunks as the pages arrive. parquet requires the pyarrow package.')
+    parser.add_argument('--indent', type=int, default=4,
+                        help='Indent width of the json output. 0 writes compact JSON, about half the size and the '
+                             'fastest to write.')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=None,
+                        help='Compresses the output. Defaults to the compression of the output extension (.gz or '
+                             '.zst), if any. zstd requires the zstandard package. Parquet files default to snappy.')
     parser.add_argument('--no_verbosity', help='Disables detailed verbosity.', action='store_true')
     parser.add_argument('--print_results', '-p', help='Prints results.', action='store_true')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Concurrent requests of the subcommands that process a list of ids or records.')
+    parser.add_argument('--max_rps', type=float, default=None,
+                        help='Maximum requests per second. Overrides the max_rps of the config file.')
+    parser.add_argument('--shared_rate', default=None, metavar='FILE',
+                        help='Shares the rate limits (--max_rps and the stricter per-endpoint ones) with the other '
+                             'processes of the host run with the same FILE, so that concurrent runs split the budget. '
+                             'Overrides the shared_rate of the config file. Unix only.')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapts the requests in flight of every endpoint to the 429 responses and latency of the '
+                             'API (AIMD). Use with a high --workers: the workers then settle at the highest '
+                             'throughput the tenant allows.')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Sends a GET again when it gets no response within the p95 latency of its endpoint, and '
+                             'takes the first response. Cuts the tail latency of jobs that make many GETs. Hedges '
+                             'only use spare --max_rps tokens and are at most a tenth of the GETs.')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Prints the requests, errors, 429 responses, p50/p95 latencies and concurrency limits '
+                             'per endpoint to stderr at the end.')
+    parser.add_argument('--journal', default=None,
+                        help='Appends the outcome of every record processed by list subcommands (create, update, '
+                             'info...) to this file, synced to disk in batches.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skips the records that succeeded according to the --journal file, so an interrupted run '
+                             'only does the remaining work.')
+    parser.add_argument('--deadline', type=float, default=None, metavar='SECONDS',
+                        help='Stops sending requests after this number of seconds. Subcommands that process a list of '
+                             'ids or records return the results obtained so far, other subcommands fail. The run '
+                             'exits with an error if the deadline was reached. Every request also times out after the '
+                             'connect_timeout and read_timeout of the config file.')
+    parser.add_argument('--no_progress', action='store_true',
+                        help='Disables the progress line (done/total, rate and ETA) printed to stderr while processing '
+                             'lists.')
+
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record', help='Records the HTTP session, with credentials redacted, to the given cassette '
+                                           'file. Compressed if it ends with .gz.', default=None)
+    cassette.add_argument('--replay', help='Replays the given cassette file instead of connecting to the API.',
+                          default=None)
+    parser.add_argument('--daemon', default=None,
+                        help='Runs the subcommand in a daemon started with the serve subcommand instead of logging in. '
+                             'Unix socket path or http://127.0.0.1:<port>.')
+    parser.add_argument('--daemon_token', default=None, metavar='FILE',
+                        help='Token file of an HTTP daemon, as given to its --token_file.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profiles the run. Prints the wall-clock time per phase (imports, mapper_imports, login, '
+                             'command, http, json_decode, rate_limit_sleep, save_output...; http, json_decode and '
+                             'rate_limit_sleep are nested in the others), the CPU hot spots and the peak RSS to '
+                             'stderr, and writes them to <output>.profile.json and <output>.pstats. imports covers the '
+                             'parser and the client, mapper_imports the mapper of the subcommand, and modules imported '
+                             'on first use, as dateutil or pyarrow, count in the phase that uses them.')
+    parser.add_argument('--replay_speed', type=float, default=1.0,
+                        help='Latency multiplier for --replay. 1 replays at the recorded speed, 0 without latency.')
 
     # Create subparsers
     subparsers = parser.add_subparsers(required=True, dest='Any of the subcommands')
@@ -59,6 +137,15 @@ def create_parser():
     # Create traffic parser
     create_traffic_subparser(subparsers)
 
+    # Create batch parser
+    create_batch_subparser(subparsers)
+
+    # Create daemon parser
+    create_daemon_subparser(subparsers)
+
+    # Create state parser
+    create_state_subparser(subparsers)
+
     return parser
 
 
@@ -107,8 +194,166 @@ def _json_obj_file(arg: str):
         with open(arg) as f:
             return json.load(f)
     else:
-        data = ast.literal_eval(arg)
         try:
-            return json.dumps(data)
-        except json.JSONDecodeError:
+            return ast.literal_eval(arg)
+        except (ValueError, SyntaxError):
             raise ap.ArgumentTypeError('Input should be a JSON object.')
+
+
+def _streams(args):
+    """Tells if the output format is written entry by entry, in which case full retrievals should be lazy.
+
+    Args:
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        bool: True unless the output is a JSON document.
+    """
+    return args.format != 'json'
+
+
+def _each(func, clt, items, args, label=''):
+    """Calls a `zia_client` function for every item honoring the global `--workers`, `--no_progress`, `--journal` and
+    `--resume` options.
+
+    Args:
+        func: Function whose arguments are the client and the item.
+        clt: API zia_client that must me logged in beforehand.
+        items: Ids or records. May be an iterator, like the ones of `zia_client._readers`.
+        args: Parsed api_parser. Namespace object.
+        label (str, optional): Label of the progress line.
+
+    Returns:
+        The results, in the order of the items. A list, or an iterator if the output format streams (see `_streams`).
+        Items skipped by `--resume` have no result.
+    """
+    from zia_client._deadline import current_deadline
+    from zia_client._parallel import iter_parallel
+    from zia_client._scheduler import BULK, INTERACTIVE
+
+    def call(item):
+        return func(clt, item)
+
+    # One-off lookups go before the requests of bulk jobs sharing the rate limit, as in the daemon
+    priority = INTERACTIVE if hasattr(items, '__len__') and len(items) == 1 else BULK
+
+    journal = None
+    if args.journal:
+        from zia_client._journal import Journal
+
+        journal = Journal(args.journal, resume=args.resume)
+        if hasattr(items, '__len__'):
+            items = [item for item in items if not journal.done(item)]
+        else:
+            items = (item for item in items if not journal.done(item))
+        call = journal.wrap(call)
+    elif args.resume:
+        raise ValueError('--resume requires --journal.')
+
+    # The items not started by the --deadline are dropped instead of failing the run
+    results = iter_parallel(call, items, workers=args.workers, label=label, progress=not args.no_progress,
+                            priority=priority, deadline=current_deadline())
+
+    if journal is not None:
+        results = _journaled(results, journal, label)
+
+    return results if _streams(args) else list(results)
+
+
+def _journaled(results, journal, label):
+    """Yields the results and closes the journal when they are exhausted or the run fails.
+    """
+    try:
+        yield from results
+    finally:
+        journal.close()
+        if journal.skipped:
+            print(f'{label}: skipped {journal.skipped} records completed in a previous run.', file=sys.stderr)
+
+
+def _upsert_arguments(p):
+    """Adds the arguments of the upsert subcommands.
+
+    Args:
+        p: Subcommand parser.
+    """
+    p.add_argument('file', type=str, help='File with the desired records. Records without id are created, the rest '
+                                          'are updated only if they differ from the server state. ' + INPUT_HELP)
+    p.add_argument('--hash_cache', default=None,
+                   help='File where the state of the server records is kept between runs, so unchanged records are '
+                        'skipped without any request.')
+    p.add_argument('--refresh', action='store_true',
+                   help='Discards the state kept in --hash_cache and lists the server records again.')
+    p.add_argument('--dry_run', action='store_true', help='Reports what would change without changing anything.')
+
+
+def _upsert(clt, args, entity, label):
+    """Upserts the records of the file given to an upsert subcommand. See `zia_client.upsert`.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+        entity (str): 'users', 'locations' or 'vpn_credentials'.
+        label (str): Label of the progress line.
+
+    Returns:
+        dict: Counts of unchanged, updated and created records and the id and status of every record.
+    """
+    from zia_client._readers import iter_records
+    from zia_client.upsert import Upserter
+
+    upserter = Upserter(clt, entity, args.hash_cache, refresh=args.refresh, dry_run=args.dry_run)
+    records = iter_records(args.file, entity=entity)
+    try:
+        results = _each(lambda c, record: upserter.upsert(record), clt, records, args, label)
+        records = [{'id': r['id'], 'status': r['status']} for r in results]
+    finally:
+        upserter.save()
+
+    counts = upserter.summary()
+    print(f'{label}: ' + ', '.join(f'{n} {status}' for status, n in counts.items()), file=sys.stderr)
+
+    return {'counts': counts, 'records': records}
+
+
+class _LazyHandler:
+    """
+    Subcommand handler that imports its mapper module only when called, so that building the parser does not load
+    the mappers nor their heavy dependencies (dateutil, the zia_client function modules).
+    """
+
+    def __init__(self, module: str, name: str):
+        """
+        Args:
+            module (str): Dotted path of the module where the mapper is defined.
+            name (str): Name of the mapper function.
+        """
+        self.module = module
+        self.name = name
+
+    def resolve(self):
+        """Imports the module and returns the mapper.
+
+        Returns:
+            The mapper function.
+        """
+        return getattr(importlib.import_module(self.module), self.name)
+
+    def __call__(self, clt, args):
+        return self.resolve()(clt, args)
+
+    def __repr__(self):
+        return f'{self.module}.{self.name}'
+
+
+def _lazy(module: str, name: str):
+    """Returns a lazily resolved subcommand handler. See `_LazyHandler`.
+
+    Args:
+        module (str): Dotted path of the module where the mapper is defined.
+        name (str): Name of the mapper function.
+
+    Returns:
+        _LazyHandler: The handler, to be used as `func` default of a subparser.
+    """
+    return _LazyHandler(module, name)
@@ -0,0 +1,15 @@
+"""
+This subpackage contains the construction function and the end action function of the batch subparser, which runs
+many subcommands in one process and one logged-in session.
+"""
+import api_parser._batch.subparsers as sp
+
+
+def create_batch_subparser(subparsers):
+    """
+    Creates the batch subparser.
+
+    Args:
+        subparsers: Subparser object from argparse obtained from calling ArgumentParser.add_subparsers().
+    """
+    sp.batch_sp(subparsers)
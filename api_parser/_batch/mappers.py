@@ -0,0 +1,220 @@
+"""
+End function of the batch subparser.
+"""
+import json
+import os
+import re
+import shlex
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zia_client import ZIAConnector
+from zia_client._utils import save_output
+
+BARRIER = 'wait'
+
+# Global options that apply to the whole batch run, by destination, which jobs cannot set
+SESSION_OPTIONS = {
+    'conf': '--conf', 'creds': '--creds', 'apply_after': '--apply_after', 'activate_every': '--activate_every',
+    'pending': '--pending', 'no_verbosity': '--no_verbosity', 'print_results': '--print_results',
+    'max_rps': '--max_rps', 'shared_rate': '--shared_rate', 'adaptive': '--adaptive', 'hedge': '--hedge',
+    'metrics': '--metrics', 'deadline': '--deadline', 'record': '--record', 'replay': '--replay',
+    'replay_speed': '--replay_speed', 'daemon': '--daemon', 'daemon_token': '--daemon_token', 'profile': '--profile',
+}
+
+
+def _read_jobs(path):
+    """Reads the job file.
+
+    Args:
+        path (str): Job file. '-' for stdin.
+
+    Returns:
+        list: Job specs (dicts) and `BARRIER` markers, in order.
+    """
+    if path == '-':
+        text = sys.stdin.read()
+    else:
+        with open(path) as f:
+            text = f.read()
+
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+
+    jobs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line == BARRIER:
+            jobs.append(BARRIER)
+        elif line.startswith('{'):
+            jobs.append(json.loads(line))
+        else:
+            jobs.append({'args': shlex.split(line)})
+
+    return jobs
+
+
+def _job_argv(spec):
+    """Gets the argument list of a job spec.
+
+    Args:
+        spec (dict): Job spec.
+
+    Returns:
+        list: Arguments.
+    """
+    if 'args' in spec:
+        return list(spec['args'])
+    return shlex.split(spec['command'])
+
+
+def _parse_job(parser, argv):
+    """Parses the arguments of a job.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of the command line.
+        argv (list): Arguments of the job.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+
+    Raises:
+        ValueError: If they are invalid, set options of the whole batch run or run another batch.
+    """
+    try:
+        job_args = parser.parse_args(argv)
+    except SystemExit:
+        raise ValueError(f'Invalid job arguments: {argv}')
+
+    given = [option for dest, option in SESSION_OPTIONS.items() if getattr(job_args, dest) != parser.get_default(dest)]
+    if given:
+        raise ValueError(f'{", ".join(given)} can only be given to the batch, not to its jobs.')
+    if job_args.func.name == 'batch_mapper':
+        raise ValueError('Batches cannot be nested.')
+
+    return job_args
+
+
+def _output_path(spec, job_args, default_output, output_dir, index):
+    """Decides where the output of a job is written: the spec's `output`, the job's own `--output` or a name made of
+    its position and its subcommand, with the extension of its format and compression.
+
+    Returns:
+        str: Output path.
+    """
+    if spec.get('output'):
+        name = spec['output']
+    elif job_args.output != default_output:
+        name = job_args.output
+    else:
+        argv = _job_argv(spec)
+        # The subparsers of every level share the dest, which ends up with the last subcommand, as 'search'. It and
+        # the word before it, as 'users', name the output. The values of the options before them, as 'csv' in
+        # '--format csv', do not.
+        command = getattr(job_args, 'Any of the subcommands')
+        words = [w for w in argv[:argv.index(command)] if not w.startswith('-')][-1:] + [command]
+        name = f'{index:03d}_{re.sub(r"[^A-Za-z0-9]+", "_", "_".join(words))}.{job_args.format}'
+        # Parquet files are compressed inside
+        if job_args.format != 'parquet':
+            name += {'gzip': '.gz', 'zstd': '.zst'}.get(job_args.compress, '')
+
+    return os.path.join(output_dir, name)
+
+
+def _skipped(index, spec):
+    """Summary entry of a job that was not run.
+    """
+    return {'job': index, 'args': spec.get('args', spec.get('command')), 'output': None, 'status': 'skipped',
+            'error': None, 'seconds': None}
+
+
+def batch_mapper(clt: ZIAConnector, args):
+    """Runs the jobs of the batch file with the logged in client.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        list: Summary of every job: index, arguments, output file, status ('ok', 'error' or 'skipped'), error message
+        and seconds.
+    """
+    from api_parser import create_parser
+
+    parser = create_parser()
+    default_output = parser.get_default('output')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Split the jobs in groups that can run concurrently
+    groups = [[]]
+    for spec in _read_jobs(args.file):
+        if spec == BARRIER:
+            groups.append([])
+        else:
+            groups[-1].append(spec)
+
+    summary = []
+    failed = False
+
+    def parse(index, spec):
+        # Parsers are not meant to be shared by threads, so the jobs are parsed before they are submitted
+        entry = {'job': index, 'args': None, 'output': None, 'status': 'ok', 'error': None, 'seconds': None}
+        try:
+            entry['args'] = _job_argv(spec)
+            return index, spec, entry, _parse_job(parser, entry['args'])
+        except Exception as e:
+            entry['status'] = 'error'
+            entry['error'] = f'{type(e).__name__}: {e}'
+            return index, spec, entry, None
+
+    def run(index, spec, entry, job_args):
+        start = time.perf_counter()
+        if job_args is not None:
+            try:
+                entry['output'] = _output_path(spec, job_args, default_output, args.output_dir, index)
+
+                result = job_args.func(clt, job_args)
+                save_output(result, entry['output'], job_args.format, job_args.compress,
+                            entity=getattr(job_args, 'entity', None), indent=job_args.indent)
+            except Exception as e:
+                entry['status'] = 'error'
+                entry['error'] = f'{type(e).__name__}: {e}'
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+
+        if clt.verbosity:
+            print(f"Job {index} {entry['status']}: {entry['args']}", file=sys.stderr)
+
+        return entry
+
+    index = 0
+    for group in groups:
+        numbered = list(enumerate(group, start=index))
+        index += len(group)
+
+        if failed:
+            summary += [_skipped(i, spec) for i, spec in numbered]
+            continue
+
+        if args.parallel > 1:
+            jobs = [parse(i, spec) for i, spec in numbered]
+            with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+                entries = list(pool.map(lambda job: run(*job), jobs))
+        else:
+            entries = []
+            for i, spec in numbered:
+                entries.append(run(*parse(i, spec)))
+                if entries[-1]['status'] == 'error' and not args.keep_going:
+                    break
+            entries += [_skipped(i, spec) for i, spec in numbered[len(entries):]]
+
+        summary += entries
+        failed = failed or (not args.keep_going and any(e['status'] == 'error' for e in entries))
+
+    if not args.no_activate and any(e['status'] == 'ok' for e in summary):
+        clt.activation.activate()
+
+    return summary
@@ -0,0 +1,37 @@
+"""
+Functions to build the batch subparser.
+"""
+import argparse as ap
+
+import api_parser as prs
+
+_MAPPERS = 'api_parser._batch.mappers'
+
+
+def batch_sp(subparsers):
+    """
+    Creates the batch subparser.
+
+    Args:
+        subparsers: Subparser object from argparse obtained from calling ArgumentParser.add_subparsers().
+    """
+    p: ap.ArgumentParser = subparsers.add_parser(
+        'batch',
+        description="Runs many subcommands in one process and one logged-in session. Every non-empty line of the "
+                    "file is a job: either a subcommand line, as in 'users search --all', or a JSON job spec, as in "
+                    "'{\"args\": [\"users\", \"search\", \"--all\"], \"output\": \"users.json\"}' (\"command\" may "
+                    "be given instead of \"args\"). The whole file can also be a JSON list of job specs. Lines "
+                    "starting with # are comments and a 'wait' line waits for all previous jobs before going on. "
+                    "Every job writes its own output file; the batch output is a summary of all jobs. Changes are "
+                    "activated once at the end. Jobs may set the global options of their own work (--output, --format, "
+                    "--indent, --compress, --workers, --no_progress, --journal, --resume); the ones of the session, as "
+                    "--conf, --apply_after or --max_rps, are given to the batch and rejected in jobs."
+    )
+    p.add_argument('file', nargs='?', default='-', help='Job file. Defaults to stdin.')
+    p.add_argument('--output_dir', default='.', help='Directory where the job outputs are written.')
+    p.add_argument('--parallel', type=int, default=1,
+                   help='Number of jobs run at the same time. Jobs between two wait lines must be independent.')
+    p.add_argument('--keep_going', action='store_true', help='Goes on with the next jobs when a job fails.')
+    p.add_argument('--no_activate', action='store_true', help='Does not activate the changes at the end.')
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'batch_mapper'))
@@ -0,0 +1,18 @@
+"""
+This subpackage contains the daemon mode: a resident process that keeps the logged-in session, its connection pool and
+its response cache warm and runs the subcommands sent by thin clients over a local Unix socket or HTTP on localhost.
+
+The construction function can be found in the subparsers module, the end action function in the mappers module, the
+server in the server module and the thin client in the client module.
+"""
+import api_parser._daemon.subparsers as sp
+
+
+def create_daemon_subparser(subparsers):
+    """
+    Creates the daemon subparser.
+
+    Args:
+        subparsers: Subparser object from argparse obtained from calling ArgumentParser.add_subparsers().
+    """
+    sp.serve_sp(subparsers)
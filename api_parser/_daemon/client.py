@@ -0,0 +1,108 @@
+"""
+Thin client of the daemon. Only uses the standard library, so calling a running daemon does not pay the import of the
+HTTP stack nor of the `zia_client` package.
+"""
+import gzip
+import json
+import socket
+import sys
+import urllib.error
+import urllib.request
+
+
+def request(address: str, message: dict, timeout: float = None, token: str = None):
+    """Sends a message to the daemon and waits for the reply.
+
+    Args:
+        address (str): Unix socket path or 'http://127.0.0.1:<port>'.
+        message (dict): The message. See `api_parser._daemon.server`.
+        timeout (float, optional): Seconds to wait. Defaults to no limit.
+        token (str, optional): Secret of the daemon. Required over HTTP.
+
+    Returns:
+        dict: The reply.
+    """
+    data = json.dumps(message).encode()
+
+    if address.startswith('http://'):
+        headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
+        req = urllib.request.Request(address, data=data, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # Rejected requests are answered with an error message too
+            with e:
+                return json.loads(e.read())
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(address)
+        s.sendall(data + b'\n')
+        with s.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+def _strip_option(argv, option):
+    """Removes an option and its value from an argument list.
+
+    Args:
+        argv (list): Arguments.
+        option (str): Option name, as in '--daemon'.
+
+    Returns:
+        list: Remaining arguments.
+    """
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == option:
+            skip = True
+        elif not arg.startswith(option + '='):
+            result.append(arg)
+    return result
+
+
+def run_remote(args, argv):
+    """Runs the command line in the daemon and writes the result as the script does locally.
+
+    Args:
+        args: Parsed arguments.
+        argv (list): Raw command line arguments, without the program name.
+    """
+    if args.format in ('csv', 'parquet'):
+        raise SystemExit(f'{args.format} output is not supported with --daemon.')
+
+    token = None
+    if args.daemon.startswith('http://'):
+        if not args.daemon_token:
+            raise SystemExit('--daemon_token is required with an HTTP daemon.')
+        with open(args.daemon_token) as f:
+            token = f.read().strip()
+
+    argv = _strip_option(_strip_option(argv, '--daemon'), '--daemon_token')
+    reply = request(args.daemon, {'op': 'run', 'argv': argv}, token=token)
+
+    if reply['status'] != 'ok':
+        print(reply['error'], file=sys.stderr)
+        sys.exit(1)
+
+    result = reply['result']
+    compressed = args.compress == 'gzip' or (args.compress is None and args.output.endswith('.gz'))
+    if args.compress == 'zstd' or (args.compress is None and args.output.endswith('.zst')):
+        raise SystemExit('zstd output is not supported with --daemon.')
+
+    with (gzip.open if compressed else open)(args.output, 'wt') as f:
+        if args.format == 'ndjson':
+            for entry in result if isinstance(result, list) else [result]:
+                f.write(json.dumps(entry) + '\n')
+        else:
+            json.dump(result, f, indent=args.indent or None, separators=None if args.indent else (',', ':'))
+
+    if args.print_results:
+        print(json.dumps(result, indent=args.indent or None, separators=None if args.indent else (',', ':')))
+
+    if reply.get('partial'):
+        sys.exit(f'Deadline of {args.deadline:g} seconds reached: the results are partial.')
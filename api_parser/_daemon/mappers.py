@@ -0,0 +1,35 @@
+"""
+End function of the daemon subparser.
+"""
+from api_parser._daemon.server import DaemonServer, load_token
+from zia_client import ZIAConnector
+from zia_client._cache import ResponseCache
+
+
+def serve_mapper(clt: ZIAConnector, args):
+    """Serves thin clients with the logged in client until shutdown.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        dict: Usage statistics of the daemon.
+    """
+    if args.cache_ttl > 0:
+        clt.cache = ResponseCache(args.cache_ttl, index=not args.no_index)
+
+    token = None
+    if args.port is not None:
+        if not args.token_file:
+            raise ValueError('--port requires --token_file.')
+        token = load_token(args.token_file)
+
+    server = DaemonServer(clt, socket_path=args.socket, port=args.port, keepalive=args.keepalive, token=token)
+
+    if args.warm:
+        server.warm(args.warm)
+
+    server.serve()
+
+    return server.stats()
@@ -0,0 +1,320 @@
+"""
+Daemon server. Runs the subcommands sent by thin clients with one logged-in `ZIAConnector`.
+
+Protocol: every message is a JSON object. Over the Unix socket, messages and replies are newline delimited and a
+connection may carry any number of them. Over HTTP, a message is the body of a POST to `/` and the reply is the body
+of the response. Messages::
+
+    {"op": "run", "argv": ["users", "info", "--ids", "12"]}   -> {"status": "ok", "result": ..., "partial": false,
+                                                                  "seconds": ...}
+    {"op": "ping"}                                           -> {"status": "ok", "result": "pong"}
+    {"op": "stats"}                                          -> {"status": "ok", "result": {...}}
+    {"op": "shutdown"}                                       -> {"status": "ok", "result": "bye"}
+
+Failed operations reply `{"status": "error", "error": "..."}`.
+
+The arguments of a run may set `--deadline`, which bounds that command only, and the output options, which the thin
+client applies. The other options of the whole session, as `--conf` or `--max_rps`, are set when the daemon starts
+and are rejected. `partial` is true when the deadline dropped some of the results.
+
+Both listeners run any subcommand with the admin session, so only the user of the daemon may reach them. The Unix
+socket is created readable and writable by its owner only. HTTP requests must carry the secret of the token file in an
+`Authorization: Bearer <token>` header and an `application/json` body, and must not carry an `Origin` header, so that
+web pages open in a browser of the host cannot send them.
+"""
+import hmac
+import os
+import secrets
+import socketserver
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from zia_client import ZIAConnector
+from zia_client._deadline import Deadline, within
+from zia_client._exceptions import AuthResponseException
+from zia_client._json import DEFAULT_CODEC
+
+# Options of the whole session that a command may still give: the deadline is applied to the command and the thin
+# client prints the results.
+_COMMAND_OPTIONS = frozenset({'deadline', 'print_results'})
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a Unix socket connection: one JSON message per line.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            reply = self.server.daemon.dispatch(line)
+            self.wfile.write((DEFAULT_CODEC.dumps(reply) + '\n').encode())
+            self.wfile.flush()
+
+
+def load_token(path: str):
+    """Reads the secret of the HTTP listener, creating the file with a random one if it does not exist.
+
+    Args:
+        path (str): Token file.
+
+    Returns:
+        str: The secret.
+
+    Raises:
+        ValueError: If the file can be read by other users than its owner, or is empty.
+    """
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_urlsafe(32) + '\n')
+
+    if os.stat(path).st_mode & 0o077:
+        raise ValueError(f'The token file {path} must only be accessible by its owner (chmod 600).')
+
+    with open(path) as f:
+        token = f.read().strip()
+    if not token:
+        raise ValueError(f'The token file {path} is empty.')
+    return token
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    """
+    Handles an HTTP request: the body of a POST to / is the JSON message.
+    """
+
+    def do_POST(self):
+        # Browsers add an Origin header to cross-site requests, which other clients do not need
+        if 'Origin' in self.headers:
+            return self._reply(403, {'status': 'error', 'error': 'Cross-origin requests are not allowed.'})
+        if self.headers.get_content_type() != 'application/json':
+            return self._reply(415, {'status': 'error', 'error': 'The body must be application/json.'})
+
+        authorization = self.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {self.server.token}'.encode()):
+            return self._reply(401, {'status': 'error', 'error': 'Missing or wrong token.'})
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(200, self.server.daemon.dispatch(body))
+
+    def _reply(self, status, message):
+        reply = DEFAULT_CODEC.dumps(message).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class DaemonServer:
+    """
+    Resident server that keeps a logged-in `ZIAConnector` and runs subcommands for thin clients.
+    """
+
+    def __init__(self, clt: ZIAConnector, socket_path: str = None, port: int = None, keepalive: float = 300,
+                 token: str = None):
+        """
+        Args:
+            clt (ZIAConnector): Logged in API client.
+            socket_path (str, optional): Unix socket path. Either this or `port` must be given.
+            port (int, optional): HTTP port, bound to 127.0.0.1.
+            keepalive (float, optional): Seconds between the requests that keep the session alive. 0 disables them.
+                Defaults to 300.
+            token (str, optional): Secret the HTTP requests must carry. Required with `port`. See `load_token`.
+
+        Raises:
+            ValueError: If `port` is given without `token`.
+        """
+        from api_parser import create_parser
+
+        self.clt = clt
+        self.parser = create_parser()
+        self.keepalive = keepalive
+        self.lock = threading.RLock()
+        self.stopped = threading.Event()
+        self.started = time.time()
+        self.commands = 0
+        self.errors = 0
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            # Created without access for others, instead of restricted once bound
+            umask = os.umask(0o177)
+            try:
+                self.server = _UnixServer(socket_path, _UnixHandler)
+            finally:
+                os.umask(umask)
+            self.address = socket_path
+        else:
+            if not token:
+                raise ValueError('The HTTP listener requires a token.')
+            self.server = ThreadingHTTPServer(('127.0.0.1', port), _HTTPHandler)
+            self.server.daemon_threads = True
+            self.server.token = token
+            self.address = f'http://127.0.0.1:{port}'
+
+        self.server.daemon = self
+
+    def run_command(self, argv):
+        """Parses and runs a subcommand, within its `--deadline` if given. Logs in again once if the session expired.
+
+        Args:
+            argv (list): Subcommand arguments, as in the command line.
+
+        Returns:
+            tuple: The result of the subcommand, and whether the deadline dropped some of it.
+
+        Raises:
+            ValueError: If the arguments are invalid, set options of the daemon's session or serve another daemon.
+        """
+        from api_parser._batch.mappers import SESSION_OPTIONS
+
+        # Parsers are not meant to be shared by threads
+        with self.lock:
+            try:
+                args = self.parser.parse_args(argv)
+            except SystemExit:
+                raise ValueError(f'Invalid arguments: {argv}')
+
+        given = [option for dest, option in SESSION_OPTIONS.items()
+                 if dest not in _COMMAND_OPTIONS and getattr(args, dest) != self.parser.get_default(dest)]
+        if given:
+            raise ValueError(f'{", ".join(given)} can only be given to the daemon when it starts, not to its commands.')
+        if getattr(args.func, 'name', None) == 'serve_mapper':
+            raise ValueError('The daemon cannot serve itself.')
+
+        deadline = Deadline(args.deadline) if args.deadline is not None else None
+
+        # The connector is thread-safe, so commands of different clients run at the same time.
+        logins = self.clt.logins
+        try:
+            result = self._run(args, deadline)
+        except AuthResponseException as e:
+            if e.status_code != 401:
+                raise
+            self.clt.relogin(logins)
+            result = self._run(args, deadline)
+
+        return result, deadline is not None and deadline.exceeded
+
+    def _run(self, args, deadline):
+        with within(deadline):
+            result = args.func(self.clt, args)
+            # Lazy retrievals are consumed here, as the reply is a single JSON document.
+            return list(result) if isinstance(result, Iterator) else result
+
+    def dispatch(self, raw):
+        """Decodes and runs a message.
+
+        Args:
+            raw (bytes): JSON message.
+
+        Returns:
+            dict: The reply.
+        """
+        start = time.perf_counter()
+        try:
+            message = DEFAULT_CODEC.loads(raw)
+            op = message.get('op', 'run')
+            extra = {}
+
+            if op == 'run':
+                with self.lock:
+                    self.commands += 1
+                result, partial = self.run_command(message['argv'])
+                extra['partial'] = partial
+            elif op == 'ping':
+                result = 'pong'
+            elif op == 'stats':
+                result = self.stats()
+            elif op == 'shutdown':
+                threading.Thread(target=self.stop).start()
+                result = 'bye'
+            else:
+                raise ValueError(f'Unknown operation: {op}.')
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            return {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+
+        return {'status': 'ok', 'result': result, **extra, 'seconds': round(time.perf_counter() - start, 6)}
+
+    def warm(self, path):
+        """Runs the subcommands of a file to warm the caches. Failures are reported and ignored.
+
+        Args:
+            path (str): File with subcommand lines or JSON job specs, as in batch files.
+        """
+        from api_parser._batch.mappers import BARRIER, _job_argv, _read_jobs
+
+        for spec in _read_jobs(path):
+            if spec == BARRIER:
+                continue
+            try:
+                self.run_command(_job_argv(spec))
+            except Exception as e:
+                print(f'Warm-up of {_job_argv(spec)} failed: {e}', file=sys.stderr)
+
+    def _keep_alive(self):
+        while not self.stopped.wait(self.keepalive):
+            try:
+                self.clt.activation_status()
+            except Exception as e:
+                print(f'Keep-alive failed: {e}', file=sys.stderr)
+
+    def serve(self):
+        """
+        Serves until `stop` is called or Ctrl-C is pressed.
+        """
+        if self.keepalive > 0:
+            threading.Thread(target=self._keep_alive, daemon=True).start()
+
+        print(f'Serving on {self.address}.', file=sys.stderr)
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopped.set()
+            self.server.server_close()
+            if isinstance(self.server, _UnixServer) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def stop(self):
+        """
+        Stops serving. Must not be called from the serving thread.
+        """
+        self.stopped.set()
+        self.server.shutdown()
+
+    def stats(self):
+        """Returns the usage statistics.
+
+        Returns:
+            dict: Uptime, commands run, errors, cache statistics and request metrics per endpoint family.
+        """
+        return {
+            'address': self.address,
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'commands': self.commands,
+            'errors': self.errors,
+            'cache': self.clt.cache.stats() if self.clt.cache is not None else None,
+            'metrics': self.clt.metrics.snapshot(),
+        }
@@ -0,0 +1,42 @@
+"""
+Functions to build the daemon subparser.
+"""
+import argparse as ap
+
+import api_parser as prs
+
+_MAPPERS = 'api_parser._daemon.mappers'
+
+
+def serve_sp(subparsers):
+    """
+    Creates the subparser that starts the daemon.
+
+    Args:
+        subparsers: Subparser object from argparse obtained from calling ArgumentParser.add_subparsers().
+    """
+    p: ap.ArgumentParser = subparsers.add_parser(
+        'serve',
+        description="Starts a resident process that keeps the session logged in and its caches warm, and runs the "
+                    "subcommands sent by thin clients (ziaclient.py --daemon ADDRESS <subcommand>). Stops on Ctrl-C "
+                    "or when a client sends the shutdown operation; the output is then the usage statistics."
+    )
+
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument('--socket', help='Path of the Unix socket to listen on.')
+    g.add_argument('--port', type=int, help='Port to listen on with HTTP, bound to 127.0.0.1 only. Requires '
+                                            '--token_file.')
+    p.add_argument('--token_file', default=None,
+                   help='File with the secret the HTTP requests must carry. Created with a random one if it does not '
+                        'exist. Must only be accessible by its owner (chmod 600). Clients give it with --daemon_token.')
+
+    p.add_argument('--cache_ttl', type=float, default=300, help='Seconds GET responses are cached. Defaults to 300.')
+    p.add_argument('--no_index', action='store_true',
+                   help='Does not index the records of cached lists by id. By default a listing of users or locations '
+                        'also warms the lookups of single users or locations.')
+    p.add_argument('--keepalive', type=float, default=300,
+                   help='Seconds between the requests that keep the session alive. 0 disables them. Defaults to 300.')
+    p.add_argument('--warm', default=None,
+                   help='File with subcommand lines (as in batch files) run at start to warm the caches.')
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'serve_mapper'))
@@ -27,3 +27,4 @@ def create_location_subparser(subparsers):
     sp.location_create_sp(locs_subprs)
     sp.location_del_sp(locs_subprs)
     sp.location_info_sp(locs_subprs)
+    sp.location_upsert_sp(locs_subprs)
@@ -3,9 +3,11 @@ Module where end functions for the location parser are defined.
 """
 import json
 
+import api_parser as prs
 import zia_client.custom as cstm
 import zia_client.locations as locs
 from zia_client import ZIAConnector
+from zia_client._readers import iter_records
 
 
 # FINAL ACTION FUNCTIONS
@@ -23,7 +25,7 @@ def location_ids_mapper(c: ZIAConnector, args):
     """
     return locs.get_location_ids(c, includeSubLocations=args.sub, includeParentLocations=args.parent, full=args.all,
                                  search=args.search, sslScanEnabled=args.ssl, bwEnforced=args.bw,
-                                 authRequired=args.auth, xffEnabled=args.xff)
+                                 authRequired=args.auth, xffEnabled=args.xff, lazy=prs._streams(args))
 
 
 def location_search_mapper(c: ZIAConnector, args):
@@ -40,7 +42,7 @@ def location_search_mapper(c: ZIAConnector, args):
     """
     return locs.search_locations(c, search=args.search, sslScanEnabled=args.sslScan, xffEnabled=args.xff,
                                  authRequired=args.authReq, bwEnforced=args.bwEnf, page=args.page,
-                                 pageSize=args.pageSize, full=args.all)
+                                 pageSize=args.pageSize, full=args.all, lazy=prs._streams(args))
 
 
 def location_update_mapper(c: ZIAConnector, args):
@@ -55,16 +57,15 @@ def location_update_mapper(c: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    with open(args.file) as f:
-        locations = json.load(f)
+    locations = iter_records(args.file, entity='locations')
 
-    result = [locs.update_location(c, location) for location in locations]
+    result = prs._each(locs.update_location, c, locations, args, 'locs update')
     return result
 
 
 def location_create_mapper(c: ZIAConnector, args):
     """
-    Creates a new location.
+    Creates new locations. The file may hold a single location or many of them.
     
     Args:
         c: API zia_client that must me logged in beforehand.
@@ -74,9 +75,11 @@ def location_create_mapper(c: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    with open(args.file) as f:
-        location = json.load(f)
-    return locs.create_location(c, location)
+    result = list(prs._each(locs.create_location, c, iter_records(args.file, entity='locations'), args,
+                            'locs create'))
+
+    # A single location gets its response alone
+    return result[0] if len(result) == 1 else result
 
 
 def location_delete_mapper(c: ZIAConnector, args):
@@ -100,13 +103,13 @@ def location_all_parents_subs_mapper(c: ZIAConnector, args):
     
     Args:
         c: API zia_client that must me logged in beforehand.
-        args (unused): Parsed api_parser. Namespace object.
+        args: Parsed api_parser. Namespace object.
 
     Returns:
         The requests' response. Generally a JSON object.
 
     """
-    return cstm.obtain_all_locations_sublocations(c)
+    return cstm.obtain_all_locations_sublocations(c, workers=args.workers, progress=not args.no_progress)
 
 
 def location_info_mapper(c: ZIAConnector, args):
@@ -141,7 +144,11 @@ def location_bulkdel_mapper(c: ZIAConnector, args):
     else:
         ids = args.ids
 
-    return locs.bulk_del_location(c, ids)
+    # As many locations per request as the API deletes at once
+    size = c.endpoints.get('locs', 'bulk').bulk_limit or 100
+    chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    return prs._each(locs.bulk_del_location, c, chunks, args, 'locs bulkdel')
 
 
 def location_parent_subs_mapper(c: ZIAConnector, args):
@@ -161,6 +168,20 @@ def location_parent_subs_mapper(c: ZIAConnector, args):
     else:
         ids = args.ids
 
-    result = [locs.get_location_info(c, id_) for id_ in ids]
+    result = prs._each(locs.get_location_info, c, ids, args, 'locs info')
 
     return result
+
+
+def location_upsert_mapper(c: ZIAConnector, args):
+    """Maps the arguments to the upsert of locations.
+
+    Args:
+        c: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        Counts of unchanged, updated and created locations and the status of every one.
+
+    """
+    return prs._upsert(c, args, 'locations', 'locs upsert')
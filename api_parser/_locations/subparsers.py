@@ -3,7 +3,8 @@ Functions to build the location subparser.
 """
 import argparse as ap
 import api_parser as prs
-import api_parser._locations.mappers as mp
+
+_MAPPERS = 'api_parser._locations.mappers'
 
 
 def location_info_sp(locs_subprs):
@@ -17,7 +18,7 @@ def location_info_sp(locs_subprs):
     sp = locs_subprs.add_parser('info', description="Gets location information based on specified ID.")
     sp.add_argument('loc_id', type=int, help="Location identifier.")
 
-    sp.set_defaults(func=mp.location_info_mapper)
+    sp.set_defaults(func=prs._lazy(_MAPPERS, 'location_info_mapper'), entity='locations')
 
 
 def location_all_parents_subs_sp(locs_subprs):
@@ -29,7 +30,7 @@ def location_all_parents_subs_sp(locs_subprs):
     """
     all_p = locs_subprs.add_parser('all', description="Gets all existing locations.")
 
-    all_p.set_defaults(func=mp.location_all_parents_subs_mapper)
+    all_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_all_parents_subs_mapper'), entity='locations')
 
 
 def location_ids_sp(locs_subprs):
@@ -70,7 +71,7 @@ def location_ids_sp(locs_subprs):
                        help="Filter based on whether the Enforce XFF Forwarding setting is enabled or disabled for a "
                             "location.")
 
-    ids_p.set_defaults(func=mp.location_ids_mapper)
+    ids_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_ids_mapper'))
 
 
 def location_search_sp(locs_subprs):
@@ -107,7 +108,7 @@ def location_search_sp(locs_subprs):
     locs_search_p.add_argument(
         '--all', action='store_true', help='Retrieves all results. This option overrides page and pageSize.')
 
-    locs_search_p.set_defaults(func=mp.location_search_mapper)
+    locs_search_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_search_mapper'), entity='locations')
 
 
 def location_update_sp(locs_subprs):
@@ -119,9 +120,9 @@ def location_update_sp(locs_subprs):
     """
     locs_update_p = locs_subprs.add_parser('update', description="Updates the specified locations.")
     locs_update_p.add_argument(
-        'file', help="JSON file with a list of location objects (dicts).")
+        'file', help="File with the location objects (dicts). " + prs.INPUT_HELP)
 
-    locs_update_p.set_defaults(func=mp.location_update_mapper)
+    locs_update_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_update_mapper'))
 
 
 def location_create_sp(locs_subprs):
@@ -134,9 +135,9 @@ def location_create_sp(locs_subprs):
     """
     locs_create_p = locs_subprs.add_parser('create', description="Creates new location.")
     locs_create_p.add_argument(
-        'file', help="JSON file with a list of location objects (dicts).")
+        'file', help="File with the location objects (dicts), or a JSON file with a single one. " + prs.INPUT_HELP)
 
-    locs_create_p.set_defaults(func=mp.location_create_mapper)
+    locs_create_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_create_mapper'))
 
 
 def location_del_sp(locs_subprs):
@@ -151,7 +152,7 @@ def location_del_sp(locs_subprs):
     locs_delete_p.add_argument(
         'loc_id', help='Location id.')
 
-    locs_delete_p.set_defaults(func=mp.location_delete_mapper)
+    locs_delete_p.set_defaults(func=prs._lazy(_MAPPERS, 'location_delete_mapper'))
 
 
 def location_bulkdel_sp(locs_subprs):
@@ -171,7 +172,7 @@ def location_bulkdel_sp(locs_subprs):
     g.add_argument('--ids', nargs='+', type=int, help='Location IDs.')
     g.add_argument('--json_file', type=str, help='JSON file with a list of IDs.')
 
-    p.set_defaults(func=mp.location_bulkdel_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'location_bulkdel_mapper'))
 
 
 def location_parent_subs_sp(locs_subprs):
@@ -191,4 +192,18 @@ def location_parent_subs_sp(locs_subprs):
     g.add_argument('--ids', nargs='+', type=int, help='List of parent IDs.')
     g.add_argument('--json_file', type=str, help='JSON file with a list of IDs.')
 
-    p.set_defaults(func=mp.location_parent_subs_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'location_parent_subs_mapper'), entity='locations')
+
+
+def location_upsert_sp(locs_subprs):
+    """
+    Creates the subparser for location upserts.
+
+    Args:
+        locs_subprs: The location subparser.
+    """
+    p: ap.ArgumentParser = locs_subprs.add_parser('upsert', description="Creates or updates locations, sending only "
+                                                                        "the ones that differ from the server state.")
+    prs._upsert_arguments(p)
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'location_upsert_mapper'))
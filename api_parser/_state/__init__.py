@@ -0,0 +1,19 @@
+"""
+This subpackage contains the construction function and the end action functions of the state subparser, which
+reconciles the tenant with a desired-state file: `plan` shows the changes and `apply` makes them.
+"""
+import api_parser._state.subparsers as sp
+
+
+def create_state_subparser(subparsers):
+    """
+    Creates the state subparser.
+
+    Args:
+        subparsers: Subparser object from argparse obtained from calling ArgumentParser.add_subparsers().
+    """
+    state_prs = subparsers.add_parser('state', description="Subparser for desired-state reconciliation.")
+    state_subprs = state_prs.add_subparsers(required=True, dest='Any of the subcommands')
+
+    sp.state_plan_sp(state_subprs)
+    sp.state_apply_sp(state_subprs)
@@ -0,0 +1,59 @@
+"""
+End functions of the state subparser.
+"""
+import json
+import sys
+
+import zia_client.reconcile as rec
+from zia_client import ZIAConnector
+from zia_client._readers import open_input
+
+
+def _load(path):
+    with open_input(path) as f:
+        return json.load(f)
+
+
+def _print_summary(label, changes):
+    for kind, counts in rec.summary(changes).items():
+        if any(counts.values()):
+            print(f'{label} {kind}: ' + ', '.join(f'{n} {action}' for action, n in counts.items()), file=sys.stderr)
+
+
+def state_plan_mapper(clt: ZIAConnector, args):
+    """Maps the arguments to the plan of a desired state.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        dict: The plan. Its counts are printed to stderr.
+    """
+    changes = rec.plan(clt, _load(args.file), prune=args.prune, workers=max(args.workers, 4))
+    _print_summary('plan', changes)
+
+    return changes
+
+
+def state_apply_mapper(clt: ZIAConnector, args):
+    """Maps the arguments to the application of a desired state or of a saved plan.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        dict: Number of records created, updated and deleted of every kind.
+    """
+    if args.plan:
+        changes = _load(args.file)
+        if not args.prune:
+            for kind in changes.values():
+                kind['delete'] = []
+    else:
+        changes = rec.plan(clt, _load(args.file), prune=args.prune, workers=max(args.workers, 4))
+
+    _print_summary('apply', changes)
+
+    return rec.apply(clt, changes, workers=args.workers, progress=not args.no_progress)
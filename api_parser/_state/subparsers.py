@@ -0,0 +1,47 @@
+"""
+Functions to build the state subparser.
+"""
+import argparse as ap
+
+import api_parser as prs
+
+_MAPPERS = 'api_parser._state.mappers'
+
+
+def _desired_arguments(p):
+    p.add_argument('file', type=str,
+                   help='Desired-state JSON file, with "users" and/or "locations" lists. See zia_client.reconcile. '
+                        '.gz and .zst files are decompressed.')
+    p.add_argument('--prune', action='store_true',
+                   help='Also deletes the server records missing from the desired state, for the kinds it declares. '
+                        'Without it, records are only created and updated.')
+
+
+def state_plan_sp(state_subprs):
+    """Subparser for the plan of a desired state.
+
+    Args:
+        state_subprs: State subparser.
+    """
+    p: ap.ArgumentParser = state_subprs.add_parser('plan', description='Computes the creates, updates and deletes '
+                                                                       'that bring the tenant to the desired state, '
+                                                                       'without changing anything.')
+    _desired_arguments(p)
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'state_plan_mapper'))
+
+
+def state_apply_sp(state_subprs):
+    """Subparser for the application of a desired state.
+
+    Args:
+        state_subprs: State subparser.
+    """
+    p: ap.ArgumentParser = state_subprs.add_parser('apply', description='Brings the tenant to the desired state. '
+                                                                        'Honors --workers and --max_rps.')
+    _desired_arguments(p)
+    p.add_argument('--plan', action='store_true',
+                   help='The file is a plan written by "state plan" instead of a desired state. It is applied as it '
+                        'is, so review it first. Its deletes are only applied with --prune.')
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'state_apply_mapper'))
@@ -26,3 +26,4 @@ def create_traffic_subparser(subparsers):
     sps.del_vpn_cred_sp(sp)
     sps.ip_gre_tunnel_info_sp(sp)
     sps.get_vips_sp(sp)
+    sps.upsert_vpn_creds_sp(sp)
@@ -3,8 +3,10 @@ End functions. Translates the arguments introduced per CL to the functions of th
 """
 import json
 
+import api_parser as prs
 import zia_client.traffic as tfc
 from zia_client import ZIAConnector
+from zia_client._readers import iter_records
 
 
 def get_vpn_creds_mapper(c: ZIAConnector, args):
@@ -17,8 +19,8 @@ def get_vpn_creds_mapper(c: ZIAConnector, args):
     Returns:
         The return of the get_vpn_creds function.
     """
-    return tfc.get_vpn_creds(session=c, full=args.all, pageSize=args.page_size, page=args.page, managedBy=args.mngr,
-                             locationId=args.loc_id, search=args.search, type=args.type)
+    return tfc.get_vpn_creds(session=c, full=args.all, pageSize=args.p_size, page=args.page, managedBy=args.mngr,
+                             locationId=args.loc_id, search=args.search, type=args.type, lazy=prs._streams(args))
 
 
 def add_vpn_creds_mapper(c: ZIAConnector, args):
@@ -31,14 +33,9 @@ def add_vpn_creds_mapper(c: ZIAConnector, args):
     Returns:
         The return of the add_vpn_creds function.
     """
-    with open(args.json_file) as f:
-        creds = json.load(f)
+    creds = iter_records(args.json_file, entity='vpn_credentials')
 
-    result = []
-    for cred in creds:
-        result.append(tfc.add_vpn_creds(c, cred))
-
-    return result
+    return prs._each(tfc.add_vpn_creds, c, creds, args, 'vpn add')
 
 
 def bulk_del_vpn_creds_mapper(c: ZIAConnector, args):
@@ -52,12 +49,16 @@ def bulk_del_vpn_creds_mapper(c: ZIAConnector, args):
         The return of the called function.
     """
     if args.ids:
-        return tfc.bulk_del_vpn_creds(c, args.ids)
+        ids = args.ids
     else:
         with open(args.json_file) as f:
             ids = json.load(f)
 
-        return tfc.bulk_del_vpn_creds(c, ids)
+    # As many credentials per request as the API deletes at once
+    size = c.endpoints.get('traffic', 'bulk').bulk_limit or 100
+    chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    return prs._each(tfc.bulk_del_vpn_creds, c, chunks, args, 'vpn bulkdel')
 
 
 def get_vpn_cred_info_mapper(c: ZIAConnector, args):
@@ -70,7 +71,13 @@ def get_vpn_cred_info_mapper(c: ZIAConnector, args):
     Returns:
         The return of the _traffic function.
     """
-    return tfc.ip_gre_tunnel_info(c, args.id)
+    if args.ids:
+        ids = args.ids
+    else:
+        with open(args.json_file) as f:
+            ids = json.load(f)
+
+    return prs._each(tfc.get_vpn_cred_info, c, ids, args, 'vpn info')
 
 
 def upd_vpn_cred_mapper(c: ZIAConnector, args):
@@ -84,10 +91,9 @@ def upd_vpn_cred_mapper(c: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    with open(args.json_file) as f:
-        creds = json.load(f)
+    creds = iter_records(args.json_file, entity='vpn_credentials')
 
-    result = [tfc.upd_vpn_cred(c, cred) for cred in creds]
+    result = prs._each(tfc.upd_vpn_cred, c, creds, args, 'vpn upd')
 
     return result
 
@@ -123,7 +129,7 @@ def ip_gretunnel_info_mapper(c: ZIAConnector, args):
         with open(args.json_file) as f:
             ips = json.load(f)
 
-    results = [tfc.ip_gre_tunnel_info(c, ip) for ip in ips]
+    results = prs._each(tfc.ip_gre_tunnel_info, c, ips, args, 'gre info')
 
     return results
 
@@ -139,4 +145,18 @@ def get_vips_mapper(c: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    return tfc.get_virtual_ips(c, args.dc, args.region, args.page, args.pageSize, args.include, args.all)
+    return tfc.get_virtual_ips(c, args.dc, args.region, args.page, args.pageSize, args.incl, args.all,
+                               lazy=prs._streams(args))
+
+
+def upsert_vpn_creds_mapper(c: ZIAConnector, args):
+    """Maps the arguments to the upsert of VPN credentials.
+
+    Args:
+        c (:obj:ZIAConnector): Logged in API client.
+        args (argparse.Namespace):  Namespace object returned by the ArgumentParser when arguments were parsed.
+
+    Returns:
+        Counts of unchanged, updated and created credentials and the status of every one.
+    """
+    return prs._upsert(c, args, 'vpn_credentials', 'vpn upsert')
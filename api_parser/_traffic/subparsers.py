@@ -4,7 +4,8 @@ Functions to build the _traffic forwarding management subparser and its subparse
 import argparse as ap
 
 import api_parser as prs
-import api_parser._traffic.mappers as mp
+
+_MAPPERS = 'api_parser._traffic.mappers'
 
 
 def get_vpn_creds_sp(sp):
@@ -42,7 +43,7 @@ def get_vpn_creds_sp(sp):
                    help='If specified, all available results will be retrieved.',
                    action='store_true')
 
-    p.set_defaults(func=mp.get_vpn_creds_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'get_vpn_creds_mapper'), entity='vpn_credentials')
 
 
 def add_vpn_creds_sp(sp):
@@ -53,10 +54,9 @@ def add_vpn_creds_sp(sp):
     """
     p = sp.add_parser('add', description='Subparser for adding VPN credentials.')
 
-    p.add_argument('json_file', help='JSON file. It should be a list of dictionaries, each dictionary representing a'
-                                     'credential.')
+    p.add_argument('json_file', help='File with the credential dicts. ' + prs.INPUT_HELP)
 
-    p.set_defaults(func=mp.add_vpn_creds_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'add_vpn_creds_mapper'))
 
 
 def bulk_del_vpn_creds_sp(sp):
@@ -71,7 +71,7 @@ def bulk_del_vpn_creds_sp(sp):
     group.add_argument('--ids', nargs='+', help='VPN credential identifiers.', type=int)
     group.add_argument('--json_file', type=str, help='JSON file with a list of identifiers.')
 
-    p.set_defaults(func=mp.bulk_del_vpn_creds_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'bulk_del_vpn_creds_mapper'))
 
 
 def get_vpn_cred_info_sp(sp):
@@ -87,7 +87,7 @@ def get_vpn_cred_info_sp(sp):
     group.add_argument('--ids', nargs='+', help='VPN credential identifiers.', type=int)
     group.add_argument('--json_file', type=str, help='JSON file with a list of credential ids.')
 
-    p.set_defaults(func=mp.get_vpn_cred_info_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'get_vpn_cred_info_mapper'), entity='vpn_credentials')
 
 
 def upd_vpn_cred_sp(sp):
@@ -98,9 +98,9 @@ def upd_vpn_cred_sp(sp):
     """
     p: ap.ArgumentParser = sp.add_parser('update', description='Updates specified credentials.')
 
-    p.add_argument('json_file', type=str, help='JSON file with a list of credential dicts.')
+    p.add_argument('json_file', type=str, help='File with the credential dicts. ' + prs.INPUT_HELP)
 
-    p.set_defaults(func=mp.upd_vpn_cred_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'upd_vpn_cred_mapper'))
 
 
 def del_vpn_cred_sp(sp):
@@ -113,7 +113,7 @@ def del_vpn_cred_sp(sp):
 
     p.add_argument('id', help='VPN credential identifier.', type=int)
 
-    p.set_defaults(func=mp.del_vpn_cred_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'del_vpn_cred_mapper'))
 
 
 def ip_gre_tunnel_info_sp(sp):
@@ -129,7 +129,7 @@ def ip_gre_tunnel_info_sp(sp):
     group.add_argument('--ips', nargs='+', help='IP addresses.', type=str)
     group.add_argument('--json_file', type=str, help='JSON file with a list IP addresses as strings.')
 
-    p.set_defaults(func=mp.ip_gretunnel_info_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'ip_gretunnel_info_mapper'))
 
 
 def get_vips_sp(sp):
@@ -151,4 +151,17 @@ def get_vips_sp(sp):
     p.add_argument('--all', help='Enables full retrieval and gets all available pages for the specified page size.',
                    action='store_true')
 
-    p.set_defaults(func=mp.upd_vpn_cred_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'get_vips_mapper'))
+
+
+def upsert_vpn_creds_sp(sp):
+    """Subparser for VPN credential upserts.
+
+    Args:
+        sp: VPN subparsers.
+    """
+    p: ap.ArgumentParser = sp.add_parser('upsert', description='Creates or updates VPN credentials, sending only the '
+                                                               'ones that differ from the server state.')
+    prs._upsert_arguments(p)
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'upsert_vpn_creds_mapper'))
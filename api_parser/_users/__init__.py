@@ -27,3 +27,4 @@ def create_user_subparser(subparsers):
     sp.user_group_sp(usr_subprs)
     sp.user_bulkdel_sp(usr_subprs)
     sp.user_info_sp(usr_subprs)
+    sp.user_upsert_sp(usr_subprs)
@@ -1,11 +1,11 @@
 """
 Endfunctions for the user parser.
 """
-import pandas as pd
-
+import api_parser as prs
 import zia_client.custom as cstm
 import zia_client.users as usrs
 from zia_client import ZIAConnector
+from zia_client._readers import iter_column, iter_records
 
 
 def search_groups_mapper(clt: ZIAConnector, args):
@@ -20,7 +20,7 @@ def search_groups_mapper(clt: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    return usrs.get_groups(clt, args.search, args.page, args.pageSize, args.all)
+    return usrs.get_groups(clt, args.search, args.page, args.pageSize, args.all, lazy=prs._streams(args))
 
 
 def search_depts_mapper(clt: ZIAConnector, args):
@@ -35,7 +35,8 @@ def search_depts_mapper(clt: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    return usrs.get_departments(clt, args.search, args.page, args.pageSize, args.all)
+    return usrs.get_departments(clt, args.search, args.page, args.pageSize, args.all,
+                                lazy=prs._streams(args))
 
 
 def search_usrs_mapper(clt: ZIAConnector, args):
@@ -50,7 +51,8 @@ def search_usrs_mapper(clt: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    return usrs.get_users(clt, args.name, args.dept, args.group, args.page, args.pageSize, args.all)
+    return usrs.get_users(clt, args.name, args.dept, args.group, args.page, args.pageSize, args.all,
+                          lazy=prs._streams(args))
 
 
 def update_usrs_mapper(clt: ZIAConnector, args):
@@ -65,7 +67,7 @@ def update_usrs_mapper(clt: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    return cstm.update_users(clt, args.file)
+    return prs._each(usrs.update_user, clt, iter_records(args.file, entity='users'), args, 'users update')
 
 
 def add_u2g_mapper(clt: ZIAConnector, args):
@@ -80,11 +82,12 @@ def add_u2g_mapper(clt: ZIAConnector, args):
         The requests' response. Generally a JSON object.
 
     """
-    # Take first column for both files and convert them to list
-    users = pd.read_csv(args.users).iloc[:, 0].to_list()
-    groups = pd.read_csv(args.groups).iloc[:, 0].to_list()
+    # Take first column for both files
+    users = iter_column(args.mails)
+    groups = [int(group) for group in iter_column(args.groups)]
 
-    return cstm.add_users_to_group(clt, users, groups, args.dft_dept)
+    return cstm.add_users_to_group(clt, users, groups, args.dft_dept, workers=args.workers,
+                                   progress=not args.no_progress)
 
 
 def create_usr_mapper(clt: ZIAConnector, args):
@@ -97,9 +100,7 @@ def create_usr_mapper(clt: ZIAConnector, args):
     Returns:
         The requests' response. Generally a JSON object.
     """
-    result = [usrs.create_user(clt, user) for user in args.file]
-
-    return result
+    return prs._each(usrs.create_user, clt, iter_records(args.file, entity='users'), args, 'users create')
 
 
 def delete_user_mapper(clt: ZIAConnector, args):
@@ -131,7 +132,7 @@ def dept_info_mapper(clt: ZIAConnector, args):
     else:
         ids = args.json_file
 
-    result = [usrs.get_department(clt, id_) for id_ in ids]
+    result = prs._each(usrs.get_department, clt, ids, args, 'users deptinfo')
 
     return result
 
@@ -152,7 +153,7 @@ def group_info_mapper(clt: ZIAConnector, args):
     else:
         ids = args.json_file
 
-    result = [usrs.get_group_info(clt, id_) for id_ in ids]
+    result = prs._each(usrs.get_group_info, clt, ids, args, 'users groupinfo')
 
     return result
 
@@ -173,7 +174,11 @@ def bulk_del_user_mapper(clt: ZIAConnector, args):
     else:
         ids = args.json_file
 
-    result = [usrs.bulk_del_user(clt, id_) for id_ in ids]
+    # As many users per request as the API deletes at once
+    size = clt.endpoints.get('usr', 'bulk').bulk_limit or 500
+    chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    result = prs._each(usrs.bulk_del_user, clt, chunks, args, 'users bulkdel')
 
     return result
 
@@ -194,6 +199,20 @@ def info_user_mapper(clt: ZIAConnector, args):
     else:
         ids = args.json_file
 
-    result = [usrs.get_user_info(clt, id_) for id_ in ids]
+    result = prs._each(usrs.get_user_info, clt, ids, args, 'users info')
 
     return result
+
+
+def upsert_usrs_mapper(clt: ZIAConnector, args):
+    """Maps the arguments to the upsert of users.
+
+    Args:
+        clt: API zia_client that must me logged in beforehand.
+        args: Parsed api_parser. Namespace object.
+
+    Returns:
+        Counts of unchanged, updated and created users and the status of every one.
+
+    """
+    return prs._upsert(clt, args, 'users', 'users upsert')
@@ -4,7 +4,8 @@ Functions to build the user subparser and its subparsers.
 import argparse as ap
 
 import api_parser as prs
-import api_parser._users.mappers as mp
+
+_MAPPERS = 'api_parser._users.mappers'
 
 
 def user_depts_p(usr_subprs):
@@ -28,7 +29,7 @@ def user_depts_p(usr_subprs):
     sp.add_argument(
         '--all', action='store_true', help='Retrieves all results. This option overrides page and pageSize.')
 
-    sp.set_defaults(func=mp.search_depts_mapper)
+    sp.set_defaults(func=prs._lazy(_MAPPERS, 'search_depts_mapper'))
 
 
 def user_u2g_sp(usr_subprs):
@@ -48,7 +49,7 @@ def user_u2g_sp(usr_subprs):
     sp.add_argument('--dft_dept', type=int, required=True, help='Default department ID in case user has none. '
                                                                 'This is required as users must belong to a department.')
 
-    sp.set_defaults(func=mp.add_u2g_mapper)
+    sp.set_defaults(func=prs._lazy(_MAPPERS, 'add_u2g_mapper'))
 
 
 def user_groups_sp(usr_subprs):
@@ -69,7 +70,7 @@ def user_groups_sp(usr_subprs):
     usr_groups_p.add_argument(
         '--all', action='store_true', help='Retrieves all results. This option overrides page and pageSize.')
 
-    usr_groups_p.set_defaults(func=mp.search_groups_mapper)
+    usr_groups_p.set_defaults(func=prs._lazy(_MAPPERS, 'search_groups_mapper'))
 
 
 def user_search_sp(usr_subprs):
@@ -94,7 +95,7 @@ def user_search_sp(usr_subprs):
     usr_search_p.add_argument(
         '--all', action='store_true', help='Retrieves all results. This option overrides page and pageSize.')
 
-    usr_search_p.set_defaults(func=mp.search_usrs_mapper)
+    usr_search_p.set_defaults(func=prs._lazy(_MAPPERS, 'search_usrs_mapper'), entity='users')
 
 
 def user_update_sp(usr_subprs):
@@ -105,9 +106,9 @@ def user_update_sp(usr_subprs):
         usr_subprs: The user subparser to create this subparser.
     """
     usr_update_p = usr_subprs.add_parser('update', description='Updates the user info.')
-    usr_update_p.add_argument('file', help="JSON file with a list of user dicts.", type=str)
+    usr_update_p.add_argument('file', type=str, help="File with the user dicts. " + prs.INPUT_HELP)
 
-    usr_update_p.set_defaults(func=mp.update_usrs_mapper)
+    usr_update_p.set_defaults(func=prs._lazy(_MAPPERS, 'update_usrs_mapper'))
 
 
 def user_create_sp(usr_subprs):
@@ -118,9 +119,9 @@ def user_create_sp(usr_subprs):
         usr_subprs: The user subparser to create this subparser.
     """
     usr_create_p = usr_subprs.add_parser('create', description="Adds a new user.")
-    usr_create_p.add_argument('file', type=prs._json_obj_file, help="JSON file with list of user dicts.")
+    usr_create_p.add_argument('file', type=str, help="File with the user dicts. " + prs.INPUT_HELP)
 
-    usr_create_p.set_defaults(func=mp.create_usr_mapper)
+    usr_create_p.set_defaults(func=prs._lazy(_MAPPERS, 'create_usr_mapper'))
 
 
 def user_delete_sp(usr_subprs):
@@ -136,7 +137,7 @@ def user_delete_sp(usr_subprs):
 
     usr_delete_p.add_argument('user_id', help="The unique identifier for the user.")
 
-    usr_delete_p.set_defaults(func=mp.delete_user_mapper)
+    usr_delete_p.set_defaults(func=prs._lazy(_MAPPERS, 'delete_user_mapper'))
 
 
 def user_dept_sp(usr_subprs):
@@ -153,7 +154,7 @@ def user_dept_sp(usr_subprs):
     g.add_argument('--ids', type=int, help='List of ids.', nargs='+')
     g.add_argument('--json_file', type=prs._json_obj_file, help='JSON file with ids.')
 
-    p.set_defaults(func=mp.dept_info_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'dept_info_mapper'))
 
 
 def user_group_sp(usr_subprs):
@@ -170,7 +171,7 @@ def user_group_sp(usr_subprs):
     g.add_argument('--ids', type=int, help='List of ids.', nargs='+')
     g.add_argument('--json_file', type=prs._json_obj_file, help='JSON file with ids.')
 
-    p.set_defaults(func=mp.group_info_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'group_info_mapper'))
 
 
 def user_bulkdel_sp(usr_subprs):
@@ -188,7 +189,7 @@ def user_bulkdel_sp(usr_subprs):
     g.add_argument('--ids', type=int, help='List of ids.', nargs='+')
     g.add_argument('--json_file', type=prs._json_obj_file, help='JSON file with ids.')
 
-    p.set_defaults(func=mp.bulk_del_user_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'bulk_del_user_mapper'))
 
 
 def user_info_sp(usr_subprs):
@@ -204,4 +205,17 @@ def user_info_sp(usr_subprs):
     g.add_argument('--ids', type=int, help='List of ids.', nargs='+')
     g.add_argument('--json_file', type=prs._json_obj_file, help='JSON file with ids.')
 
-    p.set_defaults(func=mp.info_user_mapper)
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'info_user_mapper'), entity='users')
+
+
+def user_upsert_sp(usr_subprs):
+    """Subparser for user upserts.
+
+    Args:
+        usr_subprs: User subparser.
+    """
+    p: ap.ArgumentParser = usr_subprs.add_parser('upsert', description="Creates or updates users, sending only the "
+                                                                       "ones that differ from the server state.")
+    prs._upsert_arguments(p)
+
+    p.set_defaults(func=prs._lazy(_MAPPERS, 'upsert_usrs_mapper'))
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of the client-side overhead of the `zia_client` package.
+
+Requests are answered in-process by a `FakeTransport` over a synthetic tenant, so the timings only include argument
+cleaning, URL building, request preparation and response decoding, without any network noise.
+
+Run from the repository root::
+
+    python benchmarks/bench_client_overhead.py --users 20000 --repeat 5
+"""
+import argparse as ap
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zia_client.locations as locs  # noqa: E402
+import zia_client.users as usrs  # noqa: E402
+from zia_client import ZIAConnector  # noqa: E402
+from zia_client.fake import FakeTenant, FakeTransport  # noqa: E402
+from zia_client.synthetic import generate_tenant  # noqa: E402
+
+CREDS = {'key': 'abcdefghijklmnopqrstuvwxyz', 'username': 'bench@example.com', 'password': 'bench'}
+
+
+def _time(func, repeat):
+    """Runs `func` `repeat` times.
+
+    Args:
+        func: Function without arguments.
+        repeat (int): Repetitions.
+
+    Returns:
+        list: Wall-clock seconds of every run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    """
+    Generates the tenant, runs the cases and prints a table with the results.
+    """
+    parser = ap.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--users', type=int, default=20000, help='Users in the synthetic tenant.')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions per case.')
+    parser.add_argument('--conf', default='config/config.json', help='Connector config file.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_tenant(tmp, users=args.users)
+        tenant = FakeTenant.from_dir(tmp)
+
+    client = ZIAConnector(args.conf, creds=CREDS, verbosity=False, transport=FakeTransport(tenant))
+    client.login()
+
+    some_ids = list(tenant.tables['users'])[:200]
+    some_locs = list(tenant.tables['locations'])[:3]  # get_location_info sleeps 1 s per call
+
+    cases = {
+        'get_users full': lambda: usrs.get_users(client, full=True),
+        f'get_user_info x{len(some_ids)}': lambda: [usrs.get_user_info(client, i) for i in some_ids],
+        f'get_location_info x{len(some_locs)}': lambda: [locs.get_location_info(client, i) for i in some_locs],
+        'search_locations full': lambda: locs.search_locations(client, full=True),
+    }
+
+    print(f'{"case":<40}{"median (s)":>12}{"min (s)":>12}')
+    for name, func in cases.items():
+        timings = _time(func, args.repeat)
+        print(f'{name:<40}{statistics.median(timings):>12.4f}{min(timings):>12.4f}')
+
+    client.logout()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Start-up latency benchmark of the `ziaclient.py` script.
+
+Every case runs in a fresh interpreter, as automation does, and measures the time until the arguments are parsed and
+the subcommand handler is resolved. It also reports which heavy modules got imported on the way, so regressions of the
+lazy loading are spotted.
+
+Run from the repository root::
+
+    python benchmarks/bench_import.py --repeat 10 --max_ms 400 --json bench_import.jsonl
+"""
+import argparse as ap
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ['pandas', 'dateutil', 'zia_client.custom', 'zia_client.users', 'zia_client.locations', 'zia_client.traffic']
+
+CASES = {
+    'parser only (-h)': [],
+    'locs info': ['locs', 'info', '1'],
+    'users search': ['users', 'search', '--all'],
+    'vpn search': ['vpn', 'search'],
+}
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import ziaclient
+args = sys.argv[1:]
+if args:
+    ziaclient.create_parser().parse_args(args).func.resolve()
+else:
+    ziaclient.create_parser()
+elapsed = time.perf_counter() - start
+print(json.dumps({"in_process_ms": elapsed * 1000, "heavy": [m for m in HEAVY if m in sys.modules]}))
+'''
+
+
+def run_case(argv):
+    """Runs one case in a new interpreter.
+
+    Args:
+        argv (list): Arguments of the script.
+
+    Returns:
+        tuple: Total wall-clock milliseconds of the process and the probe's result.
+    """
+    code = f'HEAVY = {HEAVY!r}\n' + PROBE
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code, *argv], cwd=ROOT, check=True, capture_output=True, text=True)
+    return (time.perf_counter() - start) * 1000, json.loads(out.stdout)
+
+
+def main():
+    """
+    Runs every case, prints the table and optionally appends the results to a JSON lines file.
+    """
+    parser = ap.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per case.')
+    parser.add_argument('--max_ms', type=float, default=None,
+                        help='Exits with status 1 if the median process time of any case is above this value.')
+    parser.add_argument('--json', default=None, help='JSON lines file where the results are appended.')
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"case":<20}{"process ms":>12}{"import+parse ms":>17}  heavy modules loaded')
+    for name, argv in CASES.items():
+        runs = [run_case(argv) for _ in range(args.repeat)]
+        process = statistics.median(r[0] for r in runs)
+        in_process = statistics.median(r[1]['in_process_ms'] for r in runs)
+        heavy = runs[-1][1]['heavy']
+        results[name] = {'process_ms': round(process, 2), 'import_parse_ms': round(in_process, 2), 'heavy': heavy}
+        print(f'{name:<20}{process:>12.1f}{in_process:>17.1f}  {", ".join(heavy) or "-"}')
+
+    if args.json:
+        with open(args.json, 'a') as f:
+            f.write(json.dumps({'time': time.time(), 'python': sys.version.split()[0], 'results': results}) + '\n')
+
+    if args.max_ms is not None and any(r['process_ms'] > args.max_ms for r in results.values()):
+        print(f'Start-up above {args.max_ms} ms.', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
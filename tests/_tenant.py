@@ -0,0 +1,44 @@
+"""
+Small fake tenant shared by the tests.
+"""
+import copy
+import os
+
+from zia_client import ZIAConnector
+from zia_client.fake import FakeTenant, FakeTransport
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+CREDS = {'key': 'abcdefghijklmnop', 'username': 'admin@example.com', 'password': 'secret'}
+
+DEPARTMENTS = [{'id': 10, 'name': 'Sales'}, {'id': 11, 'name': 'IT'}]
+GROUPS = [{'id': 20, 'name': 'VPN'}, {'id': 21, 'name': 'Admins'}]
+USERS = [
+    {'id': 1, 'name': 'Ann', 'email': 'ann@example.com', 'comments': 'On leave',
+     'department': {'id': 10, 'name': 'Sales'}, 'groups': [{'id': 20, 'name': 'VPN'}]},
+    {'id': 2, 'name': 'Bob', 'email': 'bob@example.com', 'department': {'id': 11, 'name': 'IT'},
+     'groups': [{'id': 21, 'name': 'Admins'}]},
+    {'id': 3, 'name': 'Eve', 'email': 'eve@example.com', 'department': {'id': 11, 'name': 'IT'}, 'groups': []},
+]
+VPN_CREDENTIALS = [{'id': 30, 'type': 'UFQDN', 'fqdn': 'loc@example.com', 'comments': 'Madrid'}]
+
+
+def connect():
+    """Builds a logged in connector over a new fake tenant.
+
+    Returns:
+        tuple: The connector and the requests it sends, as (method, path) tuples.
+    """
+    tenant = FakeTenant(users=copy.deepcopy(USERS), groups=GROUPS, departments=DEPARTMENTS,
+                        vpn_credentials=copy.deepcopy(VPN_CREDENTIALS))
+    transport = FakeTransport(tenant)
+    sent = []
+    send = transport.send
+
+    def recording_send(prep_req):
+        sent.append((prep_req.method, prep_req.path_url.split('?')[0]))
+        return send(prep_req)
+
+    transport.send = recording_send
+    clt = ZIAConnector(CONFIG, verbosity=False, creds=CREDS, transport=transport)
+    clt.login()
+    return clt, sent
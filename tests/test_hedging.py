@@ -0,0 +1,77 @@
+"""
+Tests of the budget of the hedged GETs of `zia_client._hedging`.
+"""
+import threading
+
+import requests
+
+from zia_client._concurrency import ConcurrencyController
+from zia_client._hedging import Hedger
+from zia_client._metrics import Metrics
+from zia_client._ratelimit import RateLimiter
+from zia_client.transport import build_response
+
+FAMILY = 'GET /users'
+
+
+class _SlowTransport:
+    """Answers the first request after the latency of the family, and the others at once."""
+
+    def __init__(self):
+        self.sent = 0
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def send(self, prep_req):
+        with self.lock:
+            self.sent += 1
+            first = self.sent == 1
+        if first:
+            self.release.wait(5)
+        return build_response(prep_req, 200, b'[]', 'application/json')
+
+
+def _request():
+    return requests.Request('GET', 'https://zsapi.example.net/api/v1/users').prepare()
+
+
+def _hedger(concurrency):
+    metrics = Metrics()
+    for _ in range(20):
+        metrics.observe(FAMILY, 0.01, 200)
+    hedger = Hedger(metrics, RateLimiter(), concurrency, ratio=1)
+    # Counts as enough hedged GETs for the ratio
+    hedger.sent = 10
+    return hedger, metrics
+
+
+def test_hedge_takes_a_free_concurrency_slot_and_gives_it_back():
+    concurrency = ConcurrencyController('https://zsapi.example.net/api/v1', initial=4)
+    limiter = concurrency.limiter(FAMILY)
+    hedger, metrics = _hedger(concurrency)
+    transport = _SlowTransport()
+
+    response = hedger.send(transport, _request(), FAMILY)
+    transport.release.set()
+
+    assert response.status_code == 200
+    assert metrics.snapshot()[FAMILY]['hedges'] == 1
+    hedger.executor.shutdown(wait=True)
+    assert limiter.in_flight == 0
+
+
+def test_hedge_is_skipped_without_a_free_concurrency_slot():
+    concurrency = ConcurrencyController('https://zsapi.example.net/api/v1', initial=1)
+    limiter = concurrency.limiter(FAMILY)
+    # Held by the primary request, as `ZIAConnector` does
+    assert limiter.try_acquire()
+    hedger, metrics = _hedger(concurrency)
+    transport = _SlowTransport()
+    threading.Timer(0.2, transport.release.set).start()
+
+    response = hedger.send(transport, _request(), FAMILY)
+
+    assert response.status_code == 200
+    assert transport.sent == 1
+    assert 'hedges' not in metrics.snapshot()[FAMILY]
+    assert limiter.in_flight == 1
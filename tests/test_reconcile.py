@@ -0,0 +1,53 @@
+"""
+Tests of the desired-state plans of `zia_client.reconcile`.
+"""
+from tests._tenant import connect
+from zia_client import reconcile as rec
+
+
+def _user(email, **fields):
+    return {'email': email, **fields}
+
+
+def test_plan_does_not_delete_by_default():
+    clt, _ = connect()
+
+    changes = rec.plan(clt, {'users': [_user('ann@example.com', name='Ann'), _user('new@example.com', name='New')]})
+
+    assert rec.summary(changes)['users'] == {'create': 1, 'update': 0, 'delete': 0}
+
+
+def test_plan_deletes_with_prune():
+    clt, _ = connect()
+
+    changes = rec.plan(clt, {'users': [_user('ann@example.com', name='Ann')]}, prune=True)
+
+    assert sorted(entry['id'] for entry in changes['users']['delete']) == [2, 3]
+
+
+def test_plan_clears_fields():
+    clt, _ = connect()
+
+    changes = rec.plan(clt, {'users': [_user('ann@example.com', comments='', groups=[]),
+                                       _user('bob@example.com', comments='')]})
+
+    updates = changes['users']['update']
+    assert [(entry['id'], sorted(entry['fields'])) for entry in updates] == [(1, ['comments', 'groups'])]
+    assert updates[0]['record']['comments'] == '' and updates[0]['record']['groups'] == []
+
+
+def test_plan_rotates_passwords():
+    clt, _ = connect()
+
+    changes = rec.plan(clt, {'users': [_user('bob@example.com', password='new')]})
+
+    assert [(entry['id'], entry['fields']) for entry in changes['users']['update']] == [(2, ['password'])]
+
+
+def test_apply_clears_fields():
+    clt, _ = connect()
+
+    changes = rec.plan(clt, {'users': [_user('ann@example.com', comments='')]})
+    rec.apply(clt, changes, progress=False)
+
+    assert rec.summary(rec.plan(clt, {'users': [_user('ann@example.com', comments='')]}))['users']['update'] == 0
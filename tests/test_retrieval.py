@@ -0,0 +1,60 @@
+"""
+Tests of the page sizes of the full retrievals of `ZIAConnector`.
+"""
+import pytest
+
+from tests._tenant import connect
+from zia_client._endpoints import UNKNOWN
+from zia_client._exceptions import PermanentResponseException
+from zia_client.transport import build_response
+
+
+def _reject_pages_above(clt, sent, size, message=b'Invalid pageSize'):
+    send = clt.transport.send
+
+    def limited_send(prep_req):
+        page_size = prep_req.url.partition('pageSize=')[2].split('&')[0]
+        if page_size and int(page_size) > size:
+            sent.append(('REJECTED', prep_req.path_url))
+            return build_response(prep_req, 400, b'{"code":"INVALID_INPUT_ARGUMENT","message":"' + message + b'"}',
+                                  'application/json')
+        if '/unknown' in prep_req.url:
+            return build_response(prep_req, 200, b'[]', 'application/json')
+        return send(prep_req)
+
+    clt.transport.send = limited_send
+
+
+def test_rejected_page_size_is_learned_by_the_connector_only():
+    clt, sent = connect()
+    _reject_pages_above(clt, sent, 250)
+
+    users = clt.full_retrieval('GET', clt.get_url('usr', 'main'))
+
+    assert len(users) == 3
+    assert clt.page_sizes == {'GET /users': 250}
+    assert clt.endpoints.get('usr', 'main').max_page_size == 1000
+
+    other, _ = connect()
+    assert other.page_sizes == {}
+
+
+def test_unknown_endpoints_are_not_changed():
+    clt, sent = connect()
+    _reject_pages_above(clt, sent, 250)
+
+    clt.full_retrieval('GET', clt.host + '/unknown')
+
+    assert UNKNOWN.max_page_size is None
+    assert clt.page_sizes == {'GET /unknown': 250}
+
+
+def test_other_errors_are_raised_at_once():
+    clt, sent = connect()
+    _reject_pages_above(clt, sent, 0, message=b'Invalid search')
+
+    with pytest.raises(PermanentResponseException):
+        clt.full_retrieval('GET', clt.get_url('usr', 'main'))
+
+    assert [path for method, path in sent if method == 'REJECTED'] == ['/api/v1/users?page=1&pageSize=1000']
+    assert clt.page_sizes == {}
@@ -0,0 +1,68 @@
+"""
+Tests of the comparison of desired records with the server state in `zia_client.upsert`.
+"""
+import pytest
+
+from tests._tenant import connect
+from zia_client.upsert import Upserter, changed_fields, field_hashes
+
+
+def _puts(sent):
+    return [path for method, path in sent if method == 'PUT']
+
+
+def test_equal_record_is_unchanged():
+    clt, sent = connect()
+    upserter = Upserter(clt, 'users')
+
+    result = upserter.upsert({'id': 1, 'comments': 'On leave', 'groups': [{'id': 20}], 'department': {'id': 10}})
+
+    assert result['status'] == 'unchanged'
+    assert not _puts(sent)
+
+
+def test_empty_value_equals_missing_server_field():
+    clt, sent = connect()
+    upserter = Upserter(clt, 'users')
+
+    assert upserter.upsert({'id': 2, 'comments': ''})['status'] == 'unchanged'
+    assert upserter.upsert({'id': 3, 'groups': []})['status'] == 'unchanged'
+    assert not _puts(sent)
+
+
+@pytest.mark.parametrize('record', [{'id': 1, 'comments': ''}, {'id': 1, 'groups': []}, {'id': 1, 'department': {}}])
+def test_cleared_field_is_updated(record):
+    clt, sent = connect()
+    upserter = Upserter(clt, 'users')
+
+    result = upserter.upsert(record)
+
+    assert result['status'] == 'updated'
+    assert _puts(sent) == ['/api/v1/users/1']
+
+
+def test_password_is_always_sent():
+    clt, sent = connect()
+    upserter = Upserter(clt, 'users')
+
+    assert upserter.upsert({'id': 1, 'password': 'new'})['status'] == 'updated'
+    assert upserter.upsert({'id': 1, 'password': 'new'})['status'] == 'updated'
+    assert _puts(sent) == ['/api/v1/users/1'] * 2
+
+
+def test_pre_shared_key_rotation_is_sent():
+    clt, sent = connect()
+    upserter = Upserter(clt, 'vpn_credentials')
+
+    result = upserter.upsert({'id': 30, 'fqdn': 'loc@example.com', 'preSharedKey': 'rotated'})
+
+    assert result['status'] == 'updated'
+    assert _puts(sent) == ['/api/v1/vpnCredentials/30']
+
+
+def test_changed_fields():
+    current = field_hashes({'name': 'Ann', 'comments': 'On leave'})
+
+    assert changed_fields(field_hashes({'name': 'Ann', 'comments': ''}, keep_empty=True), current) == ['comments']
+    assert changed_fields(field_hashes({'name': 'Ann', 'groups': []}, keep_empty=True), current) == []
+    assert changed_fields(field_hashes({'name': 'Anna'}, keep_empty=True), current) == ['name']
@@ -6,21 +6,63 @@ It is divided in various modules, being the main one the `session` module. In th
 In the `custom` module you can find custom methods for specific actions that, at least I have found useful, automatizes
 some processes for which the usage of the API is recommended.
 
-The `exceptions` module contains the user-defined Exceptions that may be used when errors occur.
-As of now, only one has been defined.
+The `exceptions` module contains the user-defined Exceptions that may be used when errors occur. Response errors are
+classified as transient, permanent or authentication errors.
 
 The `utils` module contains handy functions that can be called over and over in order to not repeat code.
 """
+import contextlib
+import contextvars
+import itertools
 import json
 import os
-import sys
+import threading
 import time
 from typing import Union
 
 import requests as re
 import zia_client._utils as u
 
-from zia_client._exceptions import ResponseException
+from zia_client._activation import ActivationScheduler
+from zia_client._cache import ResponseCache
+from zia_client._circuit import CircuitBreakers
+from zia_client._concurrency import ConcurrencyController
+from zia_client._deadline import Deadline, PartialResult, current_deadline
+from zia_client._endpoints import EndpointRegistry
+from zia_client._exceptions import DeadlineExceededException, PermanentResponseException, ResponseException, \
+    TransientResponseException, response_exception
+from zia_client._hedging import Hedger
+from zia_client._json import DEFAULT_CODEC, JSONCodec
+from zia_client._metrics import Metrics, endpoint_family
+from zia_client._profiling import NULL_TIMER
+from zia_client._ratelimit import RateLimiter
+from zia_client._retry import backoff, is_retryable, retry_after
+from zia_client._scheduler import current_priority
+from zia_client.transport import RequestsTransport, Transport
+
+# Page size full retrievals fall back to, at most, when the server rejects larger ones
+MIN_PAGE_SIZE = 100
+
+# Page size of full retrievals of the endpoints whose maximum is unknown, when none is given
+DEFAULT_PAGE_SIZE = 500
+
+
+def _rejects_page_size(error: PermanentResponseException):
+    """Tells if an error response blames the page size.
+
+    Args:
+        error (PermanentResponseException): Error of the request.
+
+    Returns:
+        bool: True if its body names the page size.
+    """
+    # The message is the status line, whose URL has the pageSize parameter, then the body
+    body = str(error).partition('\n')[2]
+    return 'pagesize' in body.lower().replace(' ', '').replace('_', '')
+
+
+# Named rate limit taken by `ZIAConnector.throttle` for the next request of the context, which its hedge also takes
+_THROTTLED = contextvars.ContextVar('zia_throttled', default=None)
 
 
 class ZIAConnector:
@@ -28,9 +70,18 @@ class ZIAConnector:
     Class that encapsulates the session management while connecting to the Zscaler ZIA API. For each of the `references
     that exist <https://help.zscaler.com/zia/api>`, I will try to create a specific method. Also, I'll try to create
     methods that will apply on the general use that I will make of it.
+
+    The connector is thread-safe: once logged in, one connector can be shared by a pool of worker threads. It can be
+    used as a context manager that logs in on entry and logs out on exit::
+
+        with ZIAConnector('config/config.json') as session:
+            users = get_users(session, full=True)
     """
 
-    def __init__(self, config_file: str, creds: Union[str, dict] = None, verbosity=None, apply_after: int = 0):
+    def __init__(self, config_file: str, creds: Union[str, dict] = None, verbosity=None, apply_after: int = 0,
+                 transport: Transport = None, cache_ttl: float = 0, max_rps: float = None,
+                 json_codec: JSONCodec = None, activate_interval: float = 0, adaptive: bool = False,
+                 shared_rate: str = None, breaker_threshold: int = None, hedge: bool = False):
         """Class constructor
 
         Args:
@@ -38,14 +89,40 @@ class ZIAConnector:
             config_file (String): The path for the config file. Must be a JSON.
             verbosity (None or bool): If None, input from JSON file is taken. If True or False, then it will be
                 overridden.
-            apply_after (int, optional): If given a number greater than 0, changes will be applied after the specified
-                count. Defaults to 0.
+            apply_after (int, optional): If given a number greater than 0, changes will be activated after every
+                `apply_after` successful changes. Reads do not count. Defaults to 0.
+            transport (Transport, optional): Transport the requests are sent through. Defaults to a new
+                `RequestsTransport`.
+            cache_ttl (float, optional): If greater than 0, JSON responses of GET requests are cached for the given
+                seconds. Successful changes invalidate the cached responses of the same collection. Defaults to 0.
+            max_rps (float, optional): Maximum requests per second sent, shared by all the threads using the
+                connector. Defaults to the `max_rps` of the config file, or no limit.
+            json_codec (JSONCodec, optional): Codec of request and response bodies. Defaults to orjson if installed,
+                the standard library otherwise. See `zia_client._json`.
+            activate_interval (float, optional): If greater than 0, changes are activated when a change is made this
+                number of seconds after the first one not activated. Defaults to 0. See `zia_client._activation`.
+            adaptive (bool, optional): Limits the requests in flight of every endpoint family with an AIMD controller
+                driven by 429 responses and latency, so that many worker threads settle at the throughput the tenant
+                allows. Defaults to False. See `zia_client._concurrency`.
+            shared_rate (str, optional): State file through which the rate limits are shared with the other processes
+                of the host that use the same file, so that concurrent runs split the budget. Unix only. Defaults to
+                the `shared_rate` of the config file, or limits of this process only. See `zia_client._ratelimit`.
+            breaker_threshold (int, optional): Transient errors in a row of an endpoint family after which its
+                requests fail fast, until a probe request succeeds. 0 disables it. Defaults to the
+                `breaker_threshold` of the config file, or 5. The probes are sent every `breaker_cooldown` seconds of
+                the config file, or 30. See `zia_client._circuit`.
+            hedge (bool, optional): Sends a GET again when it gets no response within the p95 latency of its endpoint
+                family, and takes the first response. Hedges only take spare rate-limit tokens and are at most a tenth
+                of the GETs. Defaults to False. See `zia_client._hedging`.
         """
 
         if apply_after < 0:
             raise ValueError('apply_after argument requires an integer greater or equal than 0.')
 
-        self.s = None
+        if activate_interval < 0:
+            raise ValueError('activate_interval argument requires a number greater or equal than 0.')
+
+        self.transport = transport if transport else RequestsTransport()
         with open(config_file) as f:
             config = json.load(f)
 
@@ -65,20 +142,72 @@ class ZIAConnector:
 
         self.host = config['host'] + config['api_uri']
 
+        # Page sizes, bulk limits, rate limits, idempotency and cacheability of the endpoints
+        self.endpoints = EndpointRegistry.from_file(os.path.join(config_dir, config.get('endpoints', 'endpoints.json')),
+                                                    self.host, self.urls)
+        # Page sizes learned from the server by endpoint family, when it accepts less than the registry says
+        self.page_sizes = {}
+
         self.retries = config['retries']
 
         self.debug = False if 'debug' not in config else config['debug']
 
-        self.verbosity = config['verbosity'] if not verbosity else verbosity
+        self.verbosity = config['verbosity'] if verbosity is None else verbosity
 
         self.sleep_time = config['sleep']
 
+        # Maximum backoff between retries of transient errors
+        self.max_sleep = config.get('max_sleep', 30)
+
+        # Seconds to connect and to wait for every read of a response, taken by the transport
+        self.timeout = (config.get('connect_timeout', 10), config.get('read_timeout', 60))
+
         self.apply_after = apply_after
 
-        self.__apply_count = 0
+        self.activation = ActivationScheduler(self, every=apply_after, interval=activate_interval)
+
+        self.cache = ResponseCache(cache_ttl) if cache_ttl > 0 else None
+
+        self.codec = json_codec or DEFAULT_CODEC
 
-        # Setting default
-        sys.excepthook = self.my_except_hook
+        self.rate_limiter = RateLimiter(config.get('max_rps') if max_rps is None else max_rps,
+                                        shared_rate or config.get('shared_rate'))
+
+        # Requests, errors, latencies and gauges per endpoint family
+        self.metrics = Metrics()
+
+        self.concurrency = ConcurrencyController(self.host, self.metrics) if adaptive else None
+
+        self.hedger = Hedger(self.metrics, self.rate_limiter, self.concurrency) if hedge else None
+
+        # Fail fast on the endpoint families that keep failing. A threshold of 0 disables it.
+        threshold = config.get('breaker_threshold', 5) if breaker_threshold is None else breaker_threshold
+        self.breakers = CircuitBreakers(self.metrics, threshold, config.get('breaker_cooldown', 30)) \
+            if threshold > 0 else None
+
+        # Phase timer. Replaced by a zia_client._profiling.PhaseTimer when profiling.
+        self.timer = NULL_TIMER
+
+        # Serializes login and logout
+        self.lock = threading.RLock()
+
+        # Number of logins, so that threads that see an expired session log in again only once
+        self.logins = 0
+
+        self.transport.bind(self)
+
+    def __enter__(self):
+        if not self.logins:
+            self.login()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.logout()
+        except (re.exceptions.RequestException, ResponseException):
+            # Do not hide the exception that ended the block
+            if exc_type is None:
+                raise
 
     def login(self):
         """Logs in. Please, make sure you've put the correct
@@ -104,13 +233,25 @@ class ZIAConnector:
 
         url = self.get_url('auth')
 
-        self.s = re.Session()
+        with self.lock:
+            self.transport.open(headers)
+
+            req = re.Request('POST', url, json=content)
 
-        self.s.headers = headers
+            result = self.send_recv(req, successful_msg='Login successful.')
+            self.logins += 1
 
-        req = re.Request('POST', url, json=content)
+        return result
 
-        return self.send_recv(req, successful_msg='Login successful.')
+    def relogin(self, logins: int):
+        """Logs in again after the session expired, unless another thread already did.
+
+        Args:
+            logins (int): Value of `logins` when the expired session was detected.
+        """
+        with self.lock:
+            if self.logins == logins:
+                self.login()
 
     def logout(self):
         """
@@ -122,7 +263,11 @@ class ZIAConnector:
 
         req = re.Request('DELETE', url)
 
-        return self.send_recv(req, successful_msg='Logout successful.')
+        with self.lock:
+            try:
+                return self.send_recv(req, successful_msg='Logout successful.')
+            finally:
+                self.transport.close()
 
     def is_session_active(self):
         """Checks if there is an authentication session.
@@ -162,67 +307,191 @@ class ZIAConnector:
 
         return self.send_recv(r, "Changes activated successfully.")
 
-    def send_recv(self, request: re.Request, successful_msg='Request was sucessful.'):
+    def send_recv(self, request: re.Request, successful_msg='Request was sucessful.', priority: str = None,
+                  deadline: Deadline = None):
         """
-        Send request and handle response. Retries if 429.
+        Send request and handle response. Retries if 429, and retries transient errors that cannot apply a change
+        twice with exponential backoff (see `zia_client._retry`). Requests to an endpoint that keeps failing are not
+        sent (see `zia_client._circuit`). The rate limits, idempotency and cacheability of the endpoint are taken from
+        the endpoint registry (see `zia_client._endpoints`).
 
         Args:
             request: Request to be sent.
             successful_msg: Message to display when verbosity set to true and success.
+            priority (str, optional): 'interactive', 'normal' or 'bulk'. Requests waiting for the rate limit or a
+                concurrency slot are served in priority order. Defaults to the one of the enclosing
+                `zia_client._scheduler.prioritized` block, or 'normal'.
+            deadline (Deadline, optional): Deadline after which the request is not sent, nor retried. Defaults to the
+                one of the enclosing `zia_client._deadline.within` block, if any.
 
         Returns:
-            Content or JSON. None if retries exceeded.
+            Content or JSON. None if retries exceeded because of 429 responses.
+
+        Raises:
+            TransientResponseException: On 5xx responses, timeouts and connection errors, once retried if possible.
+            PermanentResponseException: On 4xx responses.
+            AuthResponseException: On 401 and 403 responses.
+            CircuitOpenException: If the endpoint family keeps failing.
+            DeadlineExceededException: If the deadline has passed.
         """
+        priority = current_priority(priority)
+        deadline = current_deadline(deadline)
+
+        limit = _THROTTLED.get()
+        if limit is not None:
+            _THROTTLED.set(None)
+
+        endpoint = self.endpoints.lookup(request.url)
+        method = request.method.upper()
+        named = endpoint.rate_limit(method)
+        if named is not None:
+            limit = named[0]
+
+        # Encode the body with the codec instead of letting requests do it
+        if request.json is not None:
+            request.data = self.codec.dumps(request.json).encode()
+            request.headers['Content-Type'] = 'application/json'
+            request.json = None
+
+        error = None
         for i in range(self.retries):
-            prep_req = self.s.prepare_request(request)
+            # No wait after the last attempt, which is not retried
+            last = i == self.retries - 1
+            if deadline is not None:
+                deadline.check()
+
+            prep_req = self.transport.prepare(request)
             if self.debug:
                 u.pretty_print_request(prep_req)
-            response = self.s.send(prep_req)
+
+            if self.cache is not None and prep_req.method == 'GET' and endpoint.cacheable:
+                cached = self.cache.get(prep_req.url)
+                if cached is not None:
+                    return cached
+
+            family = endpoint_family(self.host, prep_req.method, prep_req.url)
+            if self.breakers is not None:
+                self.breakers.check(family)
+
+            if self.rate_limiter.bucket is not None:
+                with self.timer.phase('rate_limit_sleep'):
+                    self.rate_limiter.acquire(priority=priority)
+
+            if named is not None:
+                with self.timer.phase('rate_limit_sleep'):
+                    self.rate_limiter.acquire(*named, priority)
+
+            try:
+                with self._slot(prep_req, priority) as outcome:
+                    with self.timer.phase('http'):
+                        if self.hedger is not None and prep_req.method == 'GET':
+                            response = self.hedger.send(self.transport, prep_req, family, limit)
+                        else:
+                            response = self.transport.send(prep_req)
+                    outcome['status'] = response.status_code
+            except (re.exceptions.ConnectionError, re.exceptions.Timeout) as e:
+                error = TransientResponseException(f'{type(e).__name__}: {e}')
+                error.__cause__ = e
+                if last or not is_retryable(method, error=e, idempotent=endpoint.is_idempotent(method)):
+                    raise error
+                self._retry_wait(family, backoff(i, self.sleep_time, self.max_sleep), deadline)
+                continue
+
             if self.debug:
                 u.pretty_print_response(response)
             content_type = response.headers.get('content-type')
 
             if content_type == 'application/json':
-                content = response.json()
+                with self.timer.phase('json_decode'):
+                    content = self.codec.loads(response.content)
                 is_json = True
             else:
-                content = response.text()
+                content = response.text
                 is_json = False
 
             try:
                 response.raise_for_status()
             except re.exceptions.HTTPError as e:
                 if response.status_code == 429:
-                    time.sleep(self.sleep_time)
+                    error = None
+                    if not last:
+                        wait = retry_after(response)
+                        self._retry_wait(family, self.sleep_time if wait is None else wait, deadline)
                     continue
-                else:
-                    content = json.dumps(content, indent=4) if is_json else content
-                    raise ResponseException(str(e) + '\n' + content)
+
+                content = json.dumps(content, indent=4) if is_json else content
+                error = response_exception(response.status_code)(str(e) + '\n' + content, response.status_code)
+                if last or not is_retryable(method, response.status_code, idempotent=endpoint.is_idempotent(method)):
+                    raise error
+                wait = retry_after(response)
+                self._retry_wait(family, backoff(i, self.sleep_time, self.max_sleep) if wait is None else wait,
+                                 deadline)
             else:
                 if self.verbosity and successful_msg != '':
                     print(successful_msg)
 
-                if self.apply_after > 0:
-                    if self.__apply_count == self.apply_after:
-                        # Activates changes
-                        self.activation_apply()
-
-                        # Resets count
-                        self.__apply_count = 0
-
+                if self.cache is not None:
+                    if prep_req.method == 'GET':
+                        if is_json and endpoint.cacheable:
+                            self.cache.put(prep_req.url, content)
                     else:
-                        # Increases count
-                        self.__apply_count += 1
+                        self.cache.invalidate(self._collection_url(prep_req.url))
+
+                # May activate the changes, which sends another request
+                self.activation.record(prep_req.method, prep_req.url)
 
                 return content
 
+        if error is not None:
+            raise error
+
         if self.verbosity:
             print('Maximum retries exceeded. No response was recieved.')
 
         return None
 
+    def _retry_wait(self, family: str, seconds: float, deadline: Deadline = None):
+        """Waits before sending a request again.
+
+        Args:
+            family (str): Endpoint family of the request.
+            seconds (float): Seconds to wait.
+            deadline (Deadline, optional): Deadline of the request. The wait ends when it passes.
+        """
+        if deadline is not None:
+            seconds = min(seconds, deadline.remaining())
+        self.metrics.count(family, 'retries')
+        with self.timer.phase('rate_limit_sleep'):
+            time.sleep(seconds)
+
+    @contextlib.contextmanager
+    def _slot(self, prep_req, priority: str = None):
+        """Holds a concurrency slot, if adaptive, while a request is sent, and records its metrics and its outcome for
+        the circuit breakers.
+
+        Args:
+            prep_req (requests.PreparedRequest): Request about to be sent.
+            priority (str, optional): Priority of the request to get the slot.
+
+        Yields:
+            dict: Where the 'status' code of the response is stored.
+        """
+        family = endpoint_family(self.host, prep_req.method, prep_req.url)
+        slot = self.concurrency.slot(prep_req.method, prep_req.url, priority) if self.concurrency else \
+            contextlib.nullcontext({'status': None})
+
+        with slot as outcome:
+            start = time.monotonic()
+            try:
+                yield outcome
+            finally:
+                self.metrics.observe(family, time.monotonic() - start, outcome['status'])
+                if self.breakers is not None:
+                    self.breakers.record(family, outcome['status'])
+
     def full_retrieval(self, method: str, url: str, params: dict = False, json_content: dict = False,
-                       page_size: int = 500, message="", full=True):
+                       page_size: int = None, message="", full=True, lazy=False, priority: str = None,
+                       deadline: Deadline = None):
         """
         For requests where page and pageSize can be specified, this retrieves all available pages for the given
         pageSize.
@@ -232,14 +501,24 @@ class ZIAConnector:
             url (str): URL string.
             params (dict): GET parameters that will be passed through URL.
             json_content (dict): Content to be added at the end of the request. For POST and PUT requests.
-            page_size (int): Defaults to 500. Page size for max result entries.
+            page_size (int): Page size for max result entries. With `full`, the maximum page size of the endpoint is
+                used instead, falling back to smaller ones if the server rejects it. See `iter_retrieval`.
             message (str): Message to be displayed when success.
             full (bool): Defaults to True. Enables full retrieval. If set to False, simple request will be done.
+            lazy (bool): Defaults to False. With `full`, returns an iterator over the entries that requests every page
+                when the previous one has been consumed, instead of a list.
+            priority (str, optional): Priority of the requests. See `send_recv`.
+            deadline (Deadline, optional): With `full`, the pages not requested when it passes are dropped and the
+                entries retrieved so far are returned as a `PartialResult` whose status tells if they are complete.
+                If `lazy`, the iterator just stops: check the `status` of the deadline. See `zia_client._deadline`.
 
         Returns:
-            JSON object. Dict or list.
+            JSON object. Dict or list. Iterator of entries if `lazy`. `PartialResult` if `deadline` and not `lazy`.
 
         """
+        # Resolved now, as lazy pages are requested out of the caller's context
+        priority = current_priority(priority)
+
         # If json_content {}, then put it to None
         if not json_content:
             json_content = None
@@ -250,23 +529,67 @@ class ZIAConnector:
 
         # If not full retrieval requested, then do a simple request
         if not full:
-            return self.send_recv(re.Request(method, url, params=params, json=json_content), message)
-        # If not
-        else:
-            # If no params were given, then create empty dict
-            if not params:
-                params = {}
+            return self.send_recv(re.Request(method, url, params=params, json=json_content), message, priority,
+                                  deadline)
 
-            # If no 'page' in the params, then insert it to loop over
-            if 'page' not in params:
-                params['page'] = 1
+        pages = self.iter_retrieval(method, url, params, json_content, page_size, message, priority, deadline)
 
-            # If no 'pageSize' in the params, then insert it to loop over
-            if 'pageSize' not in params:
-                params['pageSize'] = page_size
+        if lazy:
+            return itertools.chain.from_iterable(pages)
 
         # List of all the results put together
         result = []
+        for page in pages:
+            result += page
+
+        if deadline is not None:
+            return PartialResult(result, deadline.status)
+
+        return result
+
+    def iter_retrieval(self, method: str, url: str, params: dict = None, json_content: dict = None,
+                       page_size: int = None, message="", priority: str = None, deadline: Deadline = None):
+        """
+        Generator over the pages of a paginated request. A page is requested only when the previous one has been
+        consumed, so callers can process every page before the next one arrives.
+
+        Args:
+            method (str): HTTP method.
+            url (str): URL string.
+            params (dict): GET parameters that will be passed through URL.
+            json_content (dict): Content to be added at the end of the request. For POST and PUT requests.
+            page_size (int): Page size, unless the params have one. Ignored in favour of the maximum page size of the
+                endpoint in the endpoint registry, which takes the fewest round trips, unless the retrieval starts at
+                a page other than the first, whose offset depends on the page size. Defaults to 500 if the maximum is
+                unknown. If the server rejects the size of the first page, with a 400 response that names the page
+                size or for a size above the maximum, the size is halved down to the one given, or 100, and the
+                connector keeps the size accepted for the endpoint family. The size used is published as the
+                'page_size' gauge of the metrics.
+            message (str): Message to be displayed when success.
+            priority (str, optional): Priority of the requests. See `send_recv`.
+            deadline (Deadline, optional): Stops, without error, when it passes.
+
+        Yields:
+            list: The entries of every page.
+        """
+        # Copy, so the caller's dict is not modified
+        params = dict(params) if params else {}
+
+        # If no 'page' in the params, then insert it to loop over
+        if 'page' not in params:
+            params['page'] = 1
+
+        endpoint = self.endpoints.lookup(url)
+        family = endpoint_family(self.host, method, url)
+        maximum = self.page_sizes.get(family, endpoint.max_page_size)
+        requested = params.get('pageSize', page_size)
+        params['pageSize'] = endpoint.page_size(requested, offset=params['page'] != 1) or DEFAULT_PAGE_SIZE
+        if maximum is not None:
+            params['pageSize'] = min(params['pageSize'], maximum)
+        # Smallest size tried if the server rejects the larger ones
+        floor = int(requested) if requested and int(requested) < (params['pageSize'] or 0) else MIN_PAGE_SIZE
+        first = True
+        fell_back = False
 
         # Previous result in the loop to compare and decide if to break the loop
         previous = None
@@ -274,20 +597,55 @@ class ZIAConnector:
         # Request loop
         while True:
             req = re.Request(method, url, params=params, json=json_content)
-            res = self.send_recv(req, message)
+            try:
+                res = self.send_recv(req, message, priority, deadline)
+            except DeadlineExceededException:
+                if deadline is None:
+                    raise
+                return
+            except PermanentResponseException as e:
+                # Only the first page can be requested again with another size, as it sets the offsets
+                size = params['pageSize']
+                if not first or e.status_code != 400 or size is None or size <= floor:
+                    raise
+                # Other errors of the request, as a wrong filter, are raised as they are
+                if size <= (maximum or size) and not _rejects_page_size(e):
+                    raise
+                params['pageSize'] = max(floor, size // 2)
+                fell_back = True
+                continue
+
+            if first:
+                first = False
+                if fell_back:
+                    # The server accepts less than the registry says. Kept by this connector only, as the endpoint
+                    # may be shared with others, or stand for every endpoint out of the registry.
+                    self.page_sizes[family] = params['pageSize']
+                self.metrics.gauge(family, 'page_size', params['pageSize'])
 
             # Breaks if res was empty or if not all active
             if not res or res == previous:
                 break
-            else:
-                # Concats results
-                result += res
-                # If not, counter should increase
-                params['page'] += 1
-                # Readjust previous
-                previous = res
 
-        return result
+            yield res
+
+            # If not, counter should increase
+            params['page'] += 1
+            # Readjust previous
+            previous = res
+
+    def throttle(self, key: str, rate: float, priority: str = None):
+        """Waits until the endpoint-specific limit allows another request. For endpoints stricter than the global
+        limit.
+
+        Args:
+            key (str): Name of the limit, as in 'locs_get'.
+            rate (float): Maximum requests per second of the endpoint.
+            priority (str, optional): Priority of the request. See `send_recv`.
+        """
+        with self.timer.phase('rate_limit_sleep'):
+            self.rate_limiter.acquire(key, rate, priority)
+        _THROTTLED.set(key)
 
     def get_url(self, key1, key2=None, **kwargs):
         """It just joins the API URI with the wanted
@@ -311,17 +669,14 @@ class ZIAConnector:
 
         return url
 
-    def my_except_hook(self, exctype, value, traceback):
-        """
-        Error hook to be executed when exception raised so session can be closed.
+    def _collection_url(self, url):
+        """Gets the URL of the collection a URL belongs to: the API URI plus the first segment of the path.
 
         Args:
-            exctype: Exception type.
-            value: Value of exception.
-            traceback: Traceback.
+            url (str): Full URL, as in 'https://admin.zscloud.net/api/v1/users/12?x=1'.
 
+        Returns:
+            str: Collection URL, as in 'https://admin.zscloud.net/api/v1/users'.
         """
-        if exctype == re.exceptions.RequestException or exctype == ResponseException:
-            self.logout()
-
-        sys.__excepthook__(exctype, value, traceback)
+        path = url[len(self.host):] if url.startswith(self.host) else url
+        return self.host + '/' + path.split('?')[0].strip('/').split('/')[0]
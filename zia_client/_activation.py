@@ -0,0 +1,183 @@
+"""
+Scheduling of the activation of changes.
+
+Only successful mutating requests count as changes: GETs, the login and logout, audit log reports and the activation
+itself do not. Activations requested while one is in flight, as by concurrent workers, are coalesced into it.
+"""
+import sys
+import threading
+import time
+
+from zia_client._exceptions import ResponseException
+
+# Methods that do not change the configuration
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# Endpoints whose requests are not configuration changes, as (key1, key2) of the urls file
+NON_MUTATING = (('auth', None), ('activation', 'main'), ('activation', 'act'), ('audit', 'main'), ('audit', 'dwl'))
+
+
+class ActivationScheduler:
+    """
+    Counts the changes made through a `ZIAConnector` and activates them after a number of changes, after some seconds
+    of changes, or on demand. Thread-safe.
+    """
+
+    def __init__(self, session, every: int = 0, interval: float = 0):
+        """
+        Args:
+            session (ZIAConnector): Connector whose changes are activated.
+            every (int, optional): Activates after this number of changes. 0 disables it. Defaults to 0.
+            interval (float, optional): Activates when a change is made this number of seconds after the first
+                pending one. Changes made after the last activation are activated by `finish`. 0 disables it.
+                Defaults to 0.
+        """
+        if every < 0 or interval < 0:
+            raise ValueError('Activation thresholds must be greater or equal than 0.')
+
+        self.session = session
+        self.every = every
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.done = threading.Condition(self.lock)
+        # Changes not activated yet, and when the first of them was made
+        self.pending = 0
+        self.since = None
+        self.in_flight = False
+        self.activations = 0
+        self.changes = 0
+        self.excluded = {session.get_url(*key).split('?')[0] for key in NON_MUTATING}
+
+    @property
+    def enabled(self):
+        """True if changes are activated automatically.
+        """
+        return self.every > 0 or self.interval > 0
+
+    def is_mutation(self, method: str, url: str):
+        """Tells if a request changes the configuration.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+
+        Returns:
+            bool: True for the requests that count as changes.
+        """
+        return method not in READ_METHODS and url.split('?')[0] not in self.excluded
+
+    def record(self, method: str, url: str):
+        """Counts a successful request, if it is a change, and activates the changes if a threshold is reached.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+        """
+        if not self.is_mutation(method, url):
+            return
+
+        with self.lock:
+            self.changes += 1
+            self.pending += 1
+            if self.since is None:
+                self.since = time.monotonic()
+
+        # An activation in flight counts as the one requested. The changes made meanwhile are activated after it by
+        # the thread that sent it, if they reach a threshold.
+        while True:
+            with self.lock:
+                if self.in_flight or not self._due():
+                    return
+                taken = self._take()
+            self._send(taken)
+
+    def _due(self):
+        if not self.pending:
+            return False
+        return (self.every > 0 and self.pending >= self.every) or \
+            (self.interval > 0 and time.monotonic() - self.since >= self.interval)
+
+    def _take(self):
+        # Called with the lock held
+        taken = self.pending, self.since
+        self.in_flight = True
+        self.pending = 0
+        self.since = None
+        return taken
+
+    def _send(self, taken):
+        try:
+            response = self.session.activation_apply()
+        except BaseException:
+            pending, since = taken
+            with self.lock:
+                # Not activated: they remain pending
+                self.pending += pending
+                self.since = since if self.since is None else min(since, self.since)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight = False
+                self.done.notify_all()
+
+        with self.lock:
+            self.activations += 1
+        return response
+
+    def activate(self):
+        """Activates the pending changes. If an activation is in flight, waits for it instead of sending another,
+        unless changes were made after it started.
+
+        Returns:
+            The response of the activation, or None if there was nothing to activate.
+        """
+        with self.lock:
+            self.done.wait_for(lambda: not self.in_flight)
+            if not self.pending:
+                return None
+            taken = self._take()
+
+        return self._send(taken)
+
+    def wait_active(self, timeout: float = 60, delay: float = 0.5, max_delay: float = 8):
+        """Polls the activation status, with exponential backoff, until no change is pending.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to 60.
+            delay (float, optional): First delay between polls. Defaults to 0.5.
+            max_delay (float, optional): Maximum delay between polls. Defaults to 8.
+
+        Returns:
+            str: The last status. 'ACTIVE' unless the timeout was reached.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.session.activation_status()
+            status = status.get('status') if isinstance(status, dict) else status
+            remaining = deadline - time.monotonic()
+            if status == 'ACTIVE' or remaining <= 0:
+                return status
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+    def finish(self, timeout: float = 60):
+        """Activates the pending changes and waits until they are active. Meant to be called before logging out.
+        Does nothing if no change was made or automatic activation is disabled, as logging out activates them anyway.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to 60.
+
+        Returns:
+            str: The last status, or None if nothing was done.
+        """
+        if not self.enabled or not self.changes:
+            return None
+
+        try:
+            self.activate()
+        except ResponseException as e:
+            # Logging out activates them anyway
+            print(f'Activation failed: {e}', file=sys.stderr)
+            return None
+
+        return self.wait_active(timeout)
@@ -0,0 +1,120 @@
+"""
+Response cache of the `ZIAConnector`.
+"""
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from zia_client._json import DEFAULT_CODEC
+
+
+def cache_key(url):
+    """Normalizes a URL so that the order of its query parameters does not matter.
+
+    Args:
+        url (str): Full URL.
+
+    Returns:
+        str: The key.
+    """
+    split = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(split.query, keep_blank_values=True)))
+    return urlunsplit((split.scheme, split.netloc, split.path.rstrip('/'), query, ''))
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of JSON GET responses with a time to live.
+
+    Responses are stored as their raw JSON text and decoded on every hit, so callers can freely modify what they get
+    without corrupting the cache.
+
+    When `index` is enabled, every record of a cached list with an `id` is also stored under `<collection URL>/<id>`,
+    so that a full listing warms the lookups of single records (e.g. `/users` warms `/users/{userId}`).
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 10000, index: bool = False):
+        """
+        Args:
+            ttl (float, optional): Seconds an entry is valid. Defaults to 300.
+            max_entries (int, optional): Maximum number of entries. Least recently used ones are evicted first.
+                Defaults to 10000.
+            index (bool, optional): Index the records of cached lists by id. Defaults to False.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index = index
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        """Looks up a URL.
+
+        Args:
+            url (str): Full URL of the GET request.
+
+        Returns:
+            The decoded JSON response, or None on a miss.
+        """
+        key = cache_key(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            raw = entry[1]
+        return DEFAULT_CODEC.loads(raw)
+
+    def put(self, url, content):
+        """Stores a response.
+
+        Args:
+            url (str): Full URL of the GET request.
+            content: Decoded JSON response.
+        """
+        key = cache_key(url)
+        expires = time.monotonic() + self.ttl
+        items = [(key, DEFAULT_CODEC.dumps(content))]
+
+        if self.index and isinstance(content, list):
+            base = urlunsplit(urlsplit(key)[:3] + ('', ''))
+            items += [(f'{base}/{r["id"]}', DEFAULT_CODEC.dumps(r))
+                      for r in content if isinstance(r, dict) and 'id' in r]
+
+        with self.lock:
+            for k, raw in items:
+                self.entries[k] = (expires, raw)
+                self.entries.move_to_end(k)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, prefix):
+        """Drops every entry whose URL starts with the prefix.
+
+        Args:
+            prefix (str): URL prefix, as in 'https://admin.zscloud.net/api/v1/users'.
+        """
+        with self.lock:
+            for key in [k for k in self.entries if k.startswith(prefix)]:
+                del self.entries[key]
+
+    def clear(self):
+        """
+        Drops every entry.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Returns the usage statistics.
+
+        Returns:
+            dict: Entries, hits and misses.
+        """
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,155 @@
+"""
+Circuit breakers of the requests sent by the `ZIAConnector`, per endpoint family (see `zia_client._metrics`).
+
+After `threshold` transient errors in a row (5xx responses, timeouts or connection errors) the circuit of the family
+opens: its requests raise `CircuitOpenException` at once instead of being sent, so a large job fails fast instead of
+spending thousands of requests on an endpoint that is down. Other families are not affected. After `cooldown` seconds a
+single request is let through as a probe: if it succeeds the circuit closes, otherwise it opens again.
+
+Responses that the endpoint did produce, including 4xx, count as successes, and 429 responses are left to the rate
+limit.
+"""
+import threading
+import time
+
+from zia_client._exceptions import CircuitOpenException
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker of one endpoint family.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30):
+        """
+        Args:
+            threshold (int, optional): Transient errors in a row that open the circuit. Defaults to 5.
+            cooldown (float, optional): Seconds the circuit stays open before a probe is let through. Defaults to 30.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        # When the probe of a half-open circuit was let through
+        self.probe_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Tells if a request can be sent.
+
+        Returns:
+            bool: False if the circuit is open, or half-open with the probe in flight.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.probe_at = None
+
+            if self.state == HALF_OPEN:
+                # A probe that never reported back, as when its thread died, does not block the circuit for good
+                if self.probe_at is None or now - self.probe_at >= self.cooldown:
+                    self.probe_at = now
+                    return True
+
+            if self.state == CLOSED:
+                return True
+
+            return False
+
+    def record(self, status: int = None):
+        """Reports the outcome of a request.
+
+        Args:
+            status (int, optional): Status code of the response. None if no response was received.
+        """
+        if status == 429:
+            return
+
+        with self.lock:
+            if status is not None and status < 500:
+                self.state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    """
+    Circuit breakers per endpoint family, whose states are published as the 'circuit' gauge of the metrics.
+    """
+
+    def __init__(self, metrics=None, threshold: int = 5, cooldown: float = 30):
+        """
+        Args:
+            metrics (Metrics, optional): Metrics where the states are published.
+            threshold (int, optional): Transient errors in a row that open a circuit. Defaults to 5.
+            cooldown (float, optional): Seconds a circuit stays open before a probe is let through. Defaults to 30.
+        """
+        self.metrics = metrics
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, family: str):
+        """Gets the breaker of a family, creating it on first use.
+
+        Args:
+            family (str): Endpoint family.
+
+        Returns:
+            CircuitBreaker: The breaker.
+        """
+        with self.lock:
+            breaker = self.breakers.get(family)
+            if breaker is None:
+                breaker = self.breakers[family] = CircuitBreaker(self.threshold, self.cooldown)
+        return breaker
+
+    def check(self, family: str):
+        """Fails fast if the circuit of a family is open.
+
+        Args:
+            family (str): Endpoint family of the request about to be sent.
+
+        Raises:
+            CircuitOpenException: If the request must not be sent.
+        """
+        breaker = self.breaker(family)
+        if not breaker.allow():
+            if self.metrics is not None:
+                self.metrics.count(family, 'rejected')
+            raise CircuitOpenException(f'{family} failed {breaker.failures} times in a row. Not sent until it '
+                                       f'recovers, probed every {breaker.cooldown:g} seconds.')
+
+    def record(self, family: str, status: int = None):
+        """Reports the outcome of a request.
+
+        Args:
+            family (str): Endpoint family.
+            status (int, optional): Status code of the response. None if no response was received.
+        """
+        breaker = self.breaker(family)
+        breaker.record(status)
+        if self.metrics is not None:
+            self.metrics.gauge(family, 'circuit', breaker.state)
+
+    def states(self):
+        """Gets the families whose circuit is not closed.
+
+        Returns:
+            dict: State by family.
+        """
+        with self.lock:
+            return {family: breaker.state for family, breaker in sorted(self.breakers.items())
+                    if breaker.state != CLOSED}
@@ -0,0 +1,184 @@
+"""
+Adaptive concurrency control of the requests sent by the `ZIAConnector`.
+
+The number of requests in flight of every endpoint family (see `zia_client._metrics`) is limited with AIMD (additive
+increase, multiplicative decrease), as TCP does with its congestion window: the limit grows by one every round of
+healthy responses, and is cut by a factor on a 429 or when the latency rises well above its usual level. Bulk jobs run
+with many workers then settle at the highest concurrency the tenant allows for each endpoint.
+"""
+import contextlib
+import threading
+import time
+
+from zia_client._metrics import endpoint_family
+from zia_client._scheduler import PriorityGate
+
+
+class AIMDLimiter:
+    """
+    Thread-safe AIMD limit of requests in flight.
+    """
+
+    def __init__(self, initial: float = 4, minimum: float = 1, maximum: float = 64, decrease: float = 0.5,
+                 latency_factor: float = 2.0):
+        """
+        Args:
+            initial (float, optional): Initial limit. Defaults to 4.
+            minimum (float, optional): Lowest limit. Defaults to 1.
+            maximum (float, optional): Highest limit. Defaults to 64.
+            decrease (float, optional): Factor the limit is multiplied by on congestion. Defaults to 0.5.
+            latency_factor (float, optional): Latencies over this factor times the usual latency are congestion.
+                Defaults to 2.
+        """
+        self.limit = min(max(initial, minimum), maximum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        # Smoothed latency of the healthy responses
+        self.baseline = None
+        self.samples = 0
+        self.cut_at = 0
+        self.cond = threading.Condition()
+        # Requests waiting for a slot are served in priority order
+        self.gate = PriorityGate()
+
+    def acquire(self, priority: str = None):
+        """Waits until a request can be sent.
+
+        Args:
+            priority (str, optional): 'interactive', 'normal' or 'bulk'. See `zia_client._scheduler`.
+
+        Returns:
+            float: Seconds waited.
+        """
+        start = time.monotonic()
+        self.gate.run(self._acquire, priority)
+        return time.monotonic() - start
+
+    def _acquire(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    def try_acquire(self):
+        """Takes a slot only if it is spare: free at once and not awaited by queued requests. For optional requests, as
+        hedges, that must not delay the others.
+
+        Returns:
+            bool: True if the slot was taken. It is then given back with `release`, or `cancel` if not used.
+        """
+        if self.gate.waiting():
+            return False
+        with self.cond:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def cancel(self):
+        """
+        Gives back a slot whose request was not sent. The limit is not adapted.
+        """
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def release(self, latency: float, congested: bool = False):
+        """Reports the end of a request and adapts the limit.
+
+        Args:
+            latency (float): Seconds the request took.
+            congested (bool, optional): True if the request was throttled or failed. Defaults to False.
+        """
+        with self.cond:
+            # Whether the limit was in use, as growing it otherwise would only let the next burst overload the API
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+
+            spike = self.samples >= 10 and latency > self.latency_factor * self.baseline
+            if congested or spike:
+                now = time.monotonic()
+                # Responses of the same round reflect the same congestion: cut once per round
+                if now - self.cut_at >= (self.baseline or 0):
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.cut_at = now
+            else:
+                self.baseline = latency if self.baseline is None else 0.9 * self.baseline + 0.1 * latency
+                self.samples += 1
+                if saturated:
+                    # One more request per round of `limit` responses
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self.cond.notify_all()
+
+
+class ConcurrencyController:
+    """
+    AIMD limits per endpoint family, published as the 'concurrency_limit' gauge of the metrics.
+    """
+
+    def __init__(self, host: str, metrics=None, **limiter_args):
+        """
+        Args:
+            host (str): API URL the paths of the families are relative to.
+            metrics (Metrics, optional): Metrics where the limits are published.
+            **limiter_args: Arguments of every `AIMDLimiter`.
+        """
+        self.host = host
+        self.metrics = metrics
+        self.limiter_args = limiter_args
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, family: str):
+        """Gets the limiter of a family, creating it on first use.
+
+        Args:
+            family (str): Endpoint family.
+
+        Returns:
+            AIMDLimiter: The limiter.
+        """
+        with self.lock:
+            limiter = self.limiters.get(family)
+            if limiter is None:
+                limiter = self.limiters[family] = AIMDLimiter(**self.limiter_args)
+        return limiter
+
+    @contextlib.contextmanager
+    def slot(self, method: str, url: str, priority: str = None):
+        """Holds one of the in-flight slots of the family of a request while it is sent.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            priority (str, optional): Priority of the request to get the slot.
+
+        Yields:
+            dict: Where the caller stores the 'status' code of the response. Requests without status, because they
+            raised, count as congestion.
+        """
+        family = endpoint_family(self.host, method, url)
+        limiter = self.limiter(family)
+        limiter.acquire(priority)
+
+        outcome = {'status': None}
+        start = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            status = outcome['status']
+            limiter.release(time.monotonic() - start, congested=status is None or status == 429 or status >= 500)
+            if self.metrics is not None:
+                self.metrics.gauge(family, 'concurrency_limit', round(limiter.limit, 2))
+
+    def limits(self):
+        """Gets the current limits.
+
+        Returns:
+            dict: Limit by family.
+        """
+        with self.lock:
+            return {family: round(limiter.limit, 2) for family, limiter in sorted(self.limiters.items())}
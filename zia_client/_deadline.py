@@ -0,0 +1,116 @@
+"""
+Job-level deadlines, as in "finish this sync within 30 minutes".
+
+A `Deadline` is given to `ZIAConnector.full_retrieval` or to the bulk executors of `zia_client._parallel`. When it
+passes, no more requests are sent: the pages or items not started are dropped, the calls in progress stop at their next
+request, and the results obtained so far are returned as a `PartialResult` whose `status` tells that they are partial.
+
+Inside a `within` block, every request fails with `DeadlineExceededException` once the deadline passes, so that code
+that cannot use partial results, as a reconciliation plan, stops instead of acting on them. Blocks are inherited by
+the workers of `zia_client._parallel`, as priorities are.
+"""
+import contextlib
+import contextvars
+import time
+
+from zia_client._exceptions import DeadlineExceededException
+
+COMPLETE = 'complete'
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+
+_DEADLINE = contextvars.ContextVar('zia_deadline', default=None)
+
+
+class Deadline:
+    """
+    Point in time after which no more requests of a job are sent. Thread-safe.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds (float): Seconds from now.
+        """
+        self.seconds = seconds
+        self.at = time.monotonic() + seconds
+        # Whether some work was dropped because of the deadline
+        self.exceeded = False
+
+    def remaining(self):
+        """Seconds left, 0 once passed.
+        """
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self):
+        """True once the deadline has passed.
+        """
+        return time.monotonic() >= self.at
+
+    def check(self):
+        """Fails if the deadline has passed.
+
+        Raises:
+            DeadlineExceededException: If it has passed.
+        """
+        if self.expired:
+            self.exceeded = True
+            raise DeadlineExceededException(f'The deadline of {self.seconds:g} seconds has passed.')
+
+    @property
+    def status(self):
+        """'deadline_exceeded' if some work was dropped because of the deadline, 'complete' otherwise.
+        """
+        return DEADLINE_EXCEEDED if self.exceeded else COMPLETE
+
+
+class PartialResult(list):
+    """
+    List of the results obtained before a deadline, with the status of the job.
+    """
+
+    def __init__(self, items=(), status: str = COMPLETE):
+        """
+        Args:
+            items (optional): Results.
+            status (str, optional): 'complete' or 'deadline_exceeded'. Defaults to 'complete'.
+        """
+        super().__init__(items)
+        self.status = status
+
+    @property
+    def complete(self):
+        """True if no work was dropped.
+        """
+        return self.status == COMPLETE
+
+
+@contextlib.contextmanager
+def within(deadline: Deadline):
+    """Applies a deadline to the requests made in the block. An earlier deadline of an enclosing block prevails.
+
+    Args:
+        deadline (Deadline): The deadline. None does nothing.
+    """
+    outer = _DEADLINE.get()
+    if deadline is None or (outer is not None and outer.at <= deadline.at):
+        yield
+        return
+
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def current_deadline(deadline: Deadline = None):
+    """Resolves the deadline of a request.
+
+    Args:
+        deadline (Deadline, optional): Deadline given explicitly.
+
+    Returns:
+        Deadline: `deadline`, or else the one of the enclosing `within` block, or else None.
+    """
+    return deadline or _DEADLINE.get()
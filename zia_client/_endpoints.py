@@ -0,0 +1,235 @@
+"""
+Registry of what every API endpoint allows: maximum page size, bulk batch limit, rate limits per method, idempotency
+and cacheability.
+
+The limits known of the API are `DEFAULTS`. They can be overridden, field by field, with an optional JSON file next to
+the URL map, named by the `endpoints` key of the config file (`endpoints.json` by default). Both mirror urls.json, with
+the capabilities of an endpoint where urls.json has its path::
+
+    {
+        "usr": {
+            "main": {"max_page_size": 500}
+        },
+        "locs": {
+            "info": {"rate_limits": {"GET": 0.5}}
+        }
+    }
+
+Fields:
+
+- max_page_size (int): Largest `pageSize` accepted. Full retrievals use it, whatever the page size given.
+- bulk_limit (int): Largest number of ids of a bulk request.
+- rate_limits (dict): Requests per second allowed by method, enforced on top of the global limit.
+- idempotent (list): Methods, besides GET, HEAD, OPTIONS, PUT and DELETE, that can be sent twice with the same effect,
+  as a POST that only reads. See `zia_client._retry`.
+- cacheable (bool): Whether GET responses may be cached. Defaults to true.
+
+The file only holds the overrides, so config directories without it keep the known limits. Endpoints and fields in
+neither take the defaults of `Endpoint`. The registry is loaded once, when the connector is built.
+"""
+import functools
+import json
+import os
+import re as regex
+
+from zia_client._retry import IDEMPOTENT_METHODS
+
+FIELDS = frozenset({'max_page_size', 'bulk_limit', 'rate_limits', 'idempotent', 'cacheable'})
+
+# Limits known of the API, structured as urls.json
+DEFAULTS = {
+    'activation': {'main': {'cacheable': False}},
+    'audit': {'main': {'max_page_size': 500, 'cacheable': False}, 'dwl': {'cacheable': False}},
+    'admin_role': {'main': {'max_page_size': 1000}},
+    'auth': {'cacheable': False},
+    'sandbox': {'quota': {'cacheable': False}, 'hash': {'rate_limits': {'GET': 2}}},
+    'locs': {'main': {'max_page_size': 1000}, 'lite': {'max_page_size': 1000}, 'bulk': {'bulk_limit': 100},
+             'info': {'rate_limits': {'GET': 1, 'PUT': 2}}},
+    'traffic': {'main': {'max_page_size': 1000}, 'bulk': {'bulk_limit': 100}, 'vips': {'max_page_size': 1000}},
+    'usr': {'main': {'max_page_size': 1000}, 'depts': {'max_page_size': 1000}, 'bulk': {'bulk_limit': 500},
+            'groups': {'max_page_size': 1000}},
+    'urlcat': {'quota': {'cacheable': False}, 'look': {'idempotent': ['POST']}},
+}
+
+
+class Endpoint:
+    """
+    Capabilities of one endpoint.
+    """
+
+    def __init__(self, key: str = None, max_page_size: int = None, bulk_limit: int = None, rate_limits: dict = None,
+                 idempotent=(), cacheable: bool = True):
+        """
+        Args:
+            key (str, optional): Key of the endpoint in urls.json, as in 'usr.main'. None for unknown endpoints.
+            max_page_size (int, optional): Largest page size. Defaults to unknown.
+            bulk_limit (int, optional): Largest number of ids of a bulk request. Defaults to unknown.
+            rate_limits (dict, optional): Requests per second by method. Defaults to none.
+            idempotent (optional): Methods idempotent besides the standard ones. Defaults to none.
+            cacheable (bool, optional): Whether GET responses may be cached. Defaults to True.
+        """
+        self.key = key
+        self.max_page_size = max_page_size
+        self.bulk_limit = bulk_limit
+        self.rate_limits = {method.upper(): rate for method, rate in (rate_limits or {}).items()}
+        self.idempotent = IDEMPOTENT_METHODS | {method.upper() for method in idempotent}
+        self.cacheable = cacheable
+
+    def page_size(self, requested: int = None, offset: bool = False):
+        """Resolves the page size of a full retrieval: the maximum, which takes the fewest round trips.
+
+        Args:
+            requested (int, optional): Page size asked for by the caller.
+            offset (bool, optional): Whether the retrieval starts at a page other than the first. Its offset depends on
+                the page size asked for, which is then kept. Defaults to False.
+
+        Returns:
+            int: The maximum page size, or the one asked for if `offset`, capped to the maximum. The one asked for if
+            the maximum is unknown, and None if both are, which leaves the server default.
+        """
+        if self.max_page_size is None:
+            return requested
+        if requested is None or not offset:
+            return self.max_page_size
+        return min(int(requested), self.max_page_size)
+
+    def rate_limit(self, method: str):
+        """Gets the rate limit of a method.
+
+        Args:
+            method (str): HTTP method.
+
+        Returns:
+            tuple: Name of the limit, as in 'GET locs.info', and requests per second. None if the method has none.
+        """
+        rate = self.rate_limits.get(method)
+        return (f'{method} {self.key}', rate) if rate else None
+
+    def is_idempotent(self, method: str):
+        """Tells if a method can be sent twice with the same effect.
+
+        Args:
+            method (str): HTTP method.
+
+        Returns:
+            bool: True if idempotent.
+        """
+        return method in self.idempotent
+
+
+# Capabilities of the endpoints not in the registry
+UNKNOWN = Endpoint()
+
+
+class EndpointRegistry:
+    """
+    Capabilities of the endpoints of urls.json, looked up by request URL.
+    """
+
+    def __init__(self, host: str, urls: dict, spec: dict = None):
+        """
+        Args:
+            host (str): API URL the paths of urls.json are relative to.
+            urls (dict): URL map.
+            spec (dict, optional): Capabilities, structured as urls.json, that override `DEFAULTS`. See the module
+                documentation.
+
+        Raises:
+            ValueError: If the spec names an endpoint that urls.json does not have or an unknown field.
+        """
+        self.host = host
+        self.endpoints = {}
+        spec = spec or {}
+
+        def capabilities_of(key1, key2=None):
+            known, given = DEFAULTS.get(key1, {}), spec.get(key1, {})
+            if key2 is not None:
+                known, given = known.get(key2, {}), given.get(key2, {})
+            return {**known, **(given or {})}
+
+        templates = []
+        for key1, value in urls.items():
+            if isinstance(value, dict):
+                templates += [(f'{key1}.{key2}', template, capabilities_of(key1, key2)) for key2, template in
+                              value.items()]
+            else:
+                templates.append((key1, value, capabilities_of(key1)))
+
+        unknown = []
+        for key1, value in spec.items():
+            group = urls.get(key1)
+            if group is None:
+                unknown.append(key1)
+            elif isinstance(group, dict):
+                unknown += [f'{key1}.{key2}' for key2 in value if key2 not in group]
+        if unknown:
+            raise ValueError(f'Endpoints not in the URL map: {", ".join(unknown)}.')
+
+        literal = {}
+        patterns = []
+        for key, template, capabilities in templates:
+            wrong = set(capabilities) - FIELDS
+            if wrong:
+                raise ValueError(f'Unknown fields of endpoint {key}: {", ".join(sorted(wrong))}.')
+
+            endpoint = self.endpoints[key] = Endpoint(key, **capabilities)
+            if '{' in template:
+                pattern = regex.sub(r'\\{(\w+)\\}', r'[^/]+', regex.escape(template))
+                patterns.append((regex.compile(pattern + '$'), endpoint))
+            else:
+                literal[template] = endpoint
+
+        self.literal = literal
+        self.patterns = patterns
+        self._match = functools.lru_cache(maxsize=4096)(self._match_path)
+
+    @classmethod
+    def from_file(cls, path: str, host: str, urls: dict):
+        """Loads the registry of a file.
+
+        Args:
+            path (str): Registry file. If it does not exist, every endpoint takes the limits of `DEFAULTS`.
+            host (str): API URL the paths of urls.json are relative to.
+            urls (dict): URL map.
+
+        Returns:
+            EndpointRegistry: The registry.
+        """
+        spec = None
+        if os.path.exists(path):
+            with open(path) as f:
+                spec = json.load(f)
+        return cls(host, urls, spec)
+
+    def get(self, key1: str, key2: str = None):
+        """Gets the capabilities of an endpoint by its keys in urls.json.
+
+        Args:
+            key1 (str): First key, as in 'usr'.
+            key2 (str, optional): Second key, as in 'bulk'.
+
+        Returns:
+            Endpoint: The capabilities.
+        """
+        return self.endpoints[f'{key1}.{key2}' if key2 else key1]
+
+    def lookup(self, url: str):
+        """Gets the capabilities of the endpoint of a request.
+
+        Args:
+            url (str): Request URL.
+
+        Returns:
+            Endpoint: The capabilities. The defaults if the URL is not in the URL map.
+        """
+        path = url[len(self.host):] if url.startswith(self.host) else url
+        return self._match(path.split('?')[0].rstrip('/'))
+
+    def _match_path(self, path):
+        endpoint = self.literal.get(path)
+        if endpoint is not None:
+            return endpoint
+        for pattern, endpoint in self.patterns:
+            if pattern.match(path):
+                return endpoint
+        return UNKNOWN
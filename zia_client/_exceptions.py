@@ -1,5 +1,17 @@
 """
 Module where custom exceptions are defined.
+
+Response errors are classified by whether sending the request again may succeed:
+
+- `TransientResponseException`: 5xx responses, timeouts and connection errors. Retried with backoff by the connector.
+- `PermanentResponseException`: 4xx responses. The request is wrong and is never retried.
+- `AuthResponseException`: 401 and 403 responses. Permanent until the session is renewed.
+- `CircuitOpenException`: not sent, as its endpoint keeps failing. See `zia_client._circuit`.
+
+All of them are `ResponseException`, so code that handles any response error keeps working.
+
+`DeadlineExceededException` is raised instead of sending a request once the deadline of its job has passed. See
+`zia_client._deadline`.
 """
 
 
@@ -8,10 +20,84 @@ class ResponseException(Exception):
     Exception raised when any Response error occurred.
     """
 
-    def __init__(self, message='The response had error status.'):
+    # Whether sending the request again may succeed
+    retryable = False
+
+    def __init__(self, message='The response had error status.', status_code: int = None):
         """
         Generic response exception. Useful for this purpose.
 
+        Args:
+            message: Message to display.
+            status_code (int, optional): Status code of the response. None if no response was received.
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TransientResponseException(ResponseException):
+    """
+    Exception raised when the API failed for reasons unrelated to the request: 5xx responses, timeouts and connection
+    errors.
+    """
+
+    retryable = True
+
+
+class PermanentResponseException(ResponseException):
+    """
+    Exception raised when the API rejected the request (4xx). Sending it again fails the same way.
+    """
+
+
+class AuthResponseException(PermanentResponseException):
+    """
+    Exception raised when the session is not authenticated (401) or not allowed to make the request (403).
+    """
+
+
+class CircuitOpenException(TransientResponseException):
+    """
+    Exception raised instead of sending a request to an endpoint that keeps failing.
+    """
+
+
+def response_exception(status_code: int):
+    """Gets the exception class of an error status code.
+
+    Args:
+        status_code (int): Status code of the response.
+
+    Returns:
+        type: A subclass of `ResponseException`.
+    """
+    if status_code in (401, 403):
+        return AuthResponseException
+    if status_code >= 500:
+        return TransientResponseException
+    return PermanentResponseException
+
+
+class CassetteMissException(Exception):
+    """
+    Exception raised when a replayed cassette has no recorded response for a request.
+    """
+
+    def __init__(self, message='No recorded interaction matches the request.'):
+        """
+        Args:
+            message: Message to display.
+        """
+        super().__init__(message)
+
+
+class DeadlineExceededException(Exception):
+    """
+    Exception raised instead of sending a request once the deadline of its job has passed.
+    """
+
+    def __init__(self, message='The deadline has passed.'):
+        """
         Args:
             message: Message to display.
         """
@@ -0,0 +1,152 @@
+"""
+Hedged GET requests, to cut the tail latency of fan-out jobs.
+
+A few requests take many times the median and, in jobs that make thousands of them, dominate the wall time. When a GET
+gets no response within the p95 latency of its endpoint family (see `zia_client._metrics`), the same request is sent
+again and the first good response is taken. The other one is left to finish and discarded.
+
+Hedges are extra load, so they are budgeted: they are only sent once the family has enough latency samples, only if
+the rate limits have a spare token (see `RateLimiter.try_acquire`) and, with adaptive concurrency, the family has a
+free slot (see `AIMDLimiter.try_acquire`), so they never push the client over its limits, and never more than `ratio`
+of the hedged GETs.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def _good(response):
+    return response.status_code != 429 and response.status_code < 500
+
+
+class Hedger:
+    """
+    Sends GET requests with a hedge. Thread-safe.
+    """
+
+    def __init__(self, metrics, rate_limiter, concurrency=None, q: float = 95, ratio: float = 0.1,
+                 min_samples: int = 20, max_workers: int = 64):
+        """
+        Args:
+            metrics (Metrics): Metrics where the latencies of the families are taken from, and the 'hedges' and
+                'hedge_wins' counters published.
+            rate_limiter (RateLimiter): Rate limits the hedges take a spare token from.
+            concurrency (ConcurrencyController, optional): Adaptive concurrency limits the hedges take a free slot
+                from. Defaults to none.
+            q (float, optional): Latency percentile after which the hedge is sent. Defaults to 95.
+            ratio (float, optional): Maximum hedges per hedged GET. Defaults to 0.1.
+            min_samples (int, optional): Requests of a family needed before its requests are hedged. Defaults to 20.
+            max_workers (int, optional): Threads that send the requests and their hedges. Defaults to 64.
+        """
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.q = q
+        self.ratio = ratio
+        self.min_samples = min_samples
+        self.sent = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='zia-hedge')
+
+    def _budget(self, family: str, limit: str = None):
+        """Takes the budget of a hedge.
+
+        Args:
+            family (str): Endpoint family of the request.
+            limit (str, optional): Name of the rate limit of the endpoint, besides the global one.
+
+        Returns:
+            tuple: True if the hedge can be sent, and the `AIMDLimiter` whose slot it holds, if any.
+        """
+        with self.lock:
+            if self.hedges + 1 > self.ratio * self.sent:
+                return False, None
+            # Taken before the tokens, so concurrent requests do not overdraw it
+            self.hedges += 1
+
+        # The slot is taken before the tokens, as it can be given back
+        limiter = self.concurrency.limiter(family) if self.concurrency is not None else None
+        if limiter is None or limiter.try_acquire():
+            if self.rate_limiter.try_acquire() and (limit is None or self.rate_limiter.try_acquire(limit)):
+                return True, limiter
+            if limiter is not None:
+                limiter.cancel()
+
+        with self.lock:
+            self.hedges -= 1
+        return False, None
+
+    @staticmethod
+    def _send_hedge(transport, prep_req, limiter):
+        """Sends a hedge, holding its concurrency slot until it gets a response.
+
+        Args:
+            transport (Transport): Transport the request is sent through.
+            prep_req (requests.PreparedRequest): The request.
+            limiter (AIMDLimiter): Limiter whose slot the hedge holds. None if not adaptive.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if limiter is None:
+            return transport.send(prep_req)
+
+        status = None
+        start = time.monotonic()
+        try:
+            response = transport.send(prep_req)
+            status = response.status_code
+            return response
+        finally:
+            limiter.release(time.monotonic() - start, congested=status is None or status == 429 or status >= 500)
+
+    def send(self, transport, prep_req, family: str, limit: str = None):
+        """Sends a GET request, and its hedge if it is slow and the budget allows it.
+
+        Args:
+            transport (Transport): Transport the requests are sent through.
+            prep_req (requests.PreparedRequest): The request.
+            family (str): Endpoint family of the request.
+            limit (str, optional): Name of the rate limit of the endpoint, besides the global one.
+
+        Returns:
+            requests.Response: The first response that is not an error, or else the one of the request.
+        """
+        delay = self.metrics.latency(family, self.q, self.min_samples)
+        with self.lock:
+            self.sent += 1
+
+        if delay is None:
+            return transport.send(prep_req)
+
+        primary = self.executor.submit(transport.send, prep_req)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        budget, limiter = self._budget(family, limit)
+        if not budget:
+            return primary.result()
+
+        hedge = self.executor.submit(self._send_hedge, transport, prep_req.copy(), limiter)
+        self.metrics.count(family, 'hedges')
+
+        pending = {primary, hedge}
+        fallback = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                response = future.result()
+                if _good(response):
+                    if future is hedge:
+                        self.metrics.count(family, 'hedge_wins')
+                    return response
+                if fallback is None or future is primary:
+                    fallback = response
+
+        if fallback is not None:
+            return fallback
+        # Both failed to get a response
+        return primary.result()
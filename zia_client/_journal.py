@@ -0,0 +1,140 @@
+"""
+Append-only journal of bulk jobs, so that interrupted runs can be resumed.
+
+Every line is the compact JSON outcome of one input record::
+
+    {"k": "10000042", "s": "ok"}
+    {"k": "a3f9c2d4e5b6a7c8", "s": "error", "e": "PermanentResponseException: 409 Client Error..."}
+
+where `k` is the key of the record (see `record_key`), `s` the status and `e` the error. Lines are written as the
+records finish and synced to disk in batches.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def record_key(record):
+    """Key that identifies an input record across runs: its id if it has one, a hash of its content otherwise.
+
+    Args:
+        record: Input record or id.
+
+    Returns:
+        str: The key.
+    """
+    if isinstance(record, dict) and record.get('id') is not None:
+        return str(record['id'])
+    if isinstance(record, (int, str)):
+        return str(record)
+
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+class Journal:
+    """
+    Thread-safe append-only journal. Lines are flushed to the OS at once and synced to disk every `sync_every` lines or
+    `sync_interval` seconds, and when the journal is closed.
+    """
+
+    def __init__(self, path: str, resume: bool = False, sync_every: int = 256, sync_interval: float = 1.0):
+        """
+        Args:
+            path (str): Journal file. Created if it does not exist, appended to otherwise.
+            resume (bool, optional): Loads the keys of the records that succeeded in previous runs, so that `done`
+                tells them apart. Defaults to False.
+            sync_every (int, optional): Lines between syncs. Defaults to 256.
+            sync_interval (float, optional): Maximum seconds between syncs. Defaults to 1.
+        """
+        self.path = path
+        self.completed = set()
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.synced = time.monotonic()
+        self.skipped = 0
+
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Line cut by a crash
+                        continue
+                    if entry.get('s') == 'ok':
+                        self.completed.add(entry['k'])
+
+        self.f = open(path, 'a', encoding='utf-8')
+
+    def done(self, record):
+        """Tells if a record succeeded in a previous run, and counts it as skipped if so.
+
+        Args:
+            record: Input record or id.
+
+        Returns:
+            bool: True if it can be skipped.
+        """
+        if record_key(record) in self.completed:
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, record, error: BaseException = None):
+        """Appends the outcome of a record.
+
+        Args:
+            record: Input record or id.
+            error (BaseException, optional): The error, if the record failed.
+        """
+        entry = {'k': record_key(record), 's': 'ok' if error is None else 'error'}
+        if error is not None:
+            entry['e'] = f'{type(error).__name__}: {error}'[:500]
+
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self.lock:
+            self.f.write(line)
+            self.f.flush()
+            self.pending += 1
+            if self.pending >= self.sync_every or time.monotonic() - self.synced >= self.sync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self.f.fileno())
+        self.pending = 0
+        self.synced = time.monotonic()
+
+    def wrap(self, func):
+        """Wraps a function of one record so that its outcome is journaled.
+
+        Args:
+            func: Function of one record.
+
+        Returns:
+            The wrapped function. Exceptions are journaled and raised again.
+        """
+        def journaled(record):
+            try:
+                result = func(record)
+            except BaseException as e:
+                self.record(record, e)
+                raise
+            self.record(record)
+            return result
+
+        return journaled
+
+    def close(self):
+        """
+        Syncs and closes the journal.
+        """
+        with self.lock:
+            if not self.f.closed:
+                self.f.flush()
+                self._sync()
+                self.f.close()
@@ -0,0 +1,112 @@
+"""
+JSON codecs. `orjson` is used when installed, the standard library otherwise.
+
+Set the `ZIA_JSON_CODEC` environment variable to 'json' or 'orjson' to force one.
+"""
+import json
+import os
+import re
+
+_LEADING_SPACES = re.compile(r'^ +', re.MULTILINE)
+
+
+class JSONCodec:
+    """
+    Standard library codec. Base of the other codecs.
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        """Decodes JSON.
+
+        Args:
+            data (str or bytes): JSON text.
+
+        Returns:
+            The decoded object.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj, indent=None):
+        """Encodes JSON.
+
+        Args:
+            obj: JSON serializable object.
+            indent (int, optional): Indent width. None or 0 for compact output, without whitespace. Defaults to None.
+
+        Returns:
+            str: JSON text.
+        """
+        if not indent:
+            return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+        return json.dumps(obj, indent=indent, ensure_ascii=False)
+
+    def dump(self, obj, fp, indent=None):
+        """Encodes JSON to a text file.
+
+        Args:
+            obj: JSON serializable object.
+            fp: Text file object.
+            indent (int, optional): Indent width. None or 0 for compact output. Defaults to None.
+        """
+        fp.write(self.dumps(obj, indent))
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    orjson codec. Falls back to the standard library for objects orjson does not support, like integers wider than 64
+    bits or non-string keys. orjson only indents by 2, so other indents are made by re-indenting its output, which is
+    still faster than the standard library.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+    def dumps(self, obj, indent=None):
+        option = self.orjson.OPT_INDENT_2 if indent else 0
+        try:
+            text = self.orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            return super().dumps(obj, indent)
+
+        if indent and indent != 2:
+            # JSON strings cannot hold raw newlines, so every run of leading spaces is indentation
+            text = _LEADING_SPACES.sub(lambda m: ' ' * (len(m.group()) // 2 * indent), text)
+
+        return text
+
+
+CODECS = {'json': JSONCodec, 'orjson': OrjsonCodec}
+
+
+def get_codec(name=None):
+    """Gets a codec.
+
+    Args:
+        name (str, optional): 'json', 'orjson' or 'auto'. Defaults to the `ZIA_JSON_CODEC` environment variable, or
+            'auto': orjson if it is installed.
+
+    Returns:
+        JSONCodec: The codec.
+    """
+    name = name or os.environ.get('ZIA_JSON_CODEC', 'auto')
+
+    if name != 'auto':
+        return CODECS[name]()
+
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return JSONCodec()
+
+
+# Codec used when none is given
+DEFAULT_CODEC = get_codec()
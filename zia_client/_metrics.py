@@ -0,0 +1,143 @@
+"""
+Request metrics of a `ZIAConnector`, per endpoint family.
+
+A family is the method plus the collection of the URL, as in 'GET /users' or 'PUT /locations': the granularity at
+which the API enforces its rate limits.
+"""
+import collections
+import threading
+
+# Latencies kept per family to compute percentiles
+WINDOW = 512
+
+
+def endpoint_family(host: str, method: str, url: str):
+    """Gets the endpoint family of a request.
+
+    Args:
+        host (str): API URL the paths are relative to, as in 'https://admin.zscloud.net/api/v1'.
+        method (str): HTTP method.
+        url (str): Request URL.
+
+    Returns:
+        str: The family, as in 'GET /users'.
+    """
+    path = url[len(host):] if url.startswith(host) else url
+    return f"{method} /{path.split('?')[0].strip('/').split('/')[0]}"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile.
+
+    Args:
+        values: Numbers.
+        q (float): Percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or None if there are no values.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))]
+
+
+class _Family:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latencies = collections.deque(maxlen=WINDOW)
+        self.counters = collections.Counter()
+        self.gauges = {}
+
+
+class Metrics:
+    """
+    Thread-safe counters, latencies and gauges per endpoint family.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = collections.defaultdict(_Family)
+
+    def observe(self, family: str, latency: float, status: int = None):
+        """Records a request.
+
+        Args:
+            family (str): Endpoint family.
+            latency (float): Seconds from send to response.
+            status (int, optional): Status code. None if no response was received.
+        """
+        with self.lock:
+            stats = self.families[family]
+            stats.requests += 1
+            stats.latencies.append(latency)
+            if status == 429:
+                stats.throttled += 1
+            elif status is None or status >= 400:
+                stats.errors += 1
+
+    def count(self, family: str, name: str, n: int = 1):
+        """Increments a counter of events of a family other than requests, as retries.
+
+        Args:
+            family (str): Endpoint family.
+            name (str): Counter name.
+            n (int, optional): Increment. Defaults to 1.
+        """
+        with self.lock:
+            self.families[family].counters[name] += n
+
+    def gauge(self, family: str, name: str, value):
+        """Sets a value that describes the current state of a family, as its concurrency limit.
+
+        Args:
+            family (str): Endpoint family.
+            name (str): Gauge name.
+            value: Current value.
+        """
+        with self.lock:
+            self.families[family].gauges[name] = value
+
+    def latency(self, family: str, q: float = 95, min_samples: int = 1):
+        """Latency percentile of the recent requests of a family.
+
+        Args:
+            family (str): Endpoint family.
+            q (float, optional): Percentile. Defaults to 95.
+            min_samples (int, optional): Requests needed for the percentile to be meaningful. Defaults to 1.
+
+        Returns:
+            float: Seconds, or None if the family has fewer requests.
+        """
+        with self.lock:
+            stats = self.families.get(family)
+            latencies = list(stats.latencies) if stats else []
+        if len(latencies) < min_samples:
+            return None
+        return percentile(latencies, q)
+
+    def snapshot(self):
+        """Gets the metrics of every family.
+
+        Returns:
+            dict: By family, the number of requests, errors and throttled (429) responses, the p50 and p95 latencies
+            of the recent requests in milliseconds, the counters and the gauges.
+        """
+        with self.lock:
+            families = {name: (stats.requests, stats.errors, stats.throttled, list(stats.latencies),
+                               dict(stats.counters), dict(stats.gauges)) for name, stats in self.families.items()}
+
+        result = {}
+        for name, (requests, errors, throttled, latencies, counters, gauges) in sorted(families.items()):
+            result[name] = {
+                'requests': requests,
+                'errors': errors,
+                'throttled': throttled,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+                'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+                **counters,
+                **gauges,
+            }
+        return result
@@ -0,0 +1,200 @@
+"""
+Concurrent execution of per-item API calls with progress reporting.
+"""
+import collections
+import contextvars
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zia_client._deadline import Deadline, PartialResult, within
+from zia_client._exceptions import DeadlineExceededException
+from zia_client._scheduler import prioritized
+
+
+class Progress:
+    """
+    Thread-safe progress line on stderr: done/total, rate and ETA. Only done and rate if the total is unknown.
+    """
+
+    def __init__(self, total: int = None, label: str = '', enabled: bool = True, interval: float = 0.5,
+                 stream=None):
+        """
+        Args:
+            total (int, optional): Number of items. Defaults to unknown.
+            label (str, optional): Text that precedes the counters.
+            enabled (bool, optional): Prints nothing if False. Defaults to True.
+            interval (float, optional): Minimum seconds between updates. Defaults to 0.5.
+            stream (optional): Where the line is written. Defaults to `sys.stderr`.
+        """
+        self.total = total
+        self.label = label
+        self.enabled = enabled
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.start = time.monotonic()
+        # Runs shorter than the interval print nothing
+        self.printed = self.start
+        self.shown = False
+        self.lock = threading.Lock()
+
+    def line(self):
+        """Formats the current state.
+
+        Returns:
+            str: As in 'users info: 120/500 (24.0%) 11.8/s ETA 32s', or 'users update: 120 11.8/s'.
+        """
+        elapsed = time.monotonic() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0
+        label = f'{self.label}: ' if self.label else ''
+
+        if self.total is None:
+            return f'{label}{self.done} {rate:.1f}/s'
+
+        percent = 100 * self.done / self.total if self.total else 100
+        eta = f'{(self.total - self.done) / rate:.0f}s' if rate else '?'
+        return f'{label}{self.done}/{self.total} ({percent:.1f}%) {rate:.1f}/s ETA {eta}'
+
+    def _print(self, end=''):
+        self.printed = time.monotonic()
+        self.shown = True
+        self.stream.write('\r' + self.line() + end)
+        self.stream.flush()
+
+    def update(self, n: int = 1):
+        """Counts finished items and prints the line if the interval elapsed.
+
+        Args:
+            n (int, optional): Items finished. Defaults to 1.
+        """
+        with self.lock:
+            self.done += n
+            if self.enabled and time.monotonic() - self.printed >= self.interval:
+                self._print()
+
+    def finish(self):
+        """
+        Prints the final line, if any line was printed before.
+        """
+        with self.lock:
+            if self.shown:
+                self._print('\n')
+
+
+def _with_priority(func, priority):
+    def call(item):
+        with prioritized(priority):
+            return func(item)
+
+    return call
+
+
+def _with_deadline(func, deadline):
+    def call(item):
+        with within(deadline):
+            return func(item)
+
+    return call
+
+
+def _until(items, deadline):
+    for item in items:
+        if deadline.expired:
+            deadline.exceeded = True
+            return
+        yield item
+
+
+def iter_parallel(func, items, workers: int = 1, label: str = '', progress: bool = True, priority: str = None,
+                  deadline: Deadline = None):
+    """Calls `func` on every item with up to `workers` threads and yields the results in the order of the items.
+
+    Items are consumed as the calls progress, with at most twice `workers` calls submitted at once, so lazy inputs are
+    processed with constant memory. The first exception stops the submission of items and is raised once the running
+    calls finish, as a serial loop would stop at the failing item. Calls run in the context of the caller, so they keep
+    its priority (see `zia_client._scheduler.prioritized`).
+
+    With a deadline, the items not started when it passes are dropped, and the calls in progress stop at their next
+    request. The results of the calls that finished before the first stopped one are yielded, and the `status` of the
+    deadline tells whether the results are complete.
+
+    Args:
+        func: Function of one argument, usually a `zia_client` function bound to a session.
+        items: Iterable of items.
+        workers (int, optional): Maximum concurrent calls. Defaults to 1, a plain loop.
+        label (str, optional): Label of the progress line.
+        progress (bool, optional): Reports progress on stderr unless there is a single item. Defaults to True.
+        priority (str, optional): Priority of the requests made by `func`, as 'bulk' for jobs over many records.
+            Defaults to the one of the caller.
+        deadline (Deadline, optional): Deadline of the job. See `zia_client._deadline`.
+
+    Yields:
+        The results of `func`.
+    """
+    if priority is not None:
+        func = _with_priority(func, priority)
+
+    total = len(items) if hasattr(items, '__len__') else None
+    tracker = Progress(total, label, enabled=progress and total != 1)
+
+    if deadline is not None:
+        func = _with_deadline(func, deadline)
+        items = _until(items, deadline)
+
+    try:
+        if workers <= 1:
+            for item in items:
+                yield func(item)
+                tracker.update()
+        else:
+            yield from _pooled(func, items, workers, tracker)
+    except DeadlineExceededException:
+        if deadline is None:
+            raise
+        deadline.exceeded = True
+
+    tracker.finish()
+
+
+def _pooled(func, items, workers, tracker):
+    window = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for item in items:
+                window.append(pool.submit(contextvars.copy_context().run, func, item))
+                if len(window) >= 2 * workers:
+                    result = window.popleft().result()
+                    tracker.update()
+                    yield result
+
+            while window:
+                result = window.popleft().result()
+                tracker.update()
+                yield result
+        finally:
+            for future in window:
+                future.cancel()
+
+
+def run_parallel(func, items, workers: int = 1, label: str = '', progress: bool = True, priority: str = None,
+                 deadline: Deadline = None):
+    """Like `iter_parallel`, but returns the list of results.
+
+    Args:
+        func: Function of one argument, usually a `zia_client` function bound to a session.
+        items: Iterable of items.
+        workers (int, optional): Maximum concurrent calls. Defaults to 1, a plain loop.
+        label (str, optional): Label of the progress line.
+        progress (bool, optional): Reports progress on stderr unless there is a single item. Defaults to True.
+        priority (str, optional): Priority of the requests made by `func`. Defaults to the one of the caller.
+        deadline (Deadline, optional): Deadline of the job. See `zia_client._deadline`.
+
+    Returns:
+        list: Results of `func`. A `PartialResult` with the status of the job if `deadline`.
+    """
+    results = list(iter_parallel(func, items, workers, label, progress, priority, deadline))
+    if deadline is not None:
+        return PartialResult(results, deadline.status)
+    return results
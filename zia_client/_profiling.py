@@ -0,0 +1,137 @@
+"""
+Profiling helpers: wall-clock time per phase, CPU hot spots and peak memory.
+"""
+import contextlib
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock time and call counts per named phase. Thread-safe.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """Adds time to a phase.
+
+        Args:
+            name (str): Phase name.
+            seconds (float): Elapsed seconds.
+        """
+        with self.lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager that times its body as the given phase.
+
+        Args:
+            name (str): Phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self):
+        """Returns the accumulated phases.
+
+        Returns:
+            dict: Phase name to seconds and count.
+        """
+        with self.lock:
+            return {name: {'seconds': round(total, 6), 'count': self.counts[name]}
+                    for name, total in self.totals.items()}
+
+
+class NullTimer:
+    """
+    Timer that does nothing. Used when profiling is disabled so instrumented code pays no cost.
+    """
+
+    def add(self, name, seconds):
+        pass
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def report(self):
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+def peak_rss():
+    """Peak resident set size of the current process.
+
+    Returns:
+        int or None: Bytes, or None if the platform does not provide it.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def write_profile(timer: PhaseTimer, profiler, base_path, wall_time, top=25):
+    """Writes the profile next to the output file and prints the phase breakdown to stderr.
+
+    Two files are written: `<base_path>.profile.json`, with the phases and the peak RSS, and `<base_path>.pstats`,
+    the cProfile dump that can be explored with `pstats` or tools such as snakeviz.
+
+    Args:
+        timer (PhaseTimer): Timer with the phases.
+        profiler (cProfile.Profile): Disabled profiler.
+        base_path (str): Output file the profile files are named after.
+        wall_time (float): Total wall-clock seconds.
+        top (int, optional): Number of hot spots printed. Defaults to 25.
+
+    Returns:
+        dict: The written profile.
+    """
+    import io
+    import pstats
+
+    profile = {
+        'wall_seconds': round(wall_time, 6),
+        'peak_rss_bytes': peak_rss(),
+        'phases': timer.report(),
+    }
+
+    with open(base_path + '.profile.json', 'w') as f:
+        json.dump(profile, f, indent=4)
+
+    profiler.dump_stats(base_path + '.pstats')
+
+    lines = [f'{"phase":<24}{"seconds":>12}{"count":>8}{"%":>8}']
+    for name, phase in sorted(profile['phases'].items(), key=lambda kv: -kv[1]['seconds']):
+        share = 100 * phase['seconds'] / wall_time if wall_time else 0
+        lines.append(f'{name:<24}{phase["seconds"]:>12.4f}{phase["count"]:>8}{share:>8.1f}')
+    lines.append(f'{"total wall":<24}{wall_time:>12.4f}')
+    if profile['peak_rss_bytes'] is not None:
+        lines.append(f'{"peak RSS (MiB)":<24}{profile["peak_rss_bytes"] / 2 ** 20:>12.1f}')
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+
+    print('\n'.join(lines), file=sys.stderr)
+    print(stream.getvalue(), file=sys.stderr)
+
+    return profile
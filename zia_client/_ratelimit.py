@@ -0,0 +1,262 @@
+"""
+Client-side rate limiting of the requests sent by the `ZIAConnector`.
+
+The buckets can be shared by the processes of a host through a state file, so that concurrent runs against the same
+tenant split the budget instead of each one spending all of it. The file is a JSON object with the tokens of every
+bucket and when they were last updated, read and written under an exclusive `fcntl` lock, which is Unix only.
+"""
+import json
+import os
+import threading
+import time
+
+from zia_client._scheduler import PriorityGate
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Allows `rate` acquisitions per second on average and bursts of up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (float, optional): Maximum number of stored tokens. Defaults to 1.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0.')
+
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, waiting until one is available.
+
+        Returns:
+            float: Seconds waited.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # A negative balance is a reservation: the caller sleeps until its token is due.
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self):
+        """Takes a token only if one is available at once. Never waits nor reserves one.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class SharedState:
+    """
+    State file of the buckets shared between processes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): State file. Created if it does not exist.
+        """
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError('Rate limits shared between processes require fcntl, which is Unix only.')
+
+        self.fcntl = fcntl
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock does not exclude the threads of a process, which share the descriptor
+        self.lock = threading.Lock()
+
+    def update(self, key: str, func):
+        """Updates the state of a bucket atomically for all processes.
+
+        Args:
+            key (str): Bucket name.
+            func: Function of the current state, a dict or None if the bucket is new, that returns the new state and
+                a result.
+
+        Returns:
+            The result of `func`.
+        """
+        with self.lock:
+            self.fcntl.flock(self.fd, self.fcntl.LOCK_EX)
+            try:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                data = b''
+                while True:
+                    chunk = os.read(self.fd, 65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                try:
+                    state = json.loads(data) if data else {}
+                except ValueError:
+                    # Cut by a crash in the middle of a write. Starting over only forgets the debts.
+                    state = {}
+
+                state[key], result = func(state.get(key))
+
+                data = json.dumps(state, separators=(',', ':')).encode()
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                os.write(self.fd, data)
+                os.ftruncate(self.fd, len(data))
+            finally:
+                self.fcntl.flock(self.fd, self.fcntl.LOCK_UN)
+
+        return result
+
+    def close(self):
+        """
+        Closes the file. The state is kept for other processes.
+        """
+        os.close(self.fd)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose tokens are shared by all the processes using the same `SharedState`. Same interface as
+    `TokenBucket`.
+    """
+
+    def __init__(self, state: SharedState, key: str, rate: float, burst: float = 1):
+        """
+        Args:
+            state (SharedState): Shared state file.
+            key (str): Bucket name in the file.
+            rate (float): Tokens added per second.
+            burst (float, optional): Maximum number of stored tokens. Defaults to 1.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0.')
+
+        self.state = state
+        self.key = key
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+    def _refill(self, bucket):
+        # Wall-clock time, the only clock processes share
+        now = time.time()
+        if bucket is None:
+            return self.burst, now
+        return min(self.burst, bucket['tokens'] + max(0.0, now - bucket['updated']) * self.rate), now
+
+    def _take(self, bucket):
+        tokens, now = self._refill(bucket)
+        tokens -= 1
+        wait = -tokens / self.rate if tokens < 0 else 0
+        return {'tokens': tokens, 'updated': now}, wait
+
+    def acquire(self):
+        """Takes a token, waiting until one is available.
+
+        Returns:
+            float: Seconds waited.
+        """
+        wait = self.state.update(self.key, self._take)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def _try_take(self, bucket):
+        tokens, now = self._refill(bucket)
+        taken = tokens >= 1
+        return {'tokens': tokens - 1 if taken else tokens, 'updated': now}, taken
+
+    def try_acquire(self):
+        """Takes a token only if one is available at once. Never waits nor reserves one.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        return self.state.update(self.key, self._try_take)
+
+
+class RateLimiter:
+    """
+    Global request rate limit plus named limits for the endpoints that have a stricter one. Requests waiting for a
+    limit are served in priority order (see `zia_client._scheduler`).
+    """
+
+    def __init__(self, rate: float = None, shared_path: str = None):
+        """
+        Args:
+            rate (float, optional): Maximum requests per second over all endpoints. Defaults to no limit.
+            shared_path (str, optional): State file that shares the buckets with the other processes of the host that
+                use the same file. Defaults to limits of this process only.
+        """
+        self.rate = rate
+        self.shared = SharedState(shared_path) if shared_path else None
+        self.bucket = self._new_bucket('*', rate) if rate else None
+        self.gate = PriorityGate()
+        # Named buckets and their gates
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str = None, rate: float = None, priority: str = None):
+        """Waits for the global limit or, if a key is given, for the named one.
+
+        Args:
+            key (str, optional): Name of the limit, as in 'locs_get'. Defaults to the global one.
+            rate (float, optional): Requests per second of the named limit. Only used the first time the key is seen.
+            priority (str, optional): 'interactive', 'normal' or 'bulk'. See `zia_client._scheduler.current_priority`.
+
+        Returns:
+            float: Seconds waited for the token, not counting the queue.
+        """
+        if key is None:
+            return self.gate.run(self.bucket.acquire, priority) if self.bucket else 0
+
+        with self.lock:
+            if key not in self.buckets:
+                self.buckets[key] = (self._new_bucket(key, rate), PriorityGate())
+            bucket, gate = self.buckets[key]
+
+        return gate.run(bucket.acquire, priority)
+
+    def try_acquire(self, key: str = None):
+        """Takes a token of the global limit or, if a key is given, of the named one, only if it is spare: available at
+        once and not awaited by queued requests. For optional requests, as hedges, that must not delay the others
+        nor exceed the limit.
+
+        Args:
+            key (str, optional): Name of the limit. Defaults to the global one.
+
+        Returns:
+            bool: True if a token was taken, or if there is no such limit.
+        """
+        if key is None:
+            bucket, gate = self.bucket, self.gate
+        else:
+            with self.lock:
+                bucket, gate = self.buckets.get(key, (None, None))
+
+        if bucket is None:
+            return True
+        return not gate.waiting() and bucket.try_acquire()
+
+    def _new_bucket(self, key, rate):
+        if self.shared is not None:
+            return SharedTokenBucket(self.shared, key, rate)
+        return TokenBucket(rate)
@@ -0,0 +1,203 @@
+"""
+Streaming readers of input records: JSON arrays, NDJSON and CSV, optionally gzip or zstd compressed.
+
+Records are yielded as they are read, so the first request can go out before a large file has been read, and memory
+stays constant.
+"""
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+
+
+def open_input(path):
+    """Opens a text file for reading, decompressing '.gz' and '.zst' files.
+
+    Args:
+        path (str): File path. '-' for stdin.
+
+    Returns:
+        Text file object.
+    """
+    if path == '-':
+        # Not closed when the caller is done
+        return contextlib.nullcontext(sys.stdin)
+
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstd compressed input requires the zstandard package.')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+
+    return open(path, encoding='utf-8')
+
+
+class _JSONStream:
+    """
+    Incremental decoder of JSON values over a text file.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        self.eof = not data
+        return not self.eof
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or '' at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        """Consumes the next character, which must be one of `chars`.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'Invalid JSON input: expected one of {chars!r}, found {char!r}.')
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decodes the next value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def _array(stream):
+    stream.expect('[')
+    if stream.peek() == ']':
+        return
+
+    while True:
+        yield stream.value()
+        if stream.expect(',]') == ']':
+            return
+
+
+def _values(stream):
+    while stream.peek():
+        yield stream.value()
+
+
+def iter_json_array(f):
+    """Iterates the elements of a JSON array.
+
+    Args:
+        f: Text file object whose content is a JSON array.
+
+    Yields:
+        The elements, one by one.
+    """
+    return _array(_JSONStream(f))
+
+
+def iter_json_values(f):
+    """Iterates whitespace separated JSON values: NDJSON, or a single JSON object.
+
+    Args:
+        f: Text file object.
+
+    Yields:
+        The values, one by one.
+    """
+    return _values(_JSONStream(f))
+
+
+def iter_csv(f, entity=None):
+    """Iterates the rows of a CSV file with a header. Dotted columns are nested, as exported by `zia_client.export`.
+
+    Args:
+        f: Text file object.
+        entity (str, optional): Kind of records (see `zia_client.export.SCHEMAS`). Its columns are converted to their
+            type and its list columns split. Other values are kept as strings.
+
+    Yields:
+        dict: The records. Empty values are left out.
+    """
+    from zia_client.export import record_from_row
+
+    for row in csv.DictReader(f):
+        yield record_from_row(row, entity)
+
+
+def iter_records(path, fmt=None, entity=None):
+    """Iterates the records of a file.
+
+    Args:
+        path (str): File path. '-' for stdin. '.gz' and '.zst' files are decompressed.
+        fmt (str, optional): 'json' (an array, or a single object), 'ndjson' or 'csv'. Defaults to 'csv' for '.csv'
+            files and to detecting JSON arrays and NDJSON from the content otherwise.
+        entity (str, optional): Kind of records, for CSV files. See `iter_csv`.
+
+    Yields:
+        The records, one by one.
+    """
+    if fmt is None:
+        base = path[:-len(os.path.splitext(path)[1])] if path.endswith(('.gz', '.zst')) else path
+        fmt = 'csv' if base.endswith('.csv') else None
+
+    with open_input(path) as f:
+        if fmt == 'csv':
+            yield from iter_csv(f, entity)
+            return
+
+        stream = _JSONStream(f)
+        if fmt != 'ndjson' and stream.peek() == '[':
+            yield from _array(stream)
+        else:
+            yield from _values(stream)
+
+
+def iter_column(path, index=0):
+    """Iterates the values of a column of a CSV file. The first line is taken as the header and skipped.
+
+    Args:
+        path (str): File path. '-' for stdin.
+        index (int, optional): Column position. Defaults to the first.
+
+    Yields:
+        str: The non-empty values.
+    """
+    with open_input(path) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) > index and row[index].strip():
+                yield row[index].strip()
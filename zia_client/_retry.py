@@ -0,0 +1,80 @@
+"""
+Retry policy of the requests sent by the `ZIAConnector`.
+
+Throttled (429) requests are always sent again. Transient errors, 5xx responses and connection errors, are sent again
+only if that cannot apply a change twice: idempotent methods on any of them, POST only when the API did not process it
+(503, or the connection could not be established). Permanent errors (4xx) are never retried, so a bulk job spends a
+single round trip on a rejected record.
+
+Retries wait with exponential backoff and full jitter, so the workers of a bulk job do not retry in lockstep, unless
+the response tells how long to wait with a Retry-After header.
+"""
+import random
+
+import requests as re
+
+# Transient error responses
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# Methods that can be sent twice with the same effect
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+def is_retryable(method: str, status: int = None, error: Exception = None, idempotent: bool = None):
+    """Tells if a failed request can be sent again.
+
+    Args:
+        method (str): HTTP method.
+        status (int, optional): Status code of the response. None if no response was received.
+        error (Exception, optional): Exception raised by the transport when no response was received.
+        idempotent (bool, optional): Whether the request can be sent twice with the same effect. Defaults to whether
+            its method is idempotent. The endpoint registry knows better (see `zia_client._endpoints`).
+
+    Returns:
+        bool: True if it can be retried.
+    """
+    if status == 429:
+        return True
+
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+
+    if status is None:
+        if not isinstance(error, (re.exceptions.ConnectionError, re.exceptions.Timeout)):
+            return False
+        return idempotent or isinstance(error, re.exceptions.ConnectTimeout)
+
+    if status not in RETRY_STATUSES:
+        return False
+    return idempotent or status == 503
+
+
+def retry_after(response: re.Response):
+    """Gets the seconds to wait the response asks for.
+
+    Args:
+        response (requests.Response): Response, or None.
+
+    Returns:
+        float: Seconds of its Retry-After header, or None if it has none in seconds.
+    """
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt: int, base: float, cap: float = 30):
+    """Gets the seconds to wait before a retry: random up to the exponential backoff (full jitter).
+
+    Args:
+        attempt (int): Number of the failed attempt, from 0.
+        base (float): Backoff of the first retry.
+        cap (float, optional): Maximum backoff. Defaults to 30.
+
+    Returns:
+        float: Seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,115 @@
+"""
+Priority scheduling of the requests that wait for the rate limit or for a concurrency slot.
+
+Waiting requests are served in order of priority class: 'interactive' (one-off lookups), 'normal' and 'bulk' (the
+requests of jobs over many records). To avoid starvation, a request is served as if it had been queued `aging` seconds
+later per class below 'interactive', so a bulk request that has waited twice `aging` seconds goes before a new
+interactive one.
+
+The priority of a request is the one given to the `zia_client` function, or else the one of the enclosing
+`prioritized` block, or else 'normal'. `zia_client._parallel` runs every call in the context of the caller, so a
+`prioritized` block applies to the workers it starts.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+INTERACTIVE = 'interactive'
+NORMAL = 'normal'
+BULK = 'bulk'
+
+# Rank of every class. Lower ranks are served first.
+PRIORITIES = {INTERACTIVE: 0, NORMAL: 1, BULK: 2}
+
+_PRIORITY = contextvars.ContextVar('zia_priority', default=None)
+
+
+@contextlib.contextmanager
+def prioritized(priority: str):
+    """Sets the priority of the requests made in the block, unless given explicitly.
+
+    Args:
+        priority (str): 'interactive', 'normal' or 'bulk'.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f'Unknown priority {priority!r}. Use one of {list(PRIORITIES)}.')
+
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority(priority: str = None):
+    """Resolves the priority of a request.
+
+    Args:
+        priority (str, optional): Priority given explicitly.
+
+    Returns:
+        str: `priority`, or else the one of the enclosing `prioritized` block, or else 'normal'.
+    """
+    priority = priority or _PRIORITY.get() or NORMAL
+    if priority not in PRIORITIES:
+        raise ValueError(f'Unknown priority {priority!r}. Use one of {list(PRIORITIES)}.')
+    return priority
+
+
+class PriorityGate:
+    """
+    Thread-safe priority queue in front of a blocking resource, as a rate limit. Callers wait in the queue and take the
+    resource one at a time, in priority order with aging.
+    """
+
+    def __init__(self, aging: float = 5.0):
+        """
+        Args:
+            aging (float, optional): Seconds of waiting that make up for one class of priority. Defaults to 5.
+        """
+        self.aging = aging
+        self.cond = threading.Condition()
+        self.queue = []
+        self.seq = itertools.count()
+        self.busy = False
+        self.served = {priority: 0 for priority in PRIORITIES}
+
+    def run(self, func, priority: str = None):
+        """Calls `func` once every request queued before this one, in priority order, has called its own.
+
+        Args:
+            func: Function without arguments that blocks until the resource is available, as `TokenBucket.acquire`.
+            priority (str, optional): Priority class. See `current_priority`.
+
+        Returns:
+            The result of `func`.
+        """
+        priority = current_priority(priority)
+
+        with self.cond:
+            if not self.busy and not self.queue:
+                # Nobody waiting: no queueing cost
+                self.busy = True
+            else:
+                entry = (time.monotonic() + PRIORITIES[priority] * self.aging, next(self.seq))
+                heapq.heappush(self.queue, entry)
+                self.cond.wait_for(lambda: not self.busy and self.queue[0] is entry)
+                heapq.heappop(self.queue)
+                self.busy = True
+            self.served[priority] += 1
+
+        try:
+            return func()
+        finally:
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def waiting(self):
+        """Number of requests in the queue.
+        """
+        with self.cond:
+            return len(self.queue)
@@ -2,12 +2,19 @@
 Utility methods to be used while using the api.
 """
 
+import gzip
+import io
 import json
+import os
+import sys
 import time
+from collections.abc import Iterable, Iterator
 from http.client import responses
 
 import requests
 
+from zia_client._json import DEFAULT_CODEC
+
 
 def pretty_print_response(response):
     """Prints the response headers in a pretty way.
@@ -80,21 +87,117 @@ def print_json(obj, indent=4):
 
     Args:
         obj (JSON Object): JSON dict or list.
-        indent (int, optional): Indent width. Defaults to 4.
+        indent (int, optional): Indent width. 0 for compact output. Defaults to 4.
     """
-    print(json.dumps(obj, indent=indent))
+    print(DEFAULT_CODEC.dumps(obj, indent))
 
 
-def save_json(obj, path, indent=4):
+def save_json(obj, path, indent=4, compression=None):
     """Saves the JSON object to a file.
 
     Args:
         obj (JSON Object): The JSON object to be saved.
         path (str): The path to the newly created file.
-        indent (int, optional): Indent width. Defaults to 4.
+        indent (int, optional): Indent width. 0 for compact output. Defaults to 4.
+        compression (str, optional): 'gzip' or 'zstd'. Defaults to the one of the file extension, if any.
+    """
+    with open_output(path, compression) as f:
+        DEFAULT_CODEC.dump(obj, f, indent)
+
+
+def open_output(path, compression=None):
+    """Opens a file for writing text, compressed if requested.
+
+    Args:
+        path (str): File path.
+        compression (str, optional): 'gzip' or 'zstd'. Defaults to 'gzip' for '.gz' files, 'zstd' for '.zst' files
+            and no compression otherwise.
+
+    Returns:
+        Text file object.
+    """
+    if compression is None:
+        compression = {'.gz': 'gzip', '.zst': 'zstd'}.get(os.path.splitext(path)[1])
+
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8')
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstd compression requires the zstandard package.')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb')), encoding='utf-8')
+    elif compression:
+        raise ValueError(f'Unknown compression: {compression}.')
+
+    return open(path, 'w', encoding='utf-8')
+
+
+def save_ndjson(obj, path, compression=None, echo=False, flush_interval=1.0):
+    """Writes a result as newline delimited JSON, one entry per line, as the entries are produced.
+
+    Lists and iterators (like the lazy full retrievals) are written entry by entry, so memory stays constant. Anything
+    else is written as a single line. The file is flushed at least every `flush_interval` seconds, so if the process
+    dies, every complete line of the file is a valid entry.
+
+    Args:
+        obj: List, iterator or JSON object.
+        path (str): The path to the newly created file.
+        compression (str, optional): 'gzip' or 'zstd'. Defaults to the one of the file extension, if any.
+        echo (bool, optional): Also prints every line to the stdout. Defaults to False.
+        flush_interval (float, optional): Maximum seconds between flushes. Defaults to 1.
+
+    Returns:
+        int: Number of lines written.
+    """
+    if isinstance(obj, (dict, str)) or not isinstance(obj, Iterable):
+        obj = [obj]
+
+    count = 0
+    flushed = time.monotonic()
+    with open_output(path, compression) as f:
+        for entry in obj:
+            line = DEFAULT_CODEC.dumps(entry) + '\n'
+            f.write(line)
+            if echo:
+                sys.stdout.write(line)
+            count += 1
+
+            if time.monotonic() - flushed >= flush_interval:
+                f.flush()
+                flushed = time.monotonic()
+
+    return count
+
+
+def save_output(obj, path, fmt='json', compression=None, echo=False, entity=None, indent=4):
+    """Saves a result in the given format. See `save_json`, `save_ndjson` and `zia_client.export.export`.
+
+    Args:
+        obj: The result.
+        path (str): The path to the newly created file.
+        fmt (str, optional): 'json', 'ndjson', 'csv' or 'parquet'. Defaults to 'json'.
+        compression (str, optional): 'gzip' or 'zstd'. Defaults to the one of the file extension, if any.
+        echo (bool, optional): Also prints the result to the stdout. Ignored by columnar formats. Defaults to False.
+        entity (str, optional): Kind of records, for the columnar formats. See `zia_client.export.SCHEMAS`.
+        indent (int, optional): Indent width of the 'json' format. 0 for compact output. Defaults to 4.
     """
-    with open(path, 'w') as f:
-        json.dump(obj, f, indent=indent)
+    if fmt == 'ndjson':
+        save_ndjson(obj, path, compression, echo)
+        return
+
+    if fmt in ('csv', 'parquet'):
+        from zia_client.export import export
+
+        export(obj, path, fmt, entity, compression)
+        return
+
+    if isinstance(obj, Iterator):
+        obj = list(obj)
+
+    save_json(obj, path, indent, compression)
+    if echo:
+        print_json(obj, indent)
 
 
 def get_location_id(location_ids, location):
@@ -156,7 +259,7 @@ def clean_args(args: dict, *exemption) -> dict:
     """
     params = {}
 
-    default_exemptions = ['self', 'full', 'args', 'session']
+    default_exemptions = ['self', 'full', 'lazy', 'args', 'session', 'url', 'priority']
 
     exemption = list(exemption)
 
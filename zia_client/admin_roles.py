@@ -27,7 +27,7 @@ def get_admin_roles(session: ZIAConnector, includeAuditorRole=None, includePartn
 
 
 def get_admin_users(session: ZIAConnector, includeAuditorUsers=False, includeAdminUsers=True, search: str = "",
-                    page=None, pageSize=None, full=False):
+                    page=None, pageSize=None, full=False, lazy=False):
     """Obtains the list containing all the admin users.
 
     Args:
@@ -40,6 +40,8 @@ def get_admin_users(session: ZIAConnector, includeAuditorUsers=False, includeAdm
         page (int, optional): Specifies the page offset. Defaults to 1.
         pageSize (int, optional): Specifies the page size. The default size is 100, but the maximum size is 1000.
             Defaults to 100.
+        lazy (bool, optional): If True, with `full`, an iterator that requests the pages as the entries are consumed is
+            returned instead of a list. Defaults to False.
 
     Returns:
         JSON list of dicts: Administrator list.
@@ -50,7 +52,7 @@ def get_admin_users(session: ZIAConnector, includeAuditorUsers=False, includeAdm
     params = u.clean_args(args)
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize,
-                                  message="Admin usr retrieval successful.", full=full)
+                                  message="Admin usr retrieval successful.", full=full, lazy=lazy)
 
 
 def create_admin_user(session: ZIAConnector, userinfo):
@@ -2,7 +2,6 @@
 Module for audit log report.
 """
 import requests as re
-from dateutil.parser import parse
 
 import zia_client._utils as u
 from zia_client import ZIAConnector
@@ -55,6 +54,8 @@ def req_auditlog_entry_report(session: ZIAConnector, startTime: str, endTime: st
         HTTP Response 204
 
     """
+    from dateutil.parser import parse  # Heavy, only needed here.
+
     startTime = int(parse(timestr=startTime).timestamp()) * 1000  # Converting starttime to epoch
     endTime = int(parse(timestr=endTime).timestamp()) * 1000  # Converting endtime to epoch
 
@@ -0,0 +1,255 @@
+"""
+HTTP record and replay.
+
+`RecordingTransport` wraps any other transport and writes every interaction (request, response and latency) to a
+cassette file. Credentials and secrets are redacted before anything touches the disk. `ReplayTransport` plays a
+cassette back through a `ZIAConnector`, at the recorded speed, accelerated, or with no latency at all, so the client can
+be profiled offline on real-shaped payloads.
+
+Cassettes are NDJSON files, gzip compressed when their name ends with `.gz`. The first line is a header; every other
+line is one interaction::
+
+    {"t": 0.53, "d": 0.21, "m": "GET", "u": "/api/v1/users?page=1", "b": null, "s": 200,
+     "c": "application/json", "r": "[...]"}
+
+where `t` is the offset since the recording started, `d` the latency in seconds, `m`, `u` and `b` the request method,
+URL path (without host) and body, `s` the status code, `c` the content-type and `r` the response body.
+"""
+import collections
+import gzip
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests as re
+
+from zia_client._exceptions import CassetteMissException
+from zia_client.transport import Transport, build_response
+
+CASSETTE_VERSION = 1
+
+REDACTED = 'REDACTED'
+
+DEFAULT_REDACT_KEYS = frozenset({'apiKey', 'username', 'password', 'preSharedKey', 'timestamp'})
+
+
+def _open(path, mode):
+    """Opens a cassette, compressed or not depending on its extension.
+
+    Args:
+        path (str): Cassette path.
+        mode (str): 'r' or 'w'.
+
+    Returns:
+        Text file object.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def redact(obj, keys=DEFAULT_REDACT_KEYS):
+    """Replaces the values of the given keys, at any depth, with a placeholder.
+
+    Args:
+        obj: JSON object.
+        keys: Keys whose values must be hidden.
+
+    Returns:
+        A redacted copy of the object.
+    """
+    if isinstance(obj, dict):
+        return {k: REDACTED if k in keys else redact(v, keys) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [redact(v, keys) for v in obj]
+    return obj
+
+
+def _path(url):
+    """Strips scheme and host from a URL, so cassettes can be replayed against any host, and sorts the query
+    parameters, so their order does not matter when matching.
+
+    Args:
+        url (str): Full URL.
+
+    Returns:
+        str: Path and query.
+    """
+    split = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(split.query, keep_blank_values=True)))
+    return split.path + ('?' + query if query else '')
+
+
+def _body(prep_req, keys):
+    """Decodes and redacts the body of a prepared request.
+
+    Args:
+        prep_req (requests.PreparedRequest): The request.
+        keys: Keys to redact.
+
+    Returns:
+        The redacted JSON body, the raw text if it was not JSON, or None.
+    """
+    body = prep_req.body
+    if not body:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    try:
+        return redact(json.loads(body), keys)
+    except ValueError:
+        return body
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that records the interactions of another transport into a cassette.
+    """
+
+    def __init__(self, inner: Transport, path: str, redact_keys=DEFAULT_REDACT_KEYS):
+        """
+        Args:
+            inner (Transport): The transport that actually sends the requests.
+            path (str): Cassette path. Compressed if it ends with `.gz`.
+            redact_keys (optional): JSON keys whose values are never written. Defaults to `DEFAULT_REDACT_KEYS`.
+        """
+        self.inner = inner
+        self.path = path
+        self.redact_keys = frozenset(redact_keys)
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self._f = _open(path, 'w')
+        self._write({'cassette': CASSETTE_VERSION, 'created': time.time(), 'redacted': sorted(self.redact_keys)})
+
+    def _write(self, entry):
+        with self.lock:
+            self._f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self._f.flush()
+
+    def bind(self, connector):
+        self.inner.bind(connector)
+
+    def open(self, headers: dict):
+        self.inner.open(headers)
+
+    def prepare(self, request: re.Request) -> re.PreparedRequest:
+        return self.inner.prepare(request)
+
+    def send(self, prep_req: re.PreparedRequest) -> re.Response:
+        """Sends the request through the inner transport and records the interaction.
+
+        Args:
+            prep_req (requests.PreparedRequest): Prepared request.
+
+        Returns:
+            requests.Response: The response of the inner transport.
+        """
+        sent = time.perf_counter()
+        response = self.inner.send(prep_req)
+        elapsed = time.perf_counter() - sent
+
+        content_type = response.headers.get('content-type')
+        body = response.text
+        if content_type and content_type.startswith('application/json') and body:
+            body = json.dumps(redact(response.json(), self.redact_keys), separators=(',', ':'))
+
+        self._write({'t': round(sent - self.start, 6), 'd': round(elapsed, 6), 'm': prep_req.method,
+                     'u': _path(prep_req.url), 'b': _body(prep_req, self.redact_keys), 's': response.status_code,
+                     'c': content_type, 'r': body})
+
+        return response
+
+    def close(self):
+        """
+        Closes the inner transport and the cassette file.
+        """
+        self.inner.close()
+        with self.lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers with the interactions recorded in a cassette.
+
+    Requests are matched by method, path and redacted body. Interactions with the same key are played in the recorded
+    order; once exhausted, the last one is repeated. If nothing matches exactly, the body is ignored.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        Args:
+            path (str): Cassette path.
+            speed (float, optional): Latency multiplier. 1 replays at the recorded speed, 10 ten times faster and 0
+                without any latency. Defaults to 1.
+        """
+        if speed < 0:
+            raise ValueError('speed must be greater or equal than 0.')
+
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.headers = {}
+        self.redact_keys = DEFAULT_REDACT_KEYS
+        self.exact = collections.defaultdict(collections.deque)
+        self.loose = collections.defaultdict(collections.deque)
+        self.latencies = []
+
+        with _open(path, 'r') as f:
+            header = json.loads(f.readline())
+            if header.get('cassette') != CASSETTE_VERSION:
+                raise ValueError(f'Unsupported cassette version: {header.get("cassette")}.')
+            self.redact_keys = frozenset(header.get('redacted', DEFAULT_REDACT_KEYS))
+
+            for line in f:
+                entry = json.loads(line)
+                self.exact[self._key(entry['m'], entry['u'], entry['b'])].append(entry)
+                self.loose[(entry['m'], entry['u'])].append(entry)
+                self.latencies.append(entry['d'])
+
+    @staticmethod
+    def _key(method, path, body):
+        return method, path, json.dumps(body, sort_keys=True)
+
+    @staticmethod
+    def _pop(queue):
+        """Takes the next interaction of a queue, repeating the last one when exhausted.
+        """
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def open(self, headers: dict):
+        self.headers = dict(headers)
+
+    def prepare(self, request: re.Request) -> re.PreparedRequest:
+        request.headers = {**self.headers, **(request.headers or {})}
+        return request.prepare()
+
+    def send(self, prep_req: re.PreparedRequest) -> re.Response:
+        """Finds the recorded interaction and waits its latency.
+
+        Args:
+            prep_req (requests.PreparedRequest): Prepared request.
+
+        Raises:
+            CassetteMissException: If the cassette has no interaction for the method and path.
+
+        Returns:
+            requests.Response: The recorded response.
+        """
+        path = _path(prep_req.url)
+        with self.lock:
+            exact = self.exact.get(self._key(prep_req.method, path, _body(prep_req, self.redact_keys)))
+            loose = self.loose.get((prep_req.method, path))
+            if exact:
+                entry = self._pop(exact)
+            elif loose:
+                entry = self._pop(loose)
+            else:
+                raise CassetteMissException(f'No recorded interaction for {prep_req.method} {path}.')
+
+        if self.speed:
+            time.sleep(entry['d'] / self.speed)
+
+        body = entry['r'].encode() if entry['r'] else b''
+        return build_response(prep_req, entry['s'], body, entry['c'])
@@ -7,6 +7,9 @@ import zia_client.locations as locs
 import zia_client.users as usrs
 import zia_client._utils as u
 from zia_client import ZIAConnector
+from zia_client._parallel import iter_parallel, run_parallel
+from zia_client._readers import iter_records
+from zia_client._scheduler import BULK
 
 
 def create_sublocations(session: ZIAConnector, sublocations):
@@ -46,26 +49,29 @@ def create_sublocations(session: ZIAConnector, sublocations):
         locs.create_location(session, location)
 
 
-def add_users_to_group(session: ZIAConnector, user_mails: list, group_ids: list, default_dept: int):
+def add_users_to_group(session: ZIAConnector, user_mails: list, group_ids: list, default_dept: int, workers: int = 1,
+                       progress: bool = True):
     """
     Adds users to the specified groups. Users must be passed as emails. Groups, too. For those who don't have a
     department assigned to them, which is necessary to save the changes, a default department must be given.
 
     Args:
         session (ZIAConnector): An active session.
-        user_mails: The list with the user mails.
+        user_mails: The user mails. Any iterable.
         group_ids: The list with the group ids.
         default_dept: The default department.
+        workers (int, optional): Concurrent update requests. Defaults to 1.
+        progress (bool, optional): Reports the progress of the updates on stderr. Defaults to True.
 
     Returns:
         The response obtained. JSON format or a decoded string.
 
     """
     # Retrieve full list of user jsons
-    full_user_list = usrs.get_users(session, full=True, pageSize=1000)
+    full_user_list = usrs.get_users(session, full=True)
 
     # Make sure all emails are lowercase
-    user_mails = [mail.lower() for mail in user_mails]
+    user_mails = {mail.lower() for mail in user_mails}
 
     # Filter out the ones that don't exist in the user mail list.
     filtered = list(filter(lambda usr: usr['email'].lower() in user_mails, full_user_list))
@@ -85,10 +91,11 @@ def add_users_to_group(session: ZIAConnector, user_mails: list, group_ids: list,
 
             if 'department' not in user or not user['department']:
                 user['department'] = {'id': default_dept}
-            # Update user
-            usrs.update_user(session, user)
             users.append(user)
 
+    # Update users
+    run_parallel(lambda usr: usrs.update_user(session, usr), users, workers, 'users u2g', progress, BULK)
+
     if session.verbosity:
         print(f'Total users: {len(full_user_list)}')
         print(f'Given users: {len(user_mails)}')
@@ -99,18 +106,21 @@ def add_users_to_group(session: ZIAConnector, user_mails: list, group_ids: list,
     return users
 
 
-def obtain_all_locations_sublocations(session: ZIAConnector):
+def obtain_all_locations_sublocations(session: ZIAConnector, workers: int = 1, progress: bool = True):
     """Obtains all configured locations and sublocations.
 
     Args:
         session (ZIAConnector): Logged in API client.
+        workers (int, optional): Concurrent sublocation requests. Defaults to 1.
+        progress (bool, optional): Reports the progress on stderr. Defaults to True.
 
     Returns:
         JSON dictionary: Dictionary with two keys: 'parents' and 'sublocations'. Values are list of location dicts.
     """
     parents = locs.search_locations(session, full=True)
 
-    sublocations = [locs.get_sublocations(session, parent['id']) for parent in parents]
+    sublocations = run_parallel(lambda parent: locs.get_sublocations(session, parent['id']), parents, workers,
+                                'sublocations', progress)
 
     print(f'Total: {len(parents) + len(sublocations)}')
     print(f'Locations: {len(parents)}')
@@ -119,17 +129,23 @@ def obtain_all_locations_sublocations(session: ZIAConnector):
     return {'parents': parents, 'sublocations': sublocations}
 
 
-def update_users(session: ZIAConnector, json_file):
+def update_users(session: ZIAConnector, json_file, workers: int = 1, progress: bool = True, lazy: bool = False):
     """Updates a list of users at once.
 
     Args:
         session (ZIAConnector): Logged in API client.
-        json_file: JSON file where the list of user dictionaries are stored.
+        json_file: JSON array, NDJSON or CSV file where the user dictionaries are stored. Read as the updates go out.
+        workers (int, optional): Concurrent update requests. Defaults to 1.
+        progress (bool, optional): Reports the progress on stderr. Defaults to True.
+        lazy (bool, optional): Returns an iterator that sends the updates as it is consumed instead of a list.
+            Defaults to False.
 
     Returns:
         JSON list of dictionaries: Published user data as a confirmation.
     """
-    with open(json_file) as f:
-        users = json.load(f)
+    users = iter_records(json_file, entity='users')
+
+    results = iter_parallel(lambda user: usrs.update_user(session, user), users, workers, 'users update', progress,
+                            BULK)
 
-    return [usrs.update_user(session, user) for user in users]
+    return results if lazy else list(results)
@@ -0,0 +1,272 @@
+"""
+Columnar export (CSV or Parquet) of API records.
+
+Nested records are flattened into a fixed schema per entity, so files from different runs and tenants always have the
+same columns, in the same order and with the same types::
+
+    users            id, name, email, department.id, department.name, groups.id, groups.name, ...
+    locations        id, name, parentId, ipAddresses, vpnCredentials.id, authRequired, ...
+    vpn_credentials  id, type, fqdn, ipAddress, location.id, location.name, ...
+
+Lists are joined with ';'. Pre-shared keys are never exported. Records of any other kind are exported with one column
+per top-level key of the first record, with nested values as JSON text.
+
+Rows are written in chunks while the records are consumed, so lazy retrievals are exported with constant memory.
+Parquet requires the optional pyarrow package.
+"""
+import csv
+import itertools
+import json
+
+from zia_client._utils import open_output
+
+LIST_SEPARATOR = ';'
+
+CHUNK_SIZE = 10000
+
+
+def _key(*path):
+    """Getter of a nested value.
+    """
+    def get(record):
+        for k in path:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(k)
+        return record
+
+    return get
+
+
+def _each(key, field):
+    """Getter of a field of every element of a list, joined with `LIST_SEPARATOR`.
+    """
+    def get(record):
+        values = record.get(key) or []
+        return LIST_SEPARATOR.join(str(v.get(field, '')) for v in values if isinstance(v, dict))
+
+    return get
+
+
+def _joined(key):
+    """Getter of a list of scalars joined with `LIST_SEPARATOR`.
+    """
+    def get(record):
+        return LIST_SEPARATOR.join(str(v) for v in record.get(key) or [])
+
+    return get
+
+
+def _plain(column, kind):
+    return column, kind, _key(*column.split('.'))
+
+
+def _objects(column, kind='str'):
+    """Column of a field of a list of objects, as in 'groups.id'.
+    """
+    key, field = column.split('.')
+    return column, 'list:' + kind, _each(key, field)
+
+
+def _scalars(column, kind='str'):
+    """Column of a list of scalars, as in 'ipAddresses'.
+    """
+    return column, 'list:' + kind, _joined(column)
+
+
+# Column name, type ('int', 'float', 'bool', 'str' or 'list:<type of the elements>') and getter. Lists are exported as
+# text.
+SCHEMAS = {
+    'users': [
+        _plain('id', 'int'),
+        _plain('name', 'str'),
+        _plain('email', 'str'),
+        _plain('department.id', 'int'),
+        _plain('department.name', 'str'),
+        _objects('groups.id', 'int'),
+        _objects('groups.name'),
+        _plain('comments', 'str'),
+        _plain('tempAuthEmail', 'str'),
+        _plain('adminUser', 'bool'),
+        _plain('type', 'str'),
+        _plain('deleted', 'bool'),
+    ],
+    'locations': [
+        _plain('id', 'int'),
+        _plain('name', 'str'),
+        _plain('parentId', 'int'),
+        _scalars('ipAddresses'),
+        _scalars('ports', 'int'),
+        _objects('vpnCredentials.id', 'int'),
+        _plain('authRequired', 'bool'),
+        _plain('sslScanEnabled', 'bool'),
+        _plain('xffForwardEnabled', 'bool'),
+        _plain('surrogateIP', 'bool'),
+        _plain('ofwEnabled', 'bool'),
+        _plain('ipsControl', 'bool'),
+        _plain('aupEnabled', 'bool'),
+        _plain('cautionEnabled', 'bool'),
+        _plain('upBandwidth', 'int'),
+        _plain('dnBandwidth', 'int'),
+        _plain('country', 'str'),
+        _plain('tz', 'str'),
+        _plain('profile', 'str'),
+        _plain('description', 'str'),
+    ],
+    'vpn_credentials': [
+        _plain('id', 'int'),
+        _plain('type', 'str'),
+        _plain('fqdn', 'str'),
+        _plain('ipAddress', 'str'),
+        _plain('comments', 'str'),
+        _plain('location.id', 'int'),
+        _plain('location.name', 'str'),
+        _plain('managedBy.id', 'int'),
+        _plain('managedBy.name', 'str'),
+    ],
+}
+
+
+def _records(obj):
+    """Iterates the records of a result. `locations all` results (parents and per-parent sublocation lists) are
+    flattened into a single sequence.
+    """
+    if isinstance(obj, dict) and 'parents' in obj and 'sublocations' in obj:
+        subs = (s if isinstance(s, list) else [s] for s in obj['sublocations'])
+        return itertools.chain(obj['parents'], itertools.chain.from_iterable(subs))
+    if isinstance(obj, dict):
+        return iter([obj])
+    return iter(obj)
+
+
+def _generic_schema(record):
+    """Schema of records without a known entity: one text column per top-level key.
+    """
+    def get(k):
+        def value(r):
+            v = r.get(k)
+            return v if v is None or isinstance(v, str) else json.dumps(v)
+        return value
+
+    return [(k, 'str', get(k)) for k in record] if isinstance(record, dict) else [('value', 'str', json.dumps)]
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export(obj, path, fmt='csv', entity=None, compression=None, chunk_size=CHUNK_SIZE):
+    """Writes records to a CSV or Parquet file.
+
+    Args:
+        obj: List or iterator of records. `locations all` results are also accepted.
+        path (str): The path to the newly created file.
+        fmt (str, optional): 'csv' or 'parquet'. Defaults to 'csv'.
+        entity (str, optional): Key of `SCHEMAS`. Defaults to a schema made from the first record.
+        compression (str, optional): 'gzip' or 'zstd'. For CSV, defaults to the one of the file extension, if any. For
+            Parquet, defaults to snappy.
+        chunk_size (int, optional): Rows written at once. Defaults to `CHUNK_SIZE`.
+
+    Returns:
+        int: Number of rows written.
+    """
+    records = _records(obj)
+
+    if entity:
+        schema = SCHEMAS[entity]
+    else:
+        first = next(records, None)
+        if first is None:
+            schema = []
+        else:
+            schema = _generic_schema(first)
+            records = itertools.chain([first], records)
+
+    rows = ([get(r) for _, _, get in schema] for r in records)
+
+    if fmt == 'csv':
+        return _write_csv(rows, path, schema, compression, chunk_size)
+    elif fmt == 'parquet':
+        return _write_parquet(rows, path, schema, compression, chunk_size)
+
+    raise ValueError(f'Unknown columnar format: {fmt}.')
+
+
+def _write_csv(rows, path, schema, compression, chunk_size):
+    count = 0
+    with open_output(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow([column for column, _, _ in schema])
+        for chunk in _chunks(rows, chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+            f.flush()
+    return count
+
+
+def _write_parquet(rows, path, schema, compression, chunk_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Parquet export requires the pyarrow package.')
+
+    types = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'str': pa.string()}
+    arrow_schema = pa.schema([(column, types.get(kind, pa.string())) for column, kind, _ in schema])
+
+    count = 0
+    with pq.ParquetWriter(path, arrow_schema, compression=compression or 'snappy') as writer:
+        for chunk in _chunks(rows, chunk_size):
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), arrow_schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=arrow_schema))
+            count += len(chunk)
+    return count
+
+
+_CONVERTERS = {'int': int, 'float': float, 'bool': lambda v: v.lower() == 'true', 'str': str}
+
+
+def record_from_row(row, entity=None):
+    """Rebuilds a record from a CSV row, reversing the flattening of `export`.
+
+    Args:
+        row (dict): Column name to text value.
+        entity (str, optional): Key of `SCHEMAS`. Its columns are converted to their type and its list columns split.
+            Other values are kept as text.
+
+    Returns:
+        dict: The record. Empty values are left out.
+    """
+    kinds = {column: kind for column, kind, _ in SCHEMAS.get(entity, [])}
+    record = {}
+
+    for column, value in row.items():
+        if value is None or value == '':
+            continue
+
+        kind = kinds.get(column, 'str')
+        path = column.split('.')
+
+        if kind.startswith('list:'):
+            convert = _CONVERTERS[kind[5:]]
+            values = [convert(v) for v in value.split(LIST_SEPARATOR)]
+            if len(path) == 1:
+                record[column] = values
+            else:
+                # List of objects: the n-th value goes to the n-th object
+                objects = record.setdefault(path[0], [])
+                objects += [{} for _ in range(len(values) - len(objects))]
+                for obj, v in zip(objects, values):
+                    obj[path[1]] = v
+            continue
+
+        target = record
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = _CONVERTERS[kind](value)
+
+    return record
@@ -0,0 +1,537 @@
+"""
+In-process fake of the ZIA API.
+
+`FakeTenant` is an in-memory model of a tenant: users, groups, departments, locations and sublocations, VPN
+credentials, admin users and roles, and the audit log report. `FakeTransport` is a `Transport` that answers the
+requests of a `ZIAConnector` from a `FakeTenant` without opening any socket, so benchmarks and tests can measure the
+client-side overhead (argument cleaning, URL building, request preparation, decoding) isolated from network noise.
+
+Example::
+
+    tenant = FakeTenant.from_dir('synthetic_tenant')  # Output of zia_client.synthetic.generate_tenant
+    client = ZIAConnector('config/config.json', creds=creds, transport=FakeTransport(tenant))
+    client.login()
+    users = zia_client.users.get_users(client, full=True, pageSize=1000)
+"""
+import json
+import os
+import re as regex
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import requests as re
+
+from zia_client.transport import Transport, build_response
+
+
+def _load(path):
+    """Loads a JSON file if it exists.
+
+    Args:
+        path (str): File path.
+
+    Returns:
+        list: The loaded array. Empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def _to_bool(value):
+    """Converts a query string value into a boolean.
+
+    Args:
+        value (str): Query string value.
+
+    Returns:
+        bool: True for 'true' in any case.
+    """
+    return str(value).lower() == 'true'
+
+
+class FakeTenant:
+    """
+    In-memory model of a ZIA tenant. Thread-safe.
+    """
+
+    def __init__(self, users=(), groups=(), departments=(), locations=(), sublocations=(), vpn_credentials=(),
+                 admin_users=(), admin_roles=(), audit_report=''):
+        """
+        Args:
+            users: User dicts.
+            groups: Group dicts.
+            departments: Department dicts.
+            locations: Parent location dicts.
+            sublocations: Sublocation dicts. They must contain their `parentId`.
+            vpn_credentials: VPN credential dicts.
+            admin_users: Admin user dicts.
+            admin_roles: Admin role dicts.
+            audit_report (str): CSV content returned when downloading the audit log report.
+        """
+        self.lock = threading.RLock()
+        self.tables = {
+            'users': {u['id']: u for u in users},
+            'groups': {g['id']: g for g in groups},
+            'departments': {d['id']: d for d in departments},
+            'locations': {loc['id']: loc for loc in list(locations) + list(sublocations)},
+            'vpn_credentials': {c['id']: c for c in vpn_credentials},
+            'admin_users': {a['id']: a for a in admin_users},
+        }
+        self.admin_roles = list(admin_roles)
+        self.audit_report = audit_report
+        self.audit_status = 'IDLE'
+        self.pending_changes = False
+        self._views = {}
+        self._next_id = max([max(t, default=0) for t in self.tables.values()], default=0) + 1
+
+    @classmethod
+    def from_dir(cls, path):
+        """Loads the tenant written by `zia_client.synthetic.generate_tenant`.
+
+        Args:
+            path (str): Directory with the generated files.
+
+        Returns:
+            FakeTenant: The loaded tenant.
+        """
+        audit = os.path.join(path, 'auditlog.csv')
+        audit_report = ''
+        if os.path.exists(audit):
+            with open(audit) as f:
+                audit_report = f.read()
+
+        return cls(users=_load(os.path.join(path, 'users.json')),
+                   groups=_load(os.path.join(path, 'groups.json')),
+                   departments=_load(os.path.join(path, 'departments.json')),
+                   locations=_load(os.path.join(path, 'locations.json')),
+                   sublocations=_load(os.path.join(path, 'sublocations.json')),
+                   vpn_credentials=_load(os.path.join(path, 'vpn_credentials.json')),
+                   admin_users=_load(os.path.join(path, 'admin_users.json')),
+                   admin_roles=_load(os.path.join(path, 'admin_roles.json')),
+                   audit_report=audit_report)
+
+    def new_id(self):
+        """Returns a new unique identifier.
+
+        Returns:
+            int: Identifier.
+        """
+        with self.lock:
+            new = self._next_id
+            self._next_id += 1
+            return new
+
+    def view(self, table, key, predicate):
+        """Returns the filtered list of a table. Filtered lists are cached until the table changes, so paginating
+        over them does not cost O(n) per page.
+
+        Args:
+            table (str): Table name.
+            key: Hashable description of the filter.
+            predicate: Function that decides whether a record belongs to the view.
+
+        Returns:
+            list: Records in insertion order.
+        """
+        with self.lock:
+            cache_key = (table, key)
+            if cache_key not in self._views:
+                self._views[cache_key] = [r for r in self.tables[table].values() if predicate(r)]
+            return self._views[cache_key]
+
+    def put(self, table, record):
+        """Inserts or replaces a record. Marks the changes as pending activation.
+
+        Args:
+            table (str): Table name.
+            record (dict): The record. Must contain its `id`.
+        """
+        with self.lock:
+            self.tables[table][record['id']] = record
+            self._touch(table)
+
+    def delete(self, table, ids):
+        """Deletes records.
+
+        Args:
+            table (str): Table name.
+            ids: Identifiers.
+
+        Returns:
+            list: Identifiers that were actually deleted.
+        """
+        with self.lock:
+            deleted = [i for i in ids if self.tables[table].pop(i, None) is not None]
+            if deleted:
+                self._touch(table)
+            return deleted
+
+    def _touch(self, table):
+        """Drops the cached views of a table.
+
+        Args:
+            table (str): Table name.
+        """
+        self._views = {k: v for k, v in self._views.items() if k[0] != table}
+        self.pending_changes = True
+
+
+def _page(records, params):
+    """Applies ZIA pagination. Pages past the end are empty.
+
+    Args:
+        records (list): Records.
+        params (dict): Query parameters.
+
+    Returns:
+        list: Records of the requested page.
+    """
+    page = int(params.get('page', 1))
+    size = int(params.get('pageSize', 100))
+    return records[(page - 1) * size:page * size]
+
+
+def _error(status, code, message):
+    return status, {'code': code, 'message': message}
+
+
+class FakeTransport(Transport):
+    """
+    Transport that answers from a `FakeTenant` in the same process, without sockets.
+    """
+
+    def __init__(self, tenant: FakeTenant = None, urls: dict = None, latency: float = 0):
+        """
+        Args:
+            tenant (FakeTenant, optional): The tenant. Defaults to an empty one.
+            urls (dict, optional): URL map. Defaults to the one of the connector this transport gets bound to.
+            latency (float, optional): Seconds every request sleeps to simulate the network. Defaults to 0.
+        """
+        self.tenant = tenant if tenant is not None else FakeTenant()
+        self.latency = latency
+        self.headers = {}
+        self.authenticated = False
+        self.routes = []
+        if urls:
+            self._build_routes(urls)
+
+    def bind(self, connector):
+        """Takes the URL map of the connector if none was given.
+
+        Args:
+            connector (ZIAConnector): The connector.
+        """
+        if not self.routes:
+            self._build_routes(connector.urls)
+
+    def _build_routes(self, urls):
+        """Compiles the URL templates of urls.json into path patterns. Literal paths are tried first.
+
+        Args:
+            urls (dict): URL map.
+        """
+        flat = []
+        for key1, value in urls.items():
+            if isinstance(value, dict):
+                flat += [(f'{key1}.{key2}', template) for key2, template in value.items()]
+            else:
+                flat.append((key1, value))
+
+        flat.sort(key=lambda kv: '{' in kv[1])
+
+        self.routes = [(regex.compile(regex.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', regex.escape(template)) + '$'), key)
+                       for key, template in flat]
+
+    def open(self, headers: dict):
+        """Stores the session headers.
+
+        Args:
+            headers (dict): Session headers.
+        """
+        self.headers = dict(headers)
+
+    def prepare(self, request: re.Request) -> re.PreparedRequest:
+        """Prepares the request without any session.
+
+        Args:
+            request (requests.Request): Request to prepare.
+
+        Returns:
+            requests.PreparedRequest: Prepared request.
+        """
+        request.headers = {**self.headers, **(request.headers or {})}
+        return request.prepare()
+
+    def send(self, prep_req: re.PreparedRequest) -> re.Response:
+        """Routes the request to the tenant and builds the response.
+
+        Args:
+            prep_req (requests.PreparedRequest): Prepared request.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        split = urlsplit(prep_req.url)
+        params = {k: v[-1] if len(v) == 1 else v for k, v in parse_qs(split.query).items()}
+        body = json.loads(prep_req.body) if prep_req.body else None
+
+        for pattern, key in self.routes:
+            match = pattern.search(split.path)
+            if match:
+                status, content = self.handle(key, prep_req.method, match.groupdict(), params, body)
+                break
+        else:
+            status, content = _error(404, 'RESOURCE_NOT_FOUND', f'No route for {split.path}.')
+
+        return self._response(prep_req, status, content)
+
+    @staticmethod
+    def _response(prep_req, status, content):
+        """Builds a `requests.Response`.
+
+        Args:
+            prep_req (requests.PreparedRequest): The request answered.
+            status (int): Status code.
+            content: JSON serializable body, `str` for text bodies or None for no body.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if content is None:
+            return build_response(prep_req, status)
+        if isinstance(content, str):
+            return build_response(prep_req, status, content.encode(), 'text/csv')
+        return build_response(prep_req, status, json.dumps(content).encode(), 'application/json')
+
+    def handle(self, key, method, path_args, params, body):
+        """Dispatches the request to the handler of the endpoint.
+
+        Args:
+            key (str): Endpoint key in urls.json, as in 'usr.main'.
+            method (str): HTTP method.
+            path_args (dict): Arguments of the URL template.
+            params (dict): Query parameters.
+            body: Decoded JSON body.
+
+        Returns:
+            tuple: Status code and content.
+        """
+        if key == 'auth':
+            return self._auth(method, body)
+
+        if not self.authenticated:
+            return _error(401, 'NOT_AUTHENTICATED', 'Authentication required.')
+
+        handler = getattr(self, '_' + key.replace('.', '_'), None)
+        if handler is None:
+            return _error(404, 'RESOURCE_NOT_FOUND', f'Endpoint {key} is not modelled.')
+
+        return handler(method, path_args, params, body)
+
+    # ------------------------------------------------------------------------------------------------ Handlers
+
+    def _auth(self, method, body):
+        if method == 'POST':
+            if not body or not all(body.get(k) for k in ('apiKey', 'username', 'password', 'timestamp')):
+                return _error(401, 'AUTHENTICATION_FAILED', 'Invalid credentials.')
+            self.authenticated = True
+            return 200, {'authType': 'ADMIN_LOGIN', 'obfuscateApiKey': False, 'passwordExpiryTime': 0,
+                         'passwordExpiryDays': 0}
+        if method == 'DELETE':
+            self.authenticated = False
+            return 204, None
+        return 200, {'authType': 'ADMIN_LOGIN'}
+
+    def _activation_main(self, method, path_args, params, body):
+        return 200, {'status': 'PENDING' if self.tenant.pending_changes else 'ACTIVE'}
+
+    def _activation_act(self, method, path_args, params, body):
+        self.tenant.pending_changes = False
+        return 200, {'status': 'ACTIVE'}
+
+    def _collection(self, table, method, params, body, predicate=None, filter_key=None, required=('name',)):
+        """Generic GET (paginated) and POST on a collection.
+        """
+        if method == 'GET':
+            records = self.tenant.view(table, filter_key, predicate or (lambda r: True))
+            return 200, _page(records, params)
+        if method == 'POST':
+            missing = [k for k in required if not (body or {}).get(k)]
+            if missing:
+                return _error(400, 'INVALID_INPUT_ARGUMENT', f'Missing attributes: {missing}.')
+            record = {**body, 'id': self.tenant.new_id()}
+            self.tenant.put(table, record)
+            return 200, record
+        return _error(405, 'METHOD_NOT_ALLOWED', f'{method} not allowed.')
+
+    def _item(self, table, method, item_id, body):
+        """Generic GET, PUT and DELETE on a single record.
+        """
+        item_id = int(item_id)
+        record = self.tenant.tables[table].get(item_id)
+        if record is None:
+            return _error(404, 'RESOURCE_NOT_FOUND', f'Resource {item_id} not found.')
+        if method == 'GET':
+            return 200, record
+        if method == 'PUT':
+            updated = {**record, **(body or {}), 'id': item_id}
+            self.tenant.put(table, updated)
+            return 200, updated
+        if method == 'DELETE':
+            self.tenant.delete(table, [item_id])
+            return 204, None
+        return _error(405, 'METHOD_NOT_ALLOWED', f'{method} not allowed.')
+
+    def _bulk(self, table, body, limit):
+        ids = (body or {}).get('ids', [])
+        if len(ids) > limit:
+            return _error(400, 'INVALID_INPUT_ARGUMENT', f'At most {limit} ids per request.')
+        return 200, {'ids': self.tenant.delete(table, ids)}
+
+    @staticmethod
+    def _search(params, *attrs):
+        """Builds the filter of the `search` parameter: partial, case insensitive match against `attrs`.
+        """
+        search = str(params.get('search', '')).lower()
+        return search, lambda r: not search or any(search in str(r.get(a, '')).lower() for a in attrs)
+
+    def _usr_main(self, method, path_args, params, body):
+        name = str(params.get('name', '')).lower()
+        dept = str(params.get('dept', '')).lower()
+        group = str(params.get('group', '')).lower()
+
+        def predicate(u):
+            return ((not name or name in u.get('name', '').lower())
+                    and (not dept or (u.get('department') or {}).get('name', '').lower().startswith(dept))
+                    and (not group or any(g.get('name', '').lower().startswith(group) for g in u.get('groups', []))))
+
+        return self._collection('users', method, params, body, predicate, (name, dept, group),
+                                required=('name', 'email'))
+
+    def _usr_usr(self, method, path_args, params, body):
+        if method == 'PUT' and body and 'email' in body:
+            current = self.tenant.tables['users'].get(int(path_args['userId']))
+            if current and current.get('email') != body['email']:
+                return _error(400, 'INVALID_INPUT_ARGUMENT', 'The email attribute is read-only.')
+        return self._item('users', method, path_args['userId'], body)
+
+    def _usr_bulk(self, method, path_args, params, body):
+        return self._bulk('users', body, 500)
+
+    def _usr_depts(self, method, path_args, params, body):
+        search, predicate = self._search(params, 'name')
+        return self._collection('departments', method, params, body, predicate, search)
+
+    def _usr_dept(self, method, path_args, params, body):
+        return self._item('departments', method, path_args['id'], body)
+
+    def _usr_groups(self, method, path_args, params, body):
+        search, predicate = self._search(params, 'name', 'comments')
+        return self._collection('groups', method, params, body, predicate, search)
+
+    def _usr_group(self, method, path_args, params, body):
+        return self._item('groups', method, path_args['groupId'], body)
+
+    @staticmethod
+    def _location_filters(params):
+        """Builds the filter of the boolean location parameters.
+        """
+        flags = {attr: _to_bool(params[p]) for p, attr in (('sslScanEnabled', 'sslScanEnabled'),
+                                                           ('xffEnabled', 'xffForwardEnabled'),
+                                                           ('authRequired', 'authRequired'),
+                                                           ('bwEnforced', 'bwEnforced'),
+                                                           ('enforceAup', 'aupEnabled'),
+                                                           ('enableFirewall', 'ofwEnabled')) if p in params}
+        return tuple(sorted(flags.items())), lambda r: all(bool(r.get(a)) == v for a, v in flags.items())
+
+    def _locs_main(self, method, path_args, params, body):
+        search, match = self._search(params, 'name', 'ports')
+        flags, flag_match = self._location_filters(params)
+        return self._collection('locations', method, params, body,
+                                lambda r: not r.get('parentId') and match(r) and flag_match(r), (search, flags))
+
+    def _locs_lite(self, method, path_args, params, body):
+        search, match = self._search(params, 'name')
+        flags, flag_match = self._location_filters(params)
+        subs = _to_bool(params.get('includeSubLocations', False))
+
+        def predicate(r):
+            return (subs or not r.get('parentId')) and match(r) and flag_match(r)
+
+        records = self.tenant.view('locations', ('lite', search, flags, subs), predicate)
+        return 200, [{'id': r['id'], 'name': r['name'], 'parentId': r.get('parentId', 0)} for r in
+                     _page(records, params)]
+
+    def _locs_info(self, method, path_args, params, body):
+        return self._item('locations', method, path_args['locationId'], body)
+
+    def _locs_subs(self, method, path_args, params, body):
+        parent = int(path_args['locationId'])
+        search, match = self._search(params, 'name')
+        flags, flag_match = self._location_filters(params)
+        return 200, self.tenant.view('locations', ('subs', parent, search, flags),
+                                     lambda r: r.get('parentId') == parent and match(r) and flag_match(r))
+
+    def _locs_bulk(self, method, path_args, params, body):
+        return self._bulk('locations', body, 100)
+
+    def _traffic_main(self, method, path_args, params, body):
+        search, match = self._search(params, 'fqdn', 'ipAddress', 'comments')
+        cred_type = params.get('type')
+        loc_id = params.get('locationId')
+
+        def predicate(c):
+            return (match(c) and (not cred_type or c.get('type') == cred_type)
+                    and (not loc_id or str((c.get('location') or {}).get('id')) == str(loc_id)))
+
+        return self._collection('vpn_credentials', method, params, body, predicate, (search, cred_type, loc_id),
+                                required=('type',))
+
+    def _traffic_id(self, method, path_args, params, body):
+        return self._item('vpn_credentials', method, path_args['vpnId'], body)
+
+    def _traffic_bulk(self, method, path_args, params, body):
+        return self._bulk('vpn_credentials', body, 100)
+
+    def _traffic_vips(self, method, path_args, params, body):
+        vips = [{'cloudName': 'zscloud.net', 'region': 'EMEA', 'city': 'Madrid', 'dataCenter': 'MAD1',
+                 'location': 'Madrid', 'vpnIps': ['165.225.92.1'], 'vpnDomainName': 'mad1-vpn.zscloud.net',
+                 'greIps': ['165.225.92.2'], 'greDomainName': 'mad1-gre.zscloud.net', 'pacIps': ['165.225.92.3'],
+                 'pacDomainName': 'mad1-pac.zscloud.net'}]
+        return 200, _page(vips, params)
+
+    def _traffic_gre(self, method, path_args, params, body):
+        ips = params.get('ipAddresses', [])
+        ips = ips if isinstance(ips, list) else [ips]
+        return 200, [{'ipAddress': ip, 'greEnabled': False, 'greTunnelIP': '', 'primaryGW': '', 'secondaryGW': '',
+                      'tunID': 0, 'greRangePrimary': '', 'greRangeSecondary': ''} for ip in ips]
+
+    def _admin_role_role(self, method, path_args, params, body):
+        return 200, self.admin_roles
+
+    def _admin_role_main(self, method, path_args, params, body):
+        search, predicate = self._search(params, 'loginName', 'userName')
+        return self._collection('admin_users', method, params, body, predicate, search, required=('loginName',))
+
+    def _admin_role_user(self, method, path_args, params, body):
+        if method == 'POST':
+            return self._collection('admin_users', method, params, body, required=('loginName',))
+        return self._item('admin_users', method, path_args['userId'], body)
+
+    def _audit_main(self, method, path_args, params, body):
+        if method == 'POST':
+            self.tenant.audit_status = 'COMPLETE'
+            return 204, None
+        if method == 'DELETE':
+            self.tenant.audit_status = 'IDLE'
+            return 200, None
+        return 200, {'status': self.tenant.audit_status, 'progressItemsComplete': 0, 'progressEndTime': 0}
+
+    def _audit_dwl(self, method, path_args, params, body):
+        return 200, self.tenant.audit_report
@@ -1,7 +1,6 @@
 """
 Module for location management.
 """
-import time
 from typing import List
 
 import requests as re
@@ -10,27 +9,30 @@ import zia_client._utils as u
 from zia_client import ZIAConnector
 
 
-def create_location(session: ZIAConnector, location):
+def create_location(session: ZIAConnector, location, priority: str = None):
     """Creates the location.
 
     Args:
         session (ZIAConnector): Logged in API client.
         location (String): A dictionary representing the location. See example.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
     """
 
     url = session.get_url('locs', 'main')
 
     req = re.Request('POST', url, json=location)
 
-    return session.send_recv(req, successful_msg=f'Location {location["name"]} was successfully added.')
+    return session.send_recv(req, successful_msg=f'Location {location["name"]} was successfully added.',
+                             priority=priority)
 
 
-def update_location(session: ZIAConnector, location):
+def update_location(session: ZIAConnector, location, priority: str = None):
     """Updates an existing location.
 
     Args:
         session (ZIAConnector): Logged in API client.
         location (dict): The location information in dict format.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
     """
 
     # Check if the _locations data contains it's id.
@@ -39,18 +41,22 @@ def update_location(session: ZIAConnector, location):
 
     url = session.get_url('locs', 'info', locationId=location["id"])
 
-    time.sleep(0.5)
+    # The endpoint registry sets the pace of the endpoint, if it knows it
+    if session.endpoints.get('locs', 'info').rate_limit('PUT') is None:
+        session.throttle('locs_put', 2, priority=priority)
     r = re.Request('PUT', url, json=location)
 
-    return session.send_recv(r, successful_msg=f'Location {location["id"]} was successfully updated.')
+    return session.send_recv(r, successful_msg=f'Location {location["id"]} was successfully updated.',
+                             priority=priority)
 
 
-def delete_location(session: ZIAConnector, loc_id: int):
+def delete_location(session: ZIAConnector, loc_id: int, priority: str = None):
     """Deletes location given its id.
 
     Args:
         session (ZIAConnector): Logged in API client.
         loc_id (int): Location identifier.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Raises:
         Exception: If delete is unsuccessful, then it raises an exception.
@@ -59,11 +65,11 @@ def delete_location(session: ZIAConnector, loc_id: int):
 
     r = re.Request('DELETE', url)
 
-    return session.send_recv(r, successful_msg=f'Location {loc_id} deleted successfully')
+    return session.send_recv(r, successful_msg=f'Location {loc_id} deleted successfully', priority=priority)
 
 
 def search_locations(session: ZIAConnector, search="", sslScanEnabled=None, xffEnabled=None, authRequired=None,
-                     bwEnforced=None, page=None, pageSize=None, full=False):
+                     bwEnforced=None, page=None, pageSize=None, full=False, lazy=False, priority: str = None):
     """Retrieves all the locations, not sub-locations that match the search.
     Could be IP address or name.
 
@@ -82,7 +88,10 @@ def search_locations(session: ZIAConnector, search="", sslScanEnabled=None, xffE
             Defaults to None.
         page (int, optional): Specifies the page offset. Defaults to 1.
         pageSize (int, optional): Specifies the page size. The default size is 100, but the maximum size is 1000.
-            Defaults to 100.
+            Defaults to 100, or to the maximum with `full`.
+        lazy (bool, optional): If True, with `full`, an iterator that requests the pages as the entries are consumed is
+            returned instead of a list. Defaults to False.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
     """
     # Use directly args of this function as parameters on the request, but they need to be cleaned first.
     params = u.clean_args(locals())
@@ -91,13 +100,13 @@ def search_locations(session: ZIAConnector, search="", sslScanEnabled=None, xffE
 
     # Key all is not recognized by the API, therefore can be removed
 
-    return session.full_retrieval('GET', url, params=params, page_size=1000, message="Location search successful.",
-                                  full=full)
+    return session.full_retrieval('GET', url, params=params, page_size=pageSize, message="Location search successful.",
+                                  full=full, lazy=lazy, priority=priority)
 
 
 def get_location_ids(session: ZIAConnector, includeSubLocations=None, includeParentLocations=None, authRequired=None,
                      bwEnforced=None, sslScanEnabled=None, xffEnabled=None, search="", page=None, pageSize=None,
-                     full=False):
+                     full=False, lazy=False, priority: str = None):
     """
     Gets a name and ID dictionary of locations.
 
@@ -130,6 +139,10 @@ def get_location_ids(session: ZIAConnector, includeSubLocations=None, includePar
         pageSize (int, optional): Specifies the page size. The default size is 100, but the maximum size is 1000. \
         Defaults to 100.
 
+        lazy (bool, optional): If True, with `full`, an iterator that requests the pages as the entries are consumed is
+            returned instead of a list. Defaults to False.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
+
     Raises:
         Exception: There was some error in the retrieval.
 
@@ -145,15 +158,16 @@ def get_location_ids(session: ZIAConnector, includeSubLocations=None, includePar
     url = session.get_url('locs', 'lite')
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize,
-                                  message="Location ids retrieval successful.", full=full)
+                                  message="Location ids retrieval successful.", full=full, lazy=lazy, priority=priority)
 
 
-def get_location_info(session: ZIAConnector, loc_id):
+def get_location_info(session: ZIAConnector, loc_id, priority: str = None):
     """Returns all the information of the desired location.
 
     Args:
         session (ZIAConnector): Logged in API client.
         loc_id (int): Location identifier
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         dict: A dict containing all the information. If no success, dict is empty.
@@ -161,13 +175,15 @@ def get_location_info(session: ZIAConnector, loc_id):
     url = session.get_url('locs', 'info', locationId=loc_id)
 
     r = re.Request('GET', url)
-    time.sleep(1)
+    # The endpoint registry sets the pace of the endpoint, if it knows it
+    if session.endpoints.get('locs', 'info').rate_limit('GET') is None:
+        session.throttle('locs_get', 1, priority=priority)
 
-    return session.send_recv(r, f'Location info for {loc_id} has been successfully retrieved.')
+    return session.send_recv(r, f'Location info for {loc_id} has been successfully retrieved.', priority=priority)
 
 
 def get_sublocations(session: ZIAConnector, locationId, search="", sslScanEnabled=None, xffEnabled=None,
-                     authRequired=None, bwEnforced=None, enforceAup=None, enableFirewall=None):
+                     authRequired=None, bwEnforced=None, enforceAup=None, enableFirewall=None, priority: str = None):
     """
     Gets the sub-location information for the location with the specified ID. These are the sub-locations associated
     to the parent location.
@@ -188,6 +204,7 @@ def get_sublocations(session: ZIAConnector, locationId, search="", sslScanEnable
             Defaults to None.
         enforceAup: Filter based on whether Enforce AUP setting is enabled or disabled for a sub-location.
         enableFirewall: Filter based on whether Enable Firewall setting is enabled or disabled for a sub-location.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         A list of dictionaries.
@@ -200,10 +217,11 @@ def get_sublocations(session: ZIAConnector, locationId, search="", sslScanEnable
     params = u.clean_args(args)
 
     return session.full_retrieval('GET', url, params=params, page_size=0,
-                                  message=f"Sublocations for {locationId} obtained successfully.", full=False)
+                                  message=f"Sublocations for {locationId} obtained successfully.", full=False,
+                                  priority=priority)
 
 
-def bulk_del_location(session: ZIAConnector, loc_ids: List):
+def bulk_del_location(session: ZIAConnector, loc_ids: List, priority: str = None):
     """Bulk delete locations up to a maximum of 100 locations per request.
 
     Bulk delete locations up to a maximum of 100 users per request.
@@ -212,6 +230,7 @@ def bulk_del_location(session: ZIAConnector, loc_ids: List):
     Args:
         session (ZIAConnector): Logged in session.
         loc_ids: List of location ids.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON Dict response.
@@ -225,4 +244,4 @@ def bulk_del_location(session: ZIAConnector, loc_ids: List):
 
     req = re.Request('POST', url, json=data)
 
-    return session.send_recv(req, "Bulk delete of locations done.")
+    return session.send_recv(req, "Bulk delete of locations done.", priority=priority)
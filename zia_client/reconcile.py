@@ -0,0 +1,298 @@
+"""
+Desired-state reconciliation of users, their group membership, locations and sublocations.
+
+A desired-state file declares how the tenant should look::
+
+    {
+        "users": [
+            {"email": "jdoe@example.com", "name": "John Doe", "department": "Sales", "groups": ["VPN", "Sales"]}
+        ],
+        "locations": [
+            {"name": "Madrid", "ipAddresses": ["203.0.113.10"],
+             "sublocations": [{"name": "Guests", "ipAddresses": ["10.1.0.0-10.1.255.255"]}]}
+        ]
+    }
+
+Records are matched with the server ones by their natural key: the email for users (case-insensitive), the name for
+locations and the parent and name for sublocations. Departments and groups may be given by name, or as objects with
+id. Records are partial, as in `zia_client.upsert`: fields left out keep their server value, empty fields clear it and
+records with a write-only field, as a password, are always updated.
+
+`plan` compares both states with dictionaries indexed by key, so the cost grows linearly with the number of records,
+and returns the creates and updates needed. With `prune`, server records missing from the file are deleted too, but
+only for the kinds the file declares: a file without "locations" leaves locations alone, and the sublocations of a
+location are only managed if it has a "sublocations" list. `apply` runs a plan.
+"""
+import itertools
+
+import zia_client.locations as locs
+import zia_client.users as usrs
+from zia_client import ZIAConnector
+from zia_client._parallel import iter_parallel, run_parallel
+from zia_client._scheduler import BULK
+from zia_client.upsert import changed_fields, field_hashes, write_only_fields
+
+# Kinds in the order their creates and updates are applied. Deletes go in the reverse order.
+KINDS = ('locations', 'sublocations', 'users')
+
+# Bulk delete endpoint of every kind, whose bulk_limit in the endpoint registry is the size of the requests
+BULK_ENDPOINTS = {'users': ('usr', 'bulk'), 'sublocations': ('locs', 'bulk'), 'locations': ('locs', 'bulk')}
+
+# Maximum ids of the bulk delete requests, if the registry does not tell
+BULK_LIMITS = {'users': 500, 'sublocations': 100, 'locations': 100}
+
+
+def _user_key(user):
+    return user['email'].lower()
+
+
+def _sub_key(parent, name):
+    return f'{parent}/{name}'
+
+
+def _index(records, key, kind):
+    index = {}
+    for record in records:
+        k = key(record)
+        if k in index:
+            raise ValueError(f'Duplicated {kind} in the desired state: {k}.')
+        index[k] = record
+    return index
+
+
+def _by_name(session, func):
+    return {record['name']: record for record in func(session, full=True, lazy=True)}
+
+
+def _reference(value, index, kind, owner):
+    """Resolves a department or group given by name to its {'id', 'name'} object.
+    """
+    if isinstance(value, dict):
+        return value
+    try:
+        record = index[value]
+    except KeyError:
+        raise ValueError(f'Unknown {kind} {value!r} in {owner}.') from None
+    return {'id': record['id'], 'name': record['name']}
+
+
+def fetch_state(session: ZIAConnector, desired: dict, workers: int = 4):
+    """Retrieves the server state the desired state refers to. The lists are requested concurrently.
+
+    Args:
+        session (ZIAConnector): Logged in API client.
+        desired (dict): Desired state.
+        workers (int, optional): Concurrent requests. Defaults to 4.
+
+    Returns:
+        dict: 'users' by lowercase email, 'locations' by name, 'sublocations' by 'parent/name', and 'groups' and
+        'departments' by name. Kinds the desired state does not need are left out.
+    """
+    fetchers = {}
+    if 'users' in desired:
+        fetchers['users'] = lambda: {_user_key(u): u for u in usrs.get_users(session, full=True, lazy=True)}
+        fetchers['groups'] = lambda: _by_name(session, usrs.get_groups)
+        fetchers['departments'] = lambda: _by_name(session, usrs.get_departments)
+    if 'locations' in desired:
+        fetchers['locations'] = lambda: {loc['name']: loc for loc in locs.search_locations(session, full=True,
+                                                                                           lazy=True)}
+
+    names = list(fetchers)
+    state = dict(zip(names, run_parallel(lambda name: fetchers[name](), names, workers=workers, progress=False)))
+
+    if 'locations' in desired:
+        # Only the sublocations of the locations that declare them, one request per location
+        parents = [loc['name'] for loc in desired['locations']
+                   if 'sublocations' in loc and loc['name'] in state['locations']]
+
+        def subs_of(parent):
+            return locs.get_sublocations(session, state['locations'][parent]['id']) or []
+
+        state['sublocations'] = {}
+        for parent, subs in zip(parents, iter_parallel(subs_of, parents, workers=workers, progress=False)):
+            state['sublocations'].update({_sub_key(parent, sub['name']): sub for sub in subs})
+
+    return state
+
+
+def _diff(kind, desired, current, plan, prune, extra=None, key_field=None):
+    """Adds the changes of a kind to the plan.
+
+    Args:
+        kind (str): Kind of records.
+        desired (dict): Desired records by key.
+        current (dict): Server records by key.
+        plan (dict): The plan.
+        prune (bool): Deletes the server records missing from `desired`.
+        extra (function, optional): Returns the fields added to the plan entry of a key.
+        key_field (str, optional): Field matched case-insensitively, whose server value is kept.
+    """
+    changes = plan[kind]
+    for key, record in desired.items():
+        entry = {'key': key, **(extra(key) if extra else {})}
+        server = current.get(key)
+
+        if server is None:
+            changes['create'].append({**entry, 'record': record})
+            continue
+
+        if key_field:
+            record = {field: value for field, value in record.items() if field != key_field}
+
+        fields = changed_fields(field_hashes(record, keep_empty=True), field_hashes(server))
+        # Write-only fields cannot be compared with the server state
+        fields += [field for field in write_only_fields(record) if field not in fields]
+        if fields:
+            changes['update'].append({**entry, 'id': server['id'], 'fields': fields,
+                                      'record': {**server, **record, 'id': server['id']}})
+
+    if prune:
+        changes['delete'].extend({'key': key, 'id': server['id']} for key, server in current.items()
+                                 if key not in desired)
+
+
+def plan(session: ZIAConnector, desired: dict, prune: bool = False, workers: int = 4, state: dict = None):
+    """Computes the changes that bring the server to the desired state.
+
+    Args:
+        session (ZIAConnector): Logged in API client.
+        desired (dict): Desired state. See the module documentation.
+        prune (bool, optional): Deletes the server records missing from the desired state. Defaults to False.
+        workers (int, optional): Concurrent requests to retrieve the server state. Defaults to 4.
+        state (dict, optional): Server state already retrieved with `fetch_state`.
+
+    Returns:
+        dict: For every kind, the 'create' entries (key and record), the 'update' entries (key, id, changed fields and
+        full record) and the 'delete' entries (key and id). Sublocation entries also hold their 'parent' name.
+    """
+    if state is None:
+        state = fetch_state(session, desired, workers)
+
+    result = {kind: {'create': [], 'update': [], 'delete': []} for kind in KINDS}
+
+    if 'locations' in desired:
+        wanted_locs = {}
+        wanted_subs = {}
+        parents = {}
+        for loc in desired['locations']:
+            loc = dict(loc)
+            subs = loc.pop('sublocations', None)
+            if loc['name'] in wanted_locs:
+                raise ValueError(f'Duplicated location in the desired state: {loc["name"]}.')
+            wanted_locs[loc['name']] = loc
+
+            for sub in subs or []:
+                key = _sub_key(loc['name'], sub['name'])
+                if key in wanted_subs:
+                    raise ValueError(f'Duplicated sublocation in the desired state: {key}.')
+                wanted_subs[key] = sub
+                parents[key] = loc['name']
+
+        _diff('locations', wanted_locs, state['locations'], result, prune)
+        _diff('sublocations', wanted_subs, state['sublocations'], result, prune,
+              extra=lambda key: {'parent': parents[key]})
+
+    if 'users' in desired:
+        wanted = {}
+        for user in _index(desired['users'], _user_key, 'user').values():
+            user = dict(user)
+            owner = f'user {user["email"]}'
+            if 'department' in user:
+                user['department'] = _reference(user['department'], state['departments'], 'department', owner)
+            if 'groups' in user:
+                user['groups'] = [_reference(g, state['groups'], 'group', owner) for g in user['groups']]
+            wanted[_user_key(user)] = user
+
+        _diff('users', wanted, state['users'], result, prune, key_field='email')
+
+    return result
+
+
+def summary(changes: dict):
+    """Counts the changes of a plan.
+
+    Args:
+        changes (dict): Plan returned by `plan`.
+
+    Returns:
+        dict: Number of creates, updates and deletes of every kind.
+    """
+    return {kind: {action: len(entries) for action, entries in changes[kind].items()} for kind in KINDS}
+
+
+def _chunks(ids, size):
+    it = iter(ids)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def apply(session: ZIAConnector, changes: dict, workers: int = 1, progress: bool = True):
+    """Runs a plan.
+
+    Locations are created and updated first, then sublocations, whose new parents get their id from the responses,
+    then users. Deletes follow in the reverse order, in bulk requests as large as the endpoint registry allows.
+    Requests of the same step run concurrently and are subject to the rate limit of the session, with the 'bulk'
+    priority.
+
+    Args:
+        session (ZIAConnector): Logged in API client.
+        changes (dict): Plan returned by `plan`.
+        workers (int, optional): Concurrent requests. Defaults to 1.
+        progress (bool, optional): Reports the progress of every step on stderr. Defaults to True.
+
+    Returns:
+        dict: Number of records created, updated and deleted of every kind.
+    """
+    writers = {
+        'locations': (locs.create_location, locs.update_location, locs.bulk_del_location),
+        'sublocations': (locs.create_location, locs.update_location, locs.bulk_del_location),
+        'users': (usrs.create_user, usrs.update_user, usrs.bulk_del_user),
+    }
+    done = {kind: {'create': 0, 'update': 0, 'delete': 0} for kind in KINDS}
+    new_locations = {}
+
+    def record_of(kind, entry):
+        record = entry['record']
+        if kind == 'sublocations' and 'parentId' not in record:
+            parent = entry['parent']
+            parent_id = new_locations.get(parent) or _parent_id(session, parent)
+            record = {**record, 'parentId': parent_id}
+        return record
+
+    for kind in KINDS:
+        create, update, _ = writers[kind]
+        kind_changes = changes.get(kind, {})
+
+        entries = kind_changes.get('create', [])
+        for entry, response in zip(entries, iter_parallel(lambda e: create(session, record_of(kind, e)), entries,
+                                                          workers, f'{kind} create', progress, BULK)):
+            if kind == 'locations' and isinstance(response, dict) and 'id' in response:
+                new_locations[entry['key']] = response['id']
+            done[kind]['create'] += 1
+
+        entries = kind_changes.get('update', [])
+        for _ in iter_parallel(lambda e: update(session, e['record']), entries, workers, f'{kind} update', progress,
+                               BULK):
+            done[kind]['update'] += 1
+
+    for kind in reversed(KINDS):
+        delete = writers[kind][2]
+        ids = [entry['id'] for entry in changes.get(kind, {}).get('delete', [])]
+        chunks = list(_chunks(ids, session.endpoints.get(*BULK_ENDPOINTS[kind]).bulk_limit or BULK_LIMITS[kind]))
+        for chunk, _ in zip(chunks, iter_parallel(lambda c: delete(session, c), chunks, workers, f'{kind} delete',
+                                                  progress, BULK)):
+            done[kind]['delete'] += len(chunk)
+
+    return done
+
+
+def _parent_id(session, name):
+    """Finds the id of a location that was not created by the plan, as when applying a plan saved earlier.
+    """
+    for loc in locs.search_locations(session, search=name, full=True, lazy=True):
+        if loc['name'] == name:
+            return loc['id']
+    raise ValueError(f'Parent location {name!r} does not exist.')
@@ -0,0 +1,421 @@
+"""
+Synthetic tenant generator.
+
+Produces users (with groups and departments), parent locations with sublocations, VPN credentials, admin users, admin
+roles and an audit log CSV in the same JSON shapes the functions of the `zia_client` package consume and return. It is
+meant for benchmarks and load tests, where a real tenant is either not available or not big enough.
+
+Every file is streamed to disk record by record, so the generation of millions of users only holds the small lookup
+tables (groups, departments) in memory.
+
+It can be run as a script too::
+
+    python -m zia_client.synthetic out_dir --users 1000000 --skew 1.2 --seed 7
+"""
+import argparse as ap
+import csv
+import datetime as dt
+import itertools
+import json
+import os
+import random
+
+USER_BASE_ID = 10000000
+GROUP_BASE_ID = 20000000
+DEPT_BASE_ID = 30000000
+LOCATION_BASE_ID = 40000000
+VPN_BASE_ID = 50000000
+ADMIN_BASE_ID = 60000000
+ROLE_BASE_ID = 70000000
+
+AUDIT_ACTIONS = ['SIGN_IN', 'SIGN_OUT', 'CREATE', 'UPDATE', 'DELETE', 'ACTIVATE']
+AUDIT_CATEGORIES = ['USER_MANAGEMENT', 'LOCATION_MANAGEMENT', 'TRAFFIC_FORWARDING', 'LOGIN', 'ACTIVATION']
+AUDIT_COLUMNS = ['Time', 'Admin', 'Action', 'Category', 'Sub-Category', 'Resource', 'Interface', 'Result',
+                 'Client IP']
+
+# Sublocations get a /24 each inside 10.0.0.0/8
+MAX_SUBLOCATIONS = 1 << 16
+
+
+class _JSONArrayWriter:
+    """
+    Writes a JSON array to a file one element at a time, so the whole array never needs to be in memory.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the file to be written.
+        """
+        self.path = path
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w')
+        self._f.write('[')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._f.write('\n]\n')
+        self._f.close()
+
+    def write(self, obj):
+        """Appends an element to the array.
+
+        Args:
+            obj: JSON serializable object.
+        """
+        self._f.write('\n' if not self.count else ',\n')
+        self._f.write(json.dumps(obj, separators=(',', ':')))
+        self.count += 1
+
+
+def _zipf_cum_weights(n, skew):
+    """Cumulative weights of a Zipf-like distribution over `n` ranks. A skew of 0 means uniform.
+
+    Args:
+        n (int): Number of ranks.
+        skew (float): Exponent of the distribution.
+
+    Returns:
+        list: Cumulative weights, usable with `random.choices`.
+    """
+    return list(itertools.accumulate(1 / (k ** skew) for k in range(1, n + 1)))
+
+
+def _ipv4(n):
+    """Maps an integer to a dotted IPv4 address inside 10.0.0.0/8.
+
+    Args:
+        n (int): Offset.
+
+    Returns:
+        str: IP address.
+    """
+    return f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+
+def gen_groups(count):
+    """Generates user groups.
+
+    Args:
+        count (int): Number of groups.
+
+    Returns:
+        list: Groups as returned by `zia_client.users.get_groups`.
+    """
+    return [{'id': GROUP_BASE_ID + i, 'name': f'Group {i:05d}', 'comments': 'Synthetic group.'} for i in range(count)]
+
+
+def gen_departments(count):
+    """Generates departments.
+
+    Args:
+        count (int): Number of departments.
+
+    Returns:
+        list: Departments as returned by `zia_client.users.get_departments`.
+    """
+    return [{'id': DEPT_BASE_ID + i, 'name': f'Department {i:04d}', 'comments': 'Synthetic department.',
+             'deleted': False} for i in range(count)]
+
+
+def gen_users(count, groups, departments, rnd, skew=1.0, max_groups=5, domain='example.com'):
+    """Generates users lazily.
+
+    Group membership and department assignment follow a Zipf-like distribution controlled by `skew`, so that a few
+    groups hold most of the users, as it happens in real tenants.
+
+    Args:
+        count (int): Number of users.
+        groups (list): Groups obtained from `gen_groups`.
+        departments (list): Departments obtained from `gen_departments`.
+        rnd (random.Random): Random generator.
+        skew (float, optional): Zipf exponent. 0 means uniform. Defaults to 1.0.
+        max_groups (int, optional): Maximum number of groups per user. Defaults to 5.
+        domain (str, optional): Email domain. Defaults to 'example.com'.
+
+    Yields:
+        dict: User as returned by `zia_client.users.get_users`.
+    """
+    group_weights = _zipf_cum_weights(len(groups), skew)
+    dept_weights = _zipf_cum_weights(len(departments), skew)
+
+    for i in range(count):
+        n_groups = min(len(groups), rnd.randint(1, max_groups))
+        members = {g['id']: g for g in rnd.choices(groups, cum_weights=group_weights, k=n_groups)}
+        dept = rnd.choices(departments, cum_weights=dept_weights)[0]
+
+        yield {
+            'id': USER_BASE_ID + i,
+            'name': f'User {i:07d}',
+            'email': f'user{i:07d}@{domain}',
+            'groups': [{'id': g['id'], 'name': g['name']} for g in members.values()],
+            'department': {'id': dept['id'], 'name': dept['name']},
+            'comments': '',
+            'adminUser': False,
+            'type': 'HOSTED_DB',
+        }
+
+
+def gen_locations(count, subs_per_location, rnd, domain='example.com'):
+    """Generates parent locations, each with its sublocations and VPN credential, lazily.
+
+    Args:
+        count (int): Number of parent locations.
+        subs_per_location (int): Number of sublocations per parent.
+        rnd (random.Random): Random generator.
+        domain (str, optional): Domain used for the UFQDN credentials. Defaults to 'example.com'.
+
+    Yields:
+        tuple: Parent location, list of sublocations and VPN credential of the parent.
+    """
+    next_id = LOCATION_BASE_ID
+    for i in range(count):
+        parent_id = next_id
+        next_id += 1
+        name = f'Location {i:05d}'
+
+        cred = {
+            'id': VPN_BASE_ID + i,
+            'type': 'UFQDN',
+            'fqdn': f'loc{i:05d}@{domain}',
+            'preSharedKey': f'{rnd.getrandbits(64):016x}',
+            'comments': f'Credential for {name}.',
+            'location': {'id': parent_id, 'name': name},
+        }
+
+        parent = {
+            'id': parent_id,
+            'name': name,
+            'ipAddresses': [],
+            'ports': [],
+            'vpnCredentials': [{'id': cred['id'], 'type': cred['type'], 'fqdn': cred['fqdn']}],
+            'authRequired': rnd.random() < 0.8,
+            'sslScanEnabled': rnd.random() < 0.5,
+            'xffForwardEnabled': False,
+            'surrogateIP': False,
+            'ofwEnabled': rnd.random() < 0.5,
+            'ipsControl': False,
+            'aupEnabled': False,
+            'cautionEnabled': False,
+            'upBandwidth': 0,
+            'dnBandwidth': 0,
+            'country': 'NONE',
+            'tz': 'NOT_SPECIFIED',
+            'profile': 'CORPORATE',
+            'description': 'Synthetic location.',
+        }
+
+        sublocations = []
+        for j in range(subs_per_location):
+            net = (i * subs_per_location + j) << 8
+            sublocations.append({
+                'id': next_id,
+                'name': f'{name} - Sub {j:02d}',
+                'parentId': parent_id,
+                'ipAddresses': [f'{_ipv4(net)}-{_ipv4(net + 255)}'],
+                'authRequired': parent['authRequired'],
+                'sslScanEnabled': parent['sslScanEnabled'],
+                'ofwEnabled': parent['ofwEnabled'],
+                'upBandwidth': 0,
+                'dnBandwidth': 0,
+                'profile': 'CORPORATE',
+                'description': f'Sublocation of {name}.',
+            })
+            next_id += 1
+
+        yield parent, sublocations, cred
+
+
+def gen_admin_roles():
+    """Generates the admin roles.
+
+    Returns:
+        list: Roles as returned by `zia_client.admin_roles.get_admin_roles`.
+    """
+    names = ['Super Admin', 'Helpdesk', 'Auditor', 'Location Admin']
+    return [{'id': ROLE_BASE_ID + i, 'rank': 7, 'name': n, 'roleType': 'ORG_ADMIN'} for i, n in enumerate(names)]
+
+
+def gen_admin_users(count, roles, rnd, domain='example.com'):
+    """Generates admin users lazily.
+
+    Args:
+        count (int): Number of admin users.
+        roles (list): Roles obtained from `gen_admin_roles`.
+        rnd (random.Random): Random generator.
+        domain (str, optional): Email domain. Defaults to 'example.com'.
+
+    Yields:
+        dict: Admin user as returned by `zia_client.admin_roles.get_admin_users`.
+    """
+    for i in range(count):
+        role = rnd.choice(roles)
+        yield {
+            'id': ADMIN_BASE_ID + i,
+            'loginName': f'admin{i:04d}@{domain}',
+            'userName': f'Admin {i:04d}',
+            'email': f'admin{i:04d}@{domain}',
+            'role': {'id': role['id'], 'name': role['name']},
+            'adminScope': {'type': 'ORGANIZATION'},
+            'isNonEditable': False,
+            'disabled': False,
+            'comments': '',
+        }
+
+
+def gen_audit_rows(count, admins, rnd, start=None):
+    """Generates audit log rows lazily, in the column order of `AUDIT_COLUMNS`.
+
+    Args:
+        count (int): Number of entries.
+        admins (list): Login names of the admins performing the actions.
+        rnd (random.Random): Random generator.
+        start (datetime.datetime, optional): Time of the first entry. Defaults to 2021-01-01 00:00:00 UTC.
+
+    Yields:
+        list: CSV row.
+    """
+    start = start or dt.datetime(2021, 1, 1, tzinfo=dt.timezone.utc)
+    for i in range(count):
+        when = start + dt.timedelta(seconds=i * 7)
+        action = rnd.choice(AUDIT_ACTIONS)
+        yield [when.strftime('%Y-%m-%d %H:%M:%S %Z'), rnd.choice(admins), action, rnd.choice(AUDIT_CATEGORIES),
+               '', f'resource-{rnd.randrange(100000)}', rnd.choice(['API', 'UI']),
+               'SUCCESS' if rnd.random() < 0.98 else 'FAILURE', _ipv4(rnd.randrange(1 << 24))]
+
+
+def generate_tenant(out_dir, users=1000, groups=None, departments=None, locations=None, sublocations=2,
+                    admin_users=10, audit_entries=1000, skew=1.0, seed=0, domain='example.com'):
+    """Generates a full synthetic tenant and streams it to JSON and CSV files inside `out_dir`.
+
+    Files written: `users.json`, `groups.json`, `departments.json`, `locations.json` (parents),
+    `sublocations.json`, `vpn_credentials.json`, `admin_roles.json`, `admin_users.json`, `auditlog.csv` and
+    `manifest.json`, which lists the generation parameters and the record count of every file.
+
+    Args:
+        out_dir (str): Output directory. Created if it does not exist.
+        users (int, optional): Number of users. Defaults to 1000.
+        groups (int, optional): Number of groups. Defaults to one per 50 users, at least 1.
+        departments (int, optional): Number of departments. Defaults to one per 200 users, at least 1.
+        locations (int, optional): Number of parent locations. Defaults to one per 500 users, at least 1.
+        sublocations (int, optional): Sublocations per parent location. Defaults to 2.
+        admin_users (int, optional): Number of admin users. Defaults to 10.
+        audit_entries (int, optional): Number of audit log rows. Defaults to 1000.
+        skew (float, optional): Zipf exponent for group and department membership. Defaults to 1.0.
+        seed (int, optional): Seed. The same parameters and seed always produce the same tenant. Defaults to 0.
+        domain (str, optional): Email domain. Defaults to 'example.com'.
+
+    Returns:
+        dict: The manifest.
+
+    Raises:
+        ValueError: If there are no groups or departments to assign users to, or more sublocations than /24 networks
+            in 10.0.0.0/8.
+    """
+    groups = groups if groups is not None else max(1, users // 50)
+    departments = departments if departments is not None else max(1, users // 200)
+    locations = locations if locations is not None else max(1, users // 500)
+
+    if groups < 1 or departments < 1:
+        raise ValueError('At least one group and one department are needed.')
+    if locations * sublocations > MAX_SUBLOCATIONS:
+        raise ValueError(f'{locations * sublocations} sublocations do not fit in 10.0.0.0/8, '
+                         f'{MAX_SUBLOCATIONS} at most.')
+
+    os.makedirs(out_dir, exist_ok=True)
+    rnd = random.Random(seed)
+
+    def path(name):
+        return os.path.join(out_dir, name)
+
+    counts = {}
+
+    group_list = gen_groups(groups)
+    dept_list = gen_departments(departments)
+    role_list = gen_admin_roles()
+
+    for name, objs in (('groups.json', group_list), ('departments.json', dept_list),
+                       ('admin_roles.json', role_list)):
+        with _JSONArrayWriter(path(name)) as w:
+            for obj in objs:
+                w.write(obj)
+        counts[name] = w.count
+
+    with _JSONArrayWriter(path('users.json')) as w:
+        for user in gen_users(users, group_list, dept_list, rnd, skew=skew, domain=domain):
+            w.write(user)
+    counts['users.json'] = w.count
+
+    with _JSONArrayWriter(path('locations.json')) as pw, _JSONArrayWriter(path('sublocations.json')) as sw, \
+            _JSONArrayWriter(path('vpn_credentials.json')) as vw:
+        for parent, subs, cred in gen_locations(locations, sublocations, rnd, domain=domain):
+            pw.write(parent)
+            vw.write(cred)
+            for sub in subs:
+                sw.write(sub)
+    counts.update({'locations.json': pw.count, 'sublocations.json': sw.count, 'vpn_credentials.json': vw.count})
+
+    admins = []
+    with _JSONArrayWriter(path('admin_users.json')) as w:
+        for admin in gen_admin_users(admin_users, role_list, rnd, domain=domain):
+            admins.append(admin['loginName'])
+            w.write(admin)
+    counts['admin_users.json'] = w.count
+
+    with open(path('auditlog.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(AUDIT_COLUMNS)
+        for row in gen_audit_rows(audit_entries, admins or ['admin@' + domain], rnd):
+            writer.writerow(row)
+    counts['auditlog.csv'] = audit_entries
+
+    manifest = {
+        'parameters': {'users': users, 'groups': groups, 'departments': departments, 'locations': locations,
+                       'sublocations': sublocations, 'admin_users': admin_users, 'audit_entries': audit_entries,
+                       'skew': skew, 'seed': seed, 'domain': domain},
+        'files': counts,
+    }
+
+    with open(path('manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    return manifest
+
+
+def _positive(arg: str):
+    value = int(arg)
+    if value < 1:
+        raise ap.ArgumentTypeError('Should be at least 1.')
+    return value
+
+
+def _main():
+    """
+    Command line entry point.
+    """
+    parser = ap.ArgumentParser(description='Generates a synthetic ZIA tenant for benchmarks and load tests.')
+    parser.add_argument('out_dir', help='Output directory.')
+    parser.add_argument('--users', type=int, default=1000, help='Number of users.')
+    parser.add_argument('--groups', type=_positive, default=None, help='Number of groups.')
+    parser.add_argument('--departments', type=_positive, default=None, help='Number of departments.')
+    parser.add_argument('--locations', type=int, default=None, help='Number of parent locations.')
+    parser.add_argument('--sublocations', type=int, default=2, help='Sublocations per parent location.')
+    parser.add_argument('--admin_users', type=int, default=10, help='Number of admin users.')
+    parser.add_argument('--audit_entries', type=int, default=1000, help='Number of audit log entries.')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of group membership. 0 is uniform.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    parser.add_argument('--domain', default='example.com', help='Email domain.')
+
+    args = vars(parser.parse_args())
+    try:
+        manifest = generate_tenant(args.pop('out_dir'), **args)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(manifest, indent=4))
+
+
+if __name__ == '__main__':
+    _main()
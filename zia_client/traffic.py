@@ -11,7 +11,7 @@ from zia_client._utils import clean_args
 
 def get_vpn_creds(session: ZIAConnector, search: str = '', type: str = '', includeOnlyWithoutLocation: bool = None,
                   locationId: int = '', managedBy: int = '', page: int = '', pageSize: int = '',
-                  full: bool = False) -> list:
+                  full: bool = False, lazy: bool = False) -> list:
     """Obtains the list of the existing VPN credentials in the platform.
 
     Args:
@@ -28,6 +28,8 @@ def get_vpn_creds(session: ZIAConnector, search: str = '', type: str = '', inclu
         page (int, optional): Specifies the page offset. Server\'s default: 1.
         pageSize (int, optional): Specifies the page size. The default size is 100, but the maximum size is 1000.
         full (bool, optional): If `True`, indicates that full retrieval of results should be called.
+        lazy (bool, optional): If True, with `full`, an iterator that requests the pages as the entries are consumed is
+            returned instead of a list.
 
     Raises:
         Exception: If the information retrieval was not possible.
@@ -40,7 +42,7 @@ def get_vpn_creds(session: ZIAConnector, search: str = '', type: str = '', inclu
 
     url = session.get_url('traffic', 'main')
 
-    return session.full_retrieval('GET', url, params, page_size=pageSize, full=full)
+    return session.full_retrieval('GET', url, params, page_size=pageSize, full=full, lazy=lazy)
 
 
 def del_vpn_cred(session: ZIAConnector, vpn_id):
@@ -193,7 +195,7 @@ def ip_gre_tunnel_info(session: ZIAConnector, ipAddresses: List[str] = False):
 
 
 def get_virtual_ips(session: ZIAConnector, dc: str = '', region: str = '', page: int = None, pageSize: int = None,
-                    include: str = None, full: bool = False) -> List[Dict]:
+                    include: str = None, full: bool = False, lazy: bool = False) -> List[Dict]:
     """Gets a paginated list of the virtual IP addresses (VIPs) available in the Zscaler cloud.
 
     Gets a paginated list of the virtual IP addresses (VIPs) available in the Zscaler cloud, including region and data
@@ -211,6 +213,8 @@ def get_virtual_ips(session: ZIAConnector, dc: str = '', region: str = '', page:
             * Available values: `all`, `private`, `public`
 
         full (bool, optional): Defaults to False. If set to True activates full retrieval.
+        lazy (bool, optional): Defaults to False. If True, with `full`, an iterator that requests the pages as the
+            entries are consumed is returned instead of a list.
 
     Returns:
         List of dictionaries: The dictionaries representing the virtual IP addresses.
@@ -244,4 +248,5 @@ def get_virtual_ips(session: ZIAConnector, dc: str = '', region: str = '', page:
     url = session.get_url('traffic', 'vips')
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize,
-                                  message="Virtual IP Addresses retrieved successfully.", full=full)
+                                  message="Virtual IP Addresses retrieved successfully.", full=full,
+                                  lazy=lazy)
@@ -0,0 +1,186 @@
+"""
+Transport layer of the `ZIAConnector`.
+
+The connector never talks to the network by itself. It prepares the `requests.Request` objects built by the function
+modules and hands them to a transport, which returns a `requests.Response`. Swapping the transport lets the very same
+client code run against the real API, an in-process fake tenant (see the `fake` module) or any other HTTP client.
+
+A transport must implement `open`, `prepare`, `send` and `close`. `bind` is optional.
+"""
+import threading
+from http.client import responses
+
+import requests as re
+
+
+class Transport:
+    """
+    Base class of all transports. It defines the interface the `ZIAConnector` relies on.
+    """
+
+    def bind(self, connector):
+        """Called once by the connector that will use this transport. Does nothing by default.
+
+        Args:
+            connector (ZIAConnector): The connector.
+        """
+
+    def open(self, headers: dict):
+        """Opens a new session. Called on login.
+
+        Args:
+            headers (dict): Headers to be sent with every request of the session.
+        """
+        raise NotImplementedError
+
+    def prepare(self, request: re.Request) -> re.PreparedRequest:
+        """Prepares the request, merging the session's state into it.
+
+        Args:
+            request (requests.Request): Request built by the function modules.
+
+        Returns:
+            requests.PreparedRequest: The request ready to be sent.
+        """
+        raise NotImplementedError
+
+    def send(self, prep_req: re.PreparedRequest) -> re.Response:
+        """Sends the prepared request.
+
+        Args:
+            prep_req (requests.PreparedRequest): The request obtained from `prepare`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Closes the session and releases its resources. Called on logout.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Default transport. A thin wrapper around `requests.Session`, safe to use from many threads.
+
+    `requests.Session` is not thread-safe, so every thread gets its own. They all share the headers, the cookie jar,
+    where the login cookie is, and one connection pool, so a single login serves every thread.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout=None):
+        """
+        Args:
+            pool_size (int, optional): Maximum connections kept open to the API. Should be at least the number of
+                threads sending requests at once. Defaults to 10.
+            timeout (float or tuple, optional): Seconds to wait for the connection and for every read of the
+                response, as a (connect, read) tuple or a number for both. Defaults to the timeouts of the connector.
+        """
+        self.pool_size = max(pool_size, 1)
+        self.timeout = timeout
+        self.headers = None
+        self.cookies = None
+        self.adapter = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    @property
+    def session(self):
+        """The `requests.Session` of the calling thread. None before `open`.
+        """
+        if self.adapter is None:
+            return None
+
+        local = self.local
+        if getattr(local, 'generation', None) != self.generation:
+            with self.lock:
+                session = re.Session()
+                session.headers = self.headers
+                session.cookies = self.cookies
+                session.mount('https://', self.adapter)
+                session.mount('http://', self.adapter)
+                local.session, local.generation = session, self.generation
+        return local.session
+
+    def bind(self, connector):
+        """Takes the timeouts of the connector if none were given.
+
+        Args:
+            connector (ZIAConnector): The connector.
+        """
+        if self.timeout is None:
+            self.timeout = connector.timeout
+
+    def open(self, headers: dict):
+        """Creates the shared state of the sessions: headers, cookie jar and connection pool.
+
+        Args:
+            headers (dict): Session headers.
+        """
+        with self.lock:
+            if self.adapter is not None:
+                self.adapter.close()
+            self.headers = re.structures.CaseInsensitiveDict(headers)
+            self.cookies = re.cookies.RequestsCookieJar()
+            self.adapter = re.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            # Sessions of the previous login are replaced on their next use
+            self.generation += 1
+
+    def prepare(self, request: re.Request) -> re.PreparedRequest:
+        """Prepares the request with the session's headers and cookies.
+
+        Args:
+            request (requests.Request): Request to prepare.
+
+        Returns:
+            requests.PreparedRequest: Prepared request.
+        """
+        return self.session.prepare_request(request)
+
+    def send(self, prep_req: re.PreparedRequest) -> re.Response:
+        """Sends the request through the session. A connection that does not progress raises a
+        `requests.exceptions.Timeout` instead of hanging.
+
+        Args:
+            prep_req (requests.PreparedRequest): Prepared request.
+
+        Returns:
+            requests.Response: The response.
+        """
+        return self.session.send(prep_req, timeout=self.timeout)
+
+    def close(self):
+        """
+        Closes the connection pool.
+        """
+        with self.lock:
+            if self.adapter is not None:
+                self.adapter.close()
+
+
+def build_response(prep_req: re.PreparedRequest, status: int, body: bytes = b'', content_type: str = None):
+    """Builds a `requests.Response` without any connection. Used by the transports that do not go to the network.
+
+    Args:
+        prep_req (requests.PreparedRequest): The request being answered.
+        status (int): Status code.
+        body (bytes, optional): Raw body. Defaults to an empty one.
+        content_type (str, optional): Value of the content-type header. Not set if None.
+
+    Returns:
+        requests.Response: The response.
+    """
+    response = re.Response()
+    response.status_code = status
+    response.reason = responses.get(status, '')
+    response.url = prep_req.url
+    response.request = prep_req
+    response.encoding = 'utf-8'
+    response._content = body
+
+    if content_type:
+        response.headers['content-type'] = content_type
+
+    return response
@@ -0,0 +1,296 @@
+"""
+Idempotent upserts of users, locations and VPN credentials.
+
+Records are compared with the server state field by field, using hashes of their normalized values, and only the ones
+that differ are sent. Normalization makes equal what the API considers equal: nested objects are reduced to their ids,
+lists of ids and addresses are sorted, and read-only fields (timestamps) are ignored. Empty values, as '' or [], equal
+a field the server leaves out, so a desired record that empties a field the server has a value for is sent.
+
+Write-only fields (passwords, pre-shared keys) are never returned by the API, so they cannot be compared: records that
+carry them are always sent.
+
+Records are partial updates: only their fields are compared, and the update sent is the current server record with
+those fields replaced, as the API replaces whole records.
+
+The field hashes of the server state can be kept in a local file between runs. Then a run whose records did not change
+since the last one sends no request at all. Use `refresh` if the tenant may have been modified by other means.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+
+import zia_client.locations as locs
+import zia_client.traffic as tfc
+import zia_client.users as usrs
+from zia_client import ZIAConnector
+
+CACHE_VERSION = 1
+
+# Fields set by the server
+READ_ONLY_FIELDS = frozenset({'id', 'lastModifiedTime', 'lastModifiedBy', 'modifiedTime', 'modifiedBy', 'createdTime',
+                              'creationTime', 'isNonEditable'})
+
+# Fields the server never returns, whose records are always sent
+WRITE_ONLY_FIELDS = frozenset({'password', 'preSharedKey'})
+
+# Fields that are never compared
+IGNORED_FIELDS = READ_ONLY_FIELDS | WRITE_ONLY_FIELDS
+
+
+def _list_all_locations(session):
+    return locs.search_locations(session, full=True, lazy=True)
+
+
+def _list_all_users(session):
+    return usrs.get_users(session, full=True, lazy=True)
+
+
+def _list_all_vpn_creds(session):
+    return tfc.get_vpn_creds(session, full=True, lazy=True)
+
+
+# Functions to list all, get one, update one and create one record of every entity
+ENTITIES = {
+    'users': (_list_all_users, usrs.get_user_info, usrs.update_user, usrs.create_user),
+    'locations': (_list_all_locations, locs.get_location_info, locs.update_location, locs.create_location),
+    'vpn_credentials': (_list_all_vpn_creds, tfc.get_vpn_cred_info, tfc.upd_vpn_cred, tfc.add_vpn_creds),
+}
+
+
+def normalize(value):
+    """Normalizes a field value for comparison.
+
+    Args:
+        value: JSON value.
+
+    Returns:
+        The normalized value. None for empty values.
+    """
+    if isinstance(value, dict):
+        if 'id' in value:
+            return value['id']
+        value = {k: normalize(v) for k, v in value.items() if k not in IGNORED_FIELDS}
+        value = {k: v for k, v in value.items() if v is not None}
+        return value or None
+
+    if isinstance(value, list):
+        items = [normalize(v) for v in value]
+        items = [v for v in items if v is not None]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True)) or None
+
+    if value == '':
+        return None
+
+    return value
+
+
+def _hash(value):
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+# Hash of an empty field, which equals a field left out of the server record
+EMPTY = _hash(None)
+
+
+def field_hashes(record, keep_empty: bool = False):
+    """Hashes every comparable field of a record.
+
+    Args:
+        record (dict): API record.
+        keep_empty (bool, optional): Keeps the empty fields, hashed as `EMPTY`. For desired records, whose empty
+            fields clear the server ones. Defaults to False, which leaves them out, as for server records.
+
+    Returns:
+        dict: Field name to a short hash of its normalized value.
+    """
+    hashes = {}
+    for field, value in record.items():
+        if field in IGNORED_FIELDS:
+            continue
+        value = normalize(value)
+        if value is None:
+            if keep_empty:
+                hashes[field] = EMPTY
+            continue
+        hashes[field] = _hash(value)
+    return hashes
+
+
+def changed_fields(desired, current):
+    """Gets the fields of a desired record that would change the current one.
+
+    Args:
+        desired (dict): Field hashes of the desired record, with its empty fields (see `field_hashes`).
+        current (dict): Field hashes of the current record.
+
+    Returns:
+        list: The fields that differ. Fields the current record leaves out are empty.
+    """
+    return [field for field, h in desired.items() if current.get(field, EMPTY) != h]
+
+
+def differs(desired, current):
+    """Tells if a desired record would change the current one.
+
+    Args:
+        desired (dict): Field hashes of the desired record, with its empty fields (see `field_hashes`).
+        current (dict): Field hashes of the current record.
+
+    Returns:
+        bool: True if any field of the desired record differs.
+    """
+    return bool(changed_fields(desired, current))
+
+
+def write_only_fields(record):
+    """Gets the write-only fields of a record, which cannot be compared with the server state.
+
+    Args:
+        record (dict): Desired record.
+
+    Returns:
+        list: The fields, sorted.
+    """
+    return sorted(WRITE_ONLY_FIELDS.intersection(record))
+
+
+class Upserter:
+    """
+    Upserts the records of an entity, sending only the ones that differ from the server state. Thread-safe.
+    """
+
+    def __init__(self, session: ZIAConnector, entity: str, cache_path: str = None, refresh: bool = False,
+                 dry_run: bool = False):
+        """
+        Args:
+            session (ZIAConnector): Logged in API client.
+            entity (str): 'users', 'locations' or 'vpn_credentials'.
+            cache_path (str, optional): File where the field hashes of the server state are kept between runs.
+                Defaults to keeping them only during this run.
+            refresh (bool, optional): Discards the cached hashes of the entity. Defaults to False.
+            dry_run (bool, optional): Decides what would be done, but sends no change. Defaults to False.
+        """
+        self.session = session
+        self.entity = entity
+        self.list_all, self.get_one, self.update_one, self.create_one = ENTITIES[entity]
+        self.cache_path = cache_path
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+        self.counts = collections.Counter()
+
+        self.cache = {'version': CACHE_VERSION}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                self.cache = cache
+
+        if refresh:
+            self.cache.pop(entity, None)
+
+        # Server records of this run, by id, to build full updates from partial records
+        self.current = {}
+
+        if entity not in self.cache:
+            self.prefetch()
+
+    @property
+    def hashes(self):
+        """Field hashes of the known server records of the entity, by id (as a string).
+        """
+        return self.cache.setdefault(self.entity, {})
+
+    def prefetch(self):
+        """
+        Lists every server record of the entity to learn their state with a few paginated requests instead of one
+        request per record.
+        """
+        hashes = {}
+        for record in self.list_all(self.session):
+            self.current[record['id']] = record
+            hashes[str(record['id'])] = field_hashes(record)
+
+        with self.lock:
+            self.cache[self.entity] = hashes
+
+    def _current(self, record_id):
+        record = self.current.get(record_id)
+        if record is None:
+            record = self.get_one(self.session, record_id)
+            with self.lock:
+                self.current[record_id] = record
+                self.hashes[str(record_id)] = field_hashes(record)
+        return record
+
+    def upsert(self, record):
+        """Creates the record if it has no id. Otherwise, updates it if it differs from the server state.
+
+        Args:
+            record (dict): Desired record. Partial records are merged over the server record.
+
+        Returns:
+            dict: The id, the status ('unchanged', 'updated' or 'created') and the response of the API, if any.
+        """
+        record_id = record.get('id')
+
+        if record_id is None:
+            response = None if self.dry_run else self.create_one(self.session, record)
+            if isinstance(response, dict) and 'id' in response:
+                record_id = response['id']
+                with self.lock:
+                    self.hashes[str(record_id)] = field_hashes(response)
+            return self._result(record_id, 'created', response)
+
+        desired = field_hashes(record, keep_empty=True)
+        # Write-only fields cannot be compared, so their records are always sent
+        compare = not write_only_fields(record)
+
+        # The cached hashes may be stale, but an equal cached state is trusted
+        cached = self.hashes.get(str(record_id))
+        if compare and cached is not None and not differs(desired, cached):
+            return self._result(record_id, 'unchanged')
+
+        if cached is None or record_id not in self.current:
+            # Compare with the actual state before writing
+            current = self._current(record_id)
+            if compare and not differs(desired, self.hashes[str(record_id)]):
+                return self._result(record_id, 'unchanged')
+        else:
+            current = self.current[record_id]
+
+        merged = {**current, **record}
+        response = None if self.dry_run else self.update_one(self.session, merged)
+
+        with self.lock:
+            self.current[record_id] = merged
+            self.hashes[str(record_id)] = field_hashes(merged)
+
+        return self._result(record_id, 'updated', response)
+
+    def _result(self, record_id, status, response=None):
+        with self.lock:
+            self.counts[status] += 1
+        return {'id': record_id, 'status': status, 'response': response}
+
+    def save(self):
+        """
+        Writes the cached hashes, if a cache file was given. The file is replaced atomically.
+        """
+        if not self.cache_path or self.dry_run:
+            return
+
+        tmp = self.cache_path + '.tmp'
+        with self.lock, open(tmp, 'w') as f:
+            json.dump(self.cache, f, separators=(',', ':'))
+        os.replace(tmp, self.cache_path)
+
+    def summary(self):
+        """Returns the counts of the run.
+
+        Returns:
+            dict: Number of 'unchanged', 'updated' and 'created' records.
+        """
+        return {status: self.counts[status] for status in ('unchanged', 'updated', 'created')}
@@ -10,7 +10,8 @@ import zia_client._utils as u
 from zia_client import ZIAConnector
 
 
-def get_departments(session: ZIAConnector, search='', page=None, pageSize=None, full=False):
+def get_departments(session: ZIAConnector, search='', page=None, pageSize=None, full=False, lazy=False,
+                    priority: str = None):
     """
     Obtains departments.
 
@@ -20,6 +21,9 @@ def get_departments(session: ZIAConnector, search='', page=None, pageSize=None,
         search: Search string.
         page: Page offset.
         pageSize: Elements contained per page.
+        lazy: If True, with `full`, an iterator that requests the pages as the entries are consumed is returned instead
+            of a list.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         List of dictionaries with depts.
@@ -30,16 +34,18 @@ def get_departments(session: ZIAConnector, search='', page=None, pageSize=None,
     params = u.clean_args(locals())
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize,
-                                  message="Departments retrieval successful.", full=full)
+                                  message="Departments retrieval successful.", full=full, lazy=lazy,
+                                  priority=priority)
 
 
-def get_department(session: ZIAConnector, dept_id: int):
+def get_department(session: ZIAConnector, dept_id: int, priority: str = None):
     """
     Gets department information from department id.
 
     Args:
         session (ZIAConnector): Logged in API client.
         dept_id: Department id.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON response.
@@ -49,10 +55,12 @@ def get_department(session: ZIAConnector, dept_id: int):
 
     r = re.Request('GET', url)
 
-    return session.send_recv(r, f'Information for department with id {dept_id} obtained successfully.')
+    return session.send_recv(r, f'Information for department with id {dept_id} obtained successfully.',
+                             priority=priority)
 
 
-def get_groups(session: ZIAConnector, search="", page=None, pageSize=None, full=False):
+def get_groups(session: ZIAConnector, search="", page=None, pageSize=None, full=False, lazy=False,
+               priority: str = None):
     """
     Retrieves groups.
 
@@ -62,6 +70,9 @@ def get_groups(session: ZIAConnector, search="", page=None, pageSize=None, full=
         page (int): Page offset. Server's default is 1.
         pageSize (int): Page size. Server's default 100.
         full (bool): Default is False. If set to True, all information is returned.
+        lazy (bool): Default is False. If True, with `full`, an iterator that requests the pages as the entries are
+            consumed is returned instead of a list.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON response.
@@ -72,10 +83,11 @@ def get_groups(session: ZIAConnector, search="", page=None, pageSize=None, full=
     url = session.get_url('usr', 'groups')
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize, message="Group retrieval successful.",
-                                  full=full)
+                                  full=full, lazy=lazy, priority=priority)
 
 
-def get_users(session: ZIAConnector, name="", dept="", group="", page=None, pageSize=None, full=False):
+def get_users(session: ZIAConnector, name="", dept="", group="", page=None, pageSize=None, full=False,
+              lazy=False, priority: str = None):
     """
     Gets a list of all users and allows user filtering by name, department, or group. The name search parameter
     performs a partial match. The dept and group parameters perform a 'starts with' match.
@@ -88,6 +100,9 @@ def get_users(session: ZIAConnector, name="", dept="", group="", page=None, page
         page (int): Defaults to 1. Specifies the page offset.
         pageSize (int): Defaults to 100. Specifies the page size.
         full (bool): Defaults to False. Set to True if complete search is wanted.
+        lazy (bool): Defaults to False. If True, with `full`, an iterator that requests the pages as the entries are
+            consumed is returned instead of a list.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON response.
@@ -98,16 +113,17 @@ def get_users(session: ZIAConnector, name="", dept="", group="", page=None, page
     params = u.clean_args(locals())
 
     return session.full_retrieval('GET', url, params=params, page_size=pageSize, message="User retrieval successful.",
-                                  full=full)
+                                  full=full, lazy=lazy, priority=priority)
 
 
-def update_user(session: ZIAConnector, userdata):
+def update_user(session: ZIAConnector, userdata, priority: str = None):
     """
     Updates the user information for the specified ID. However, the "email" attribute is read-only.
 
     Args:
         session (ZIAConnector): Logged in API client.
         userdata (dict): Dictionary that contains the user information.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON response.
@@ -120,16 +136,17 @@ def update_user(session: ZIAConnector, userdata):
 
     r = re.Request('PUT', url, json=userdata)
 
-    return session.send_recv(r, f"User {userdata['id']} update successful.")
+    return session.send_recv(r, f"User {userdata['id']} update successful.", priority=priority)
 
 
-def get_user_info(session: ZIAConnector, usr_id):
+def get_user_info(session: ZIAConnector, usr_id, priority: str = None):
     """
     Gets the user information for the specified ID.
 
     Args:
         session (ZIAConnector): Logged in API client.
         usr_id (int): The unique identifer for the user.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON dict with user's info.
@@ -139,15 +156,16 @@ def get_user_info(session: ZIAConnector, usr_id):
 
     r = re.Request('GET', url)
 
-    return session.send_recv(r, "User update successful.")
+    return session.send_recv(r, "User update successful.", priority=priority)
 
 
-def get_group_info(session: ZIAConnector, group_id: int):
+def get_group_info(session: ZIAConnector, group_id: int, priority: str = None):
     """Gets the group for the specified ID.
 
     Args:
         session (ZIAConnector): Active API session.
         group_id: Group id.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON dict: Representation of the group.
@@ -155,10 +173,10 @@ def get_group_info(session: ZIAConnector, group_id: int):
 
     url = session.get_url('usr', 'group', groupId=group_id)
 
-    return session.send_recv(re.Request('GET', url), f"Group info for group {group_id} obtained.")
+    return session.send_recv(re.Request('GET', url), f"Group info for group {group_id} obtained.", priority=priority)
 
 
-def create_user(session: ZIAConnector, user_dict: Dict):
+def create_user(session: ZIAConnector, user_dict: Dict, priority: str = None):
     """Adds new user.
 
     Adds a new user. A user can belong to multiple groups, but can only belong to one department.
@@ -166,6 +184,7 @@ def create_user(session: ZIAConnector, user_dict: Dict):
     Args:
         session (ZIAConnector): Active API session.
         user_dict: User dictionary containing it's information.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Example:
         Template for the `user_dict` parameter::
@@ -190,10 +209,11 @@ def create_user(session: ZIAConnector, user_dict: Dict):
 
     url = session.get_url("usr", "main")
 
-    return session.send_recv(re.Request('POST', url, json=user_dict), f"User with name {user_dict['name']} created.")
+    return session.send_recv(re.Request('POST', url, json=user_dict), f"User with name {user_dict['name']} created.",
+                             priority=priority)
 
 
-def bulk_del_user(session: ZIAConnector, user_ids: List[int]):
+def bulk_del_user(session: ZIAConnector, user_ids: List[int], priority: str = None):
     """Bulk delete users up to a maximum of 500 users per request.
 
     Bulk delete users up to a maximum of 500 users per request.
@@ -202,6 +222,7 @@ def bulk_del_user(session: ZIAConnector, user_ids: List[int]):
     Args:
         session (ZIAConnector): Active API session.
         user_ids: User identifiers in a list.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         Ids that were deleted.
@@ -213,15 +234,16 @@ def bulk_del_user(session: ZIAConnector, user_ids: List[int]):
         "ids": user_ids
     }
 
-    return session.send_recv(re.Request('POST', url, json=data), "Bulk user deletion made.")
+    return session.send_recv(re.Request('POST', url, json=data), "Bulk user deletion made.", priority=priority)
 
 
-def del_user(session: ZIAConnector, user_id: int):
+def del_user(session: ZIAConnector, user_id: int, priority: str = None):
     """Deletes the user for the specified ID.
 
     Args:
         session (ZIAConnector): Active API session.
         user_id: User identifier.
+        priority (str, optional): Scheduling hint: 'interactive', 'normal' or 'bulk'. See `ZIAConnector.send_recv`.
 
     Returns:
         JSON dict or HTTP response body.
@@ -229,4 +251,4 @@ def del_user(session: ZIAConnector, user_id: int):
 
     url = session.get_url('usr', 'usr', userId=user_id)
 
-    return session.send_recv(re.Request('DELETE', url), f"User {user_id} deleted.")
+    return session.send_recv(re.Request('DELETE', url), f"User {user_id} deleted.", priority=priority)
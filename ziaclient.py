@@ -1,36 +1,132 @@
 """
 Script that maps command line instructions with the available configured methods in the zia_client package.
 """
+import contextlib
+import sys
+import time
 
-from api_parser import create_parser
-from zia_client import ZIAConnector
-from zia_client._utils import print_json, save_json
+_START = time.perf_counter()
+
+from api_parser import create_parser  # noqa: E402
+
+_IMPORTED = time.perf_counter()
+
+
+def run(args, timer=None):
+    """
+    Runs the parsed command: login, subcommand, output and logout.
+
+    Args:
+        args: Parsed arguments.
+        timer: Phase timer. Does nothing by default.
+    """
+    from zia_client._profiling import NULL_TIMER
+
+    timer = timer or NULL_TIMER
+
+    # The client is imported here, so that --daemon runs do not pay for it
+    with timer.phase('imports'):
+        from zia_client import ZIAConnector
+        from zia_client._deadline import Deadline, within
+        from zia_client._utils import print_json, save_output
+        from zia_client.transport import RequestsTransport
+
+    if args.replay:
+        from zia_client.cassette import ReplayTransport
+        transport = ReplayTransport(args.replay, speed=args.replay_speed)
+    else:
+        # One pooled connection per worker
+        transport = RequestsTransport(pool_size=max(args.workers, 10))
+        if args.record:
+            from zia_client.cassette import RecordingTransport
+            transport = RecordingTransport(transport, args.record)
+
+    client = ZIAConnector(args.conf, verbosity=not args.no_verbosity, creds=args.creds, apply_after=args.apply_after,
+                          transport=transport, max_rps=args.max_rps, activate_interval=args.activate_every,
+                          adaptive=args.adaptive, shared_rate=args.shared_rate, hedge=args.hedge)
+    client.timer = timer
+
+    with timer.phase('login'):
+        client.login()
+
+    deadline = Deadline(args.deadline) if args.deadline is not None else None
+
+    try:
+        if 'func' in vars(args):
+            # The activation and logout are not bound by the deadline
+            with within(deadline):
+                func = args.func
+                if hasattr(func, 'resolve'):
+                    # Mappers are imported lazily, after the 'imports' phase
+                    with timer.phase('mapper_imports'):
+                        func = func.resolve()
+
+                with timer.phase('command'):
+                    result = func(client, args)
+
+                # Lazy results are consumed, and their pages requested, while they are saved.
+                with timer.phase('save_output'):
+                    save_output(result, args.output, args.format, args.compress, echo=args.print_results,
+                                entity=getattr(args, 'entity', None), indent=args.indent)
+
+        if args.pending:
+            with timer.phase('pending'):
+                print_json(client.activation_status())
+
+        with timer.phase('activation'):
+            client.activation.finish()
+    except BaseException:
+        # Logs out without hiding the error
+        with contextlib.suppress(Exception):
+            client.logout()
+        raise
+
+    with timer.phase('logout'):
+        client.logout()
+
+    if args.metrics:
+        print(client.codec.dumps(client.metrics.snapshot(), indent=args.indent), file=sys.stderr)
+
+    if deadline is not None and deadline.exceeded:
+        sys.exit(f'Deadline of {args.deadline:g} seconds reached: the results are partial.')
 
 
 def main():
     """
     Main function of the script
     """
+    start = time.perf_counter()
     parser = create_parser()
 
     # Parse args
     args = parser.parse_args()
 
-    client = ZIAConnector(args.conf, verbosity=not args.no_verbosity, creds=args.creds, apply_after=args.apply_after)
-    client.login()
+    if args.daemon:
+        from api_parser._daemon.client import run_remote
+        run_remote(args, sys.argv[1:])
+        return
+
+    if not args.profile:
+        run(args)
+        return
 
-    if 'func' in vars(args):
-        result = args.func(client, args)
+    import cProfile
 
-        save_json(result, args.output)
+    parsed = time.perf_counter()
 
-        if args.print_results:
-            print_json(result)
+    from zia_client._profiling import PhaseTimer, write_profile
 
-    if args.pending:
-        print_json(client.activation_status())
+    timer = PhaseTimer()
+    timer.add('imports', _IMPORTED - _START + time.perf_counter() - parsed)
+    timer.add('parse_args', parsed - start)
 
-    client.logout()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        run(args, timer)
+    finally:
+        profiler.disable()
+        write_profile(timer, profiler, args.output, time.perf_counter() - _START)
 
 
 if __name__ == "__main__":